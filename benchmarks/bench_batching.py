@@ -0,0 +1,84 @@
+"""Compare the ways of sending a burst of commands to one device.
+
+Each repeat configures every motor of a STEP800 (32 commands): ``set``
+sends them one call at a time, ``send_many`` encodes them up front and
+sends them back-to-back (``sendmmsg`` with a single system call, where
+available) and ``bundle`` packs them into OSC bundles.
+Times are per burst; the device is a local socket that is never read.
+"""
+
+
+import socket
+
+from common import argument_parser, emit, measure
+
+from stepseries import commands
+from stepseries.server import Manager, _pack_bundles, _sendmmsg
+from stepseries.step400 import STEP400
+
+
+def burst() -> list:
+    return [
+        command
+        for motor_id in range(1, 9)
+        for command in (
+            commands.SetMicrostepMode(motor_id, 7),
+            commands.SetLowSpeedOptimizeThreshold(motor_id, 15.5),
+            commands.SetSpeedProfile(motor_id, 2000.0, 2000.0, 620.0),
+            commands.SetKval(motor_id, 60, 119, 119, 119),
+        )
+    ]
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main() -> None:
+    parser = argument_parser(__doc__.splitlines()[0])
+    parser.set_defaults(number=200)
+    args = parser.parse_args()
+
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sink.bind(("127.0.0.1", 0))
+    address, port = sink.getsockname()
+    device = STEP400(0, address, port, server_port=free_port())
+    device._is_closed = False  # There is no board to answer 'SetDestIP'
+    manager = Manager(sendmmsg=True)
+    mmsg_device = STEP400(0, address, port, server_port=free_port(), manager=manager)
+    mmsg_device._is_closed = False
+
+    def set_loop() -> None:
+        for command in burst():
+            device.set(command)
+
+    dgrams = [command.encode() for command in burst()]
+    n_commands = len(dgrams)
+    set_us = measure(set_loop, args.number)
+    results = [
+        {"method": "set", "datagrams": n_commands, "burst_us": set_us, "speedup": 1.0}
+    ]
+    methods = [("send_many", device, False), ("bundle", device, True)]
+    if _sendmmsg is not None:
+        methods.insert(1, ("sendmmsg", mmsg_device, False))
+    for method, d, bundle in methods:
+        us = measure(lambda: d.send_many(burst(), bundle=bundle), args.number)
+        results.append(
+            {
+                "method": method,
+                "datagrams": len(_pack_bundles(dgrams)) if bundle else n_commands,
+                "burst_us": us,
+                "speedup": set_us / us,
+            }
+        )
+
+    device.close()
+    manager.shutdown()
+    sink.close()
+    emit("batching", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
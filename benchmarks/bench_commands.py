@@ -0,0 +1,86 @@
+"""Compare the command encoders across every command type.
+
+``legacy`` is the ``dataclasses.asdict`` plus ``OscMessageBuilder`` path
+``OSCCommand.build`` used before encoders were compiled per class,
+``encode`` produces the datagram that is sent to the device (``cached``
+when the same command is sent repeatedly, e.g. when polling) and
+``build`` additionally wraps it in a python-osc ``OscMessage``.
+"""
+
+
+import inspect
+from dataclasses import asdict, fields
+
+from common import argument_parser, emit, measure
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from stepseries import commands
+
+SAMPLE_VALUES = {int: 3, float: 620.5, bool: True}
+
+COMMAND_CLASSES = [
+    cls
+    for cls in vars(commands).values()
+    if inspect.isclass(cls)
+    and issubclass(cls, commands.OSCCommand)
+    and cls not in (commands.OSCCommand, commands.OSCGetCommand, commands.OSCSetCommand)
+]
+
+
+def legacy_build(command: commands.OSCCommand) -> bytes:
+    """The former ``OSCCommand.build``, returning the datagram."""
+
+    builder_dict = asdict(command)
+    address = builder_dict.pop("address")
+    builder_dict.pop("callback", None)
+    builder_dict.pop("response_cls", None)
+
+    builder = OscMessageBuilder(address=address)
+    for v in builder_dict.values():
+        if isinstance(v, bool):
+            v = int(v)
+        builder.add_arg(v)
+
+    return builder.build().dgram
+
+
+def sample_command(cls) -> commands.OSCCommand:
+    return cls(
+        *[
+            SAMPLE_VALUES[f.type]
+            for f in fields(cls)
+            if f.init and f.type in SAMPLE_VALUES
+        ]
+    )
+
+
+def main() -> None:
+    args = argument_parser(__doc__.splitlines()[0]).parse_args()
+
+    results = list()
+    for cls in COMMAND_CLASSES:
+        command = sample_command(cls)
+        assert command.encode() == legacy_build(command)
+
+        legacy = measure(lambda: legacy_build(command), args.number)
+        cached = measure(command.encode, args.number)
+        build = measure(command.build, args.number)
+        commands.set_encode_cache_size(0)
+        encode = measure(command.encode, args.number)
+        commands.set_encode_cache_size(commands.ENCODE_CACHE_SIZE)
+        results.append(
+            {
+                "command": cls.__name__,
+                "legacy_us": legacy,
+                "encode_us": encode,
+                "cached_us": cached,
+                "build_us": build,
+                "speedup": legacy / encode,
+            }
+        )
+
+    emit("commands", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare decoding received datagrams with python-osc and ``stepseries.osc``.
+
+``pythonosc`` is how incoming datagrams were decoded before
+(``OscMessage``, or ``OscPacket`` for bundles), ``parse`` decodes the
+datagram as received and ``view`` decodes a ``memoryview`` slice of a
+larger receive buffer, as the receivers do.
+"""
+
+
+from common import argument_parser, emit, measure
+from pythonosc.osc_bundle_builder import IMMEDIATELY, OscBundleBuilder
+from pythonosc.osc_message import OscMessage
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_packet import OscPacket
+
+from stepseries.osc import parse_datagram
+
+
+def build(address: str, *args) -> OscMessage:
+    builder = OscMessageBuilder(address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build()
+
+
+def bundle(*messages: OscMessage) -> bytes:
+    builder = OscBundleBuilder(IMMEDIATELY)
+    for message in messages:
+        builder.add_content(message)
+    return builder.build().dgram
+
+
+DATAGRAMS = {
+    "position": build("/position", 1, 123456).dgram,
+    "speed": build("/speed", 1, 620.5).dgram,
+    "version": build("/version", "STEP400", "1.0.2", "Nov  1 2021 13:55:40").dgram,
+    "bundle_x8": bundle(*[build("/position", i, 1000 * i) for i in range(1, 9)]),
+}
+
+
+def pythonosc_parse(dgram: bytes) -> list:
+    if OscMessage.dgram_is_message(dgram):
+        message = OscMessage(dgram)
+        return [(message.address, message.params)]
+    return [(m.message.address, m.message.params) for m in OscPacket(dgram).messages]
+
+
+def main() -> None:
+    args = argument_parser(__doc__.splitlines()[0]).parse_args()
+
+    buffer = memoryview(bytearray(65535))
+    results = list()
+    for name, dgram in DATAGRAMS.items():
+        buffer[: len(dgram)] = dgram
+        view = buffer[: len(dgram)]
+
+        legacy = measure(lambda: pythonosc_parse(dgram), args.number)
+        parse = measure(lambda: parse_datagram(dgram), args.number)
+        view_parse = measure(lambda: parse_datagram(view), args.number)
+        results.append(
+            {
+                "datagram": name,
+                "pythonosc_us": legacy,
+                "parse_us": parse,
+                "view_us": view_parse,
+                "speedup": legacy / parse,
+            }
+        )
+
+    emit("parse", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Compare the receivers under a stream of reports from several devices.
+
+Each device (a local socket on its own loopback address) streams
+numbered ``/position`` reports from its own process. For every receiver
+mode this reports the CPU time spent by this process per message
+received (excluding the receiving processes of the ``processes`` mode),
+the share of messages received, and the share of devices whose messages
+were all handled in the order they were sent, along with the datagrams
+the kernel dropped as the receive buffer was full (on Linux).
+"""
+
+
+import socket
+import time
+from multiprocessing import Process
+from typing import Optional
+
+from common import argument_parser, emit
+
+from stepseries import responses
+from stepseries.receivers import RECEIVERS
+from stepseries.server import Manager
+from stepseries.step400 import STEP400
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def stream(address: str, server_port: int, n: int, rate: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((address, 0))
+    dgrams = [responses_dgram(i) for i in range(n)]
+    start = time.monotonic()
+    for i, dgram in enumerate(dgrams):
+        sock.sendto(dgram, ("127.0.0.1", server_port))
+        if i % 100 == 99:
+            time.sleep(max(start + (i + 1) / rate - time.monotonic(), 0))
+    sock.close()
+
+
+def responses_dgram(i: int) -> bytes:
+    return b"/position\0\0\0,ii\0" + (1).to_bytes(4, "big") + i.to_bytes(4, "big")
+
+
+def run(
+    mode: str, n_devices: int, n: int, rate: int, recv_buffer: Optional[int]
+) -> dict:
+    manager = Manager(receiver=mode, recv_buffer=recv_buffer)
+    server_port = free_port()
+    addresses = [f"127.0.0.{i + 2}" for i in range(n_devices)]
+    received = {address: list() for address in addresses}
+    for address in addresses:
+        device = STEP400(0, address, server_port=server_port, manager=manager)
+        device.on(
+            responses.Position,
+            lambda m, r=received[address]: r.append(m.ABS_POS),
+        )
+
+    senders = [
+        Process(target=stream, args=(address, server_port, n, rate))
+        for address in addresses
+    ]
+    cpu, wall = time.process_time(), time.monotonic()
+    for sender in senders:
+        sender.start()
+    for sender in senders:
+        sender.join()
+
+    # Wait for the backlog to be handled
+    total = n * n_devices
+    last, deadline = -1, time.monotonic() + 5
+    while time.monotonic() < deadline:
+        count = sum(len(r) for r in received.values())
+        if count in (last, total):
+            break
+        last = count
+        time.sleep(0.2)
+    cpu, wall = time.process_time() - cpu, time.monotonic() - wall
+    stats = [s for s in manager.stats() if s.kind == "receive"]
+    manager.shutdown()
+
+    count = sum(len(r) for r in received.values())
+    in_order = sum(r == sorted(r) for r in received.values())
+    return {
+        "receiver": mode,
+        "messages": total,
+        "received_pct": count / total * 100,
+        "cpu_us_per_msg": cpu / max(count, 1) * 1e6,
+        "in_order_pct": in_order / n_devices * 100,
+        "kernel_drops": sum(s.drops or 0 for s in stats),
+        "wall_s": wall,
+    }
+
+
+def main() -> None:
+    parser = argument_parser(__doc__.splitlines()[0])
+    parser.set_defaults(number=5000)
+    parser.add_argument(
+        "--devices",
+        type=int,
+        default=4,
+        help="devices streaming (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=int,
+        default=5000,
+        help="reports per second per device (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--recv-buffer",
+        type=int,
+        help="receive buffer size to request, in bytes (default: system default)",
+    )
+    args = parser.parse_args()
+
+    results = [
+        run(mode, args.devices, args.number, args.rate, args.recv_buffer)
+        for mode in RECEIVERS
+    ]
+    emit("receive", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
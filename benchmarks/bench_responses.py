@@ -0,0 +1,118 @@
+"""Compare the response constructors across every response type.
+
+``legacy`` is the reflection-based string constructor the library used
+before parsers were generated per class, ``string`` is the current
+string constructor and ``typed`` builds the response straight from the
+arguments decoded by python-osc (the path taken for received messages).
+"""
+
+
+import ast
+import re
+from dataclasses import fields
+
+from common import argument_parser, emit, measure
+
+from stepseries import responses
+
+SAMPLE_VALUES = {int: 3, float: 620.5, str: "Default"}
+RESPONSE_CLASSES = [
+    cls
+    for cls in vars(responses).values()
+    if isinstance(cls, type)
+    and issubclass(cls, responses.OSCResponse)
+    and cls is not responses.OSCResponse
+]
+
+
+def legacy_init(self, *args, **kwargs):
+    """The generic ``__init__`` formerly installed by ``responses.dataclass``."""
+
+    original_init = type(self).__init__.__wrapped__
+
+    if all([isinstance(x, str) for x in args]):
+        args = (" ".join(args),)
+
+    if len(args) == 1 and isinstance(args[0], str):
+        for i, field_name in enumerate(self.__annotations__.keys()):
+            if field_name.endswith("_re"):
+                match: re.Match = getattr(self, field_name).search(args[0])
+                kwargs[field_name[:-3]] = match[0]
+                args = ((args[0][: match.start()] + args[0][match.end() :]).strip(),)
+        args = args[0].split()
+
+        field_names = [
+            k
+            for k in self.__annotations__.keys()
+            if k not in kwargs and not k.endswith("_re")
+        ]
+        for i, arg in enumerate(args):
+            field_name = field_names[i]
+            kwargs[field_name] = arg
+        args = tuple()
+        kwargs.pop("address", None)
+
+    args = list(args)
+    if args and args[0] == self.address:
+        args.pop(0)
+
+    for i, arg in enumerate(args):
+        try:
+            args[i] = ast.literal_eval(arg.capitalize())
+        except (AttributeError, ValueError, SyntaxError, NameError):
+            pass
+
+    for k, v in kwargs.items():
+        try:
+            kwargs[k] = ast.literal_eval(v.capitalize())
+        except (AttributeError, ValueError, SyntaxError, NameError):
+            pass
+
+    original_init(self, *args, **kwargs)
+
+
+def legacy_construct(cls, message: str):
+    self = cls.__new__(cls, message)
+    legacy_init(self, message)
+    return self
+
+
+def sample_message(cls):
+    if cls is responses.Version:
+        osc_args = ("STEP400", "1.0.2", "Nov  1 2021 13:55:40")
+    else:
+        osc_args = tuple(
+            SAMPLE_VALUES[f.type]
+            for f in fields(cls)
+            if f.init and f.name != "address" and f.type in SAMPLE_VALUES
+        )
+    return osc_args, cls.address + " " + " ".join([str(x) for x in osc_args])
+
+
+def main() -> None:
+    args = argument_parser(__doc__.splitlines()[0]).parse_args()
+
+    results = list()
+    for cls in RESPONSE_CLASSES:
+        osc_args, message = sample_message(cls)
+        assert legacy_construct(cls, message) == cls(message)
+        assert responses.parse(cls.address, *osc_args) == cls(message)
+
+        legacy = measure(lambda: legacy_construct(cls, message), args.number)
+        string = measure(lambda: cls(message), args.number)
+        typed = measure(lambda: responses.parse(cls.address, *osc_args), args.number)
+        results.append(
+            {
+                "response": cls.__name__,
+                "legacy_us": legacy,
+                "string_us": string,
+                "typed_us": typed,
+                "speedup": legacy / typed,
+            }
+        )
+
+    emit("responses", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare routing through the device manager for a fleet of devices.
+
+A synthetic fleet of devices is bound to one ``Manager``. ``legacy``
+replays the list scans the manager used before it kept dict indexes;
+``indexed`` is the current manager. ``receive`` routes one incoming
+message to its device, ``send`` looks up the socket of a device.
+"""
+
+
+import socket
+
+from common import argument_parser, emit, measure
+
+from stepseries.server import Manager
+
+
+class FakeDevice(object):
+    """Just enough of a device to be bound to a manager."""
+
+    def __init__(self, address: str, server_port: int) -> None:
+        self.address = address
+        self.port = 50000
+        self.server_address = "0.0.0.0"
+        self.server_port = server_port
+
+    def _handle_incoming_message(self, message_address: str, *osc_args) -> None:
+        pass
+
+
+def legacy_receive(bound_devices: list, client_address: tuple) -> None:
+    address, _ = client_address
+    for (device, _, _, _) in bound_devices:
+        if device.address == address:
+            device._handle_incoming_message("/busy", 1, 0)
+
+
+def legacy_send(bound_devices: list, device: FakeDevice) -> None:
+    for d, c, _, _ in bound_devices:
+        if d == device:
+            return c
+
+
+def main() -> None:
+    parser = argument_parser(__doc__.splitlines()[0])
+    parser.add_argument(
+        "--devices", type=int, default=200, help="fleet size (default: %(default)s)"
+    )
+    args = parser.parse_args()
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        server_port = s.getsockname()[1]
+
+    manager = Manager()
+    fleet = [
+        FakeDevice(f"10.0.{i // 250}.{i % 250 + 1}", server_port)
+        for i in range(args.devices)
+    ]
+    for device in fleet:
+        manager.add_device(device)
+    bound_devices = [
+        (
+            d,
+            manager._devices[d].socket,
+            manager._servers[(d.server_address, d.server_port)].receiver,
+            None,
+        )
+        for d in fleet
+    ]
+    routes = manager._servers[("0.0.0.0", server_port)].routes
+
+    # The worst case for the scans: the last device bound
+    last = fleet[-1]
+    client_address = (last.address, last.port)
+
+    results = list()
+    for operation, legacy, indexed in (
+        (
+            "receive",
+            lambda: legacy_receive(bound_devices, client_address),
+            lambda: manager._handle_incoming_message(
+                routes, client_address, "/busy", 1, 0
+            ),
+        ),
+        (
+            "send",
+            lambda: legacy_send(bound_devices, last),
+            lambda: manager._get_bound_device(last),
+        ),
+    ):
+        legacy_us = measure(legacy, args.number)
+        indexed_us = measure(indexed, args.number)
+        results.append(
+            {
+                "operation": operation,
+                "devices": args.devices,
+                "legacy_us": legacy_us,
+                "indexed_us": indexed_us,
+                "speedup": legacy_us / indexed_us,
+            }
+        )
+
+    manager.shutdown()
+    emit("routing", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
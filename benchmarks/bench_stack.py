@@ -0,0 +1,210 @@
+"""Measure the full send/receive stack against simulated devices.
+
+Every device talks to a :py:class:`stepseries.simulator.Simulator` on its
+own loopback address, through a real ``Manager`` and real sockets:
+
+- ``get_latency``: round trip of ``get()``, as percentiles.
+- ``set_rate``: ``set()`` commands sent per second.
+- ``report_rate``: reports per second handled by
+  ``_handle_incoming_message`` (decoded into responses, no callbacks).
+- ``callback_overhead``: time added per registered callback per report.
+- ``scaling``: ``get()`` round trips per second across all devices, each
+  polled by its own thread, as the number of devices grows.
+
+Results are emitted one metric per row, so runs of different releases
+can be compared with ``benchmarks/run.py``.
+"""
+
+
+import socket
+import time
+from threading import Thread
+from typing import Any, Dict, List
+
+from common import argument_parser, emit
+
+from stepseries import commands, responses
+from stepseries.server import Manager
+from stepseries.simulator import Simulator
+from stepseries.step400 import STEP400
+from stepseries.step800 import STEP800
+
+MODELS = {"STEP400": STEP400, "STEP800": STEP800}
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def row(benchmark: str, model: str, devices: int, metric: str, value: float) -> dict:
+    return {
+        "benchmark": benchmark,
+        "model": model,
+        "devices": devices,
+        "metric": metric,
+        "value": value,
+    }
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * pct / 100), len(samples) - 1)]
+
+
+class Fleet(object):
+    """Simulators and the devices bound to them, on one manager."""
+
+    def __init__(self, model: str, n_devices: int) -> None:
+        self.manager = Manager(receiver="single")
+        server_port = free_port()
+        self.simulators = [
+            Simulator(model, address=f"127.0.0.{i + 2}", server_port=server_port)
+            for i in range(n_devices)
+        ]
+        self.devices = list()
+        for simulator in self.simulators:
+            simulator.start()
+            device = MODELS[model](
+                0,
+                simulator.address,
+                simulator.port,
+                server_port=server_port,
+                manager=self.manager,
+            )
+            device.get(commands.SetDestIP())
+            self.devices.append(device)
+
+    def __enter__(self) -> "Fleet":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.manager.shutdown()
+        for simulator in self.simulators:
+            simulator.close()
+
+
+def get_latency(model: str, number: int) -> List[dict]:
+    with Fleet(model, 1) as fleet:
+        device = fleet.devices[0]
+        command = commands.GetPosition(1)
+        samples = list()
+        for _ in range(number):
+            start = time.perf_counter()
+            device.get(command)
+            samples.append((time.perf_counter() - start) * 1e6)
+
+    return [
+        row("get_latency", model, 1, f"p{pct}_us", percentile(samples, pct))
+        for pct in (50, 90, 99)
+    ] + [row("get_latency", model, 1, "max_us", max(samples))]
+
+
+def set_rate(model: str, number: int) -> List[dict]:
+    with Fleet(model, 1) as fleet:
+        device = fleet.devices[0]
+        command = commands.SetMaxSpeed(1, 650)
+        start = time.perf_counter()
+        for _ in range(number):
+            device.set(command)
+        elapsed = time.perf_counter() - start
+
+    return [row("set_rate", model, 1, "commands_per_s", number / elapsed)]
+
+
+def handle_reports(device: STEP400, number: int) -> float:
+    """Return the seconds taken to handle `number` position reports."""
+
+    start = time.perf_counter()
+    for i in range(number):
+        device._handle_incoming_message("/position", 1, i)
+    return time.perf_counter() - start
+
+
+def report_rate(model: str, number: int, n_callbacks: int) -> List[dict]:
+    with Fleet(model, 1) as fleet:
+        device = fleet.devices[0]
+        bare = min(handle_reports(device, number) for _ in range(3))
+        for _ in range(n_callbacks):
+            device.on(responses.Position, lambda message: None)
+        loaded = min(handle_reports(device, number) for _ in range(3))
+
+    return [
+        row("report_rate", model, 1, "reports_per_s", number / bare),
+        row(
+            "callback_overhead",
+            model,
+            1,
+            "us_per_callback",
+            (loaded - bare) / number / n_callbacks * 1e6,
+        ),
+    ]
+
+
+def scaling(model: str, n_devices: int, number: int) -> List[dict]:
+    samples: Dict[int, List[float]] = {i: list() for i in range(n_devices)}
+
+    def poll(i: int, device: STEP400) -> None:
+        command = commands.GetPosition(1)
+        for _ in range(number):
+            start = time.perf_counter()
+            device.get(command)
+            samples[i].append((time.perf_counter() - start) * 1e6)
+
+    with Fleet(model, n_devices) as fleet:
+        threads = [
+            Thread(target=poll, args=(i, device))
+            for i, device in enumerate(fleet.devices)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+    latencies = [sample for values in samples.values() for sample in values]
+    return [
+        row("scaling", model, n_devices, "gets_per_s", len(latencies) / elapsed),
+        row("scaling", model, n_devices, "p99_us", percentile(latencies, 99)),
+    ]
+
+
+def main() -> None:
+    parser = argument_parser(__doc__.splitlines()[0])
+    parser.set_defaults(number=2000)
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        choices=list(MODELS),
+        default=list(MODELS),
+        help="models to simulate (default: all)",
+    )
+    parser.add_argument(
+        "--devices",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="device counts for the scaling benchmark (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--callbacks",
+        type=int,
+        default=10,
+        help="callbacks registered to measure their overhead (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    results = list()
+    for model in args.models:
+        results += get_latency(model, args.number)
+        results += set_rate(model, args.number * 10)
+        results += report_rate(model, args.number * 10, args.callbacks)
+        for n_devices in args.devices:
+            results += scaling(model, n_devices, args.number // n_devices)
+    emit("stack", results, args.json)
+
+
+if __name__ == "__main__":
+    main()
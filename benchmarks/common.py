@@ -0,0 +1,69 @@
+"""Helpers shared by the benchmark scripts.
+
+Every script can be run on its own from the repository root, e.g.
+``python benchmarks/bench_responses.py --json out.json``. Timings are
+reported in microseconds per call, taking the best of several repeats.
+``benchmarks/run.py`` runs them all and collects their results.
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Optional
+
+# Allow running the scripts from a source checkout
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+
+def argument_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--number",
+        type=int,
+        default=10000,
+        help="calls per timing repeat (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--json", metavar="PATH", help="also write the results to PATH as JSON"
+    )
+    return parser
+
+
+def measure(fn: Callable[[], Any], number: int, repeat: int = 5) -> float:
+    """Return the best time per call of `fn` in microseconds."""
+
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def emit(name: str, results: List[Dict[str, Any]], path: Optional[str]) -> None:
+    """Print `results` as a table and optionally save them as JSON."""
+
+    if results:
+        columns = list(results[0])
+        widths = [max(len(c), *(len(_format(r[c])) for r in results)) for c in columns]
+        print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        for row in results:
+            print("  ".join(_format(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+    if path:
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "benchmark": name,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
@@ -0,0 +1,131 @@
+"""Run every benchmark and collect the results in one JSON file.
+
+Run from the repository root, e.g.::
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --only stack receive --compare baseline.json
+
+Each ``bench_*.py`` script is run in its own process with its default
+settings, and their results are saved together with the version of
+stepseries and the git revision measured. With ``--compare``, every
+numeric result is printed next to the same result of an earlier run,
+so regressions between releases stand out.
+"""
+
+
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def scripts() -> Dict[str, str]:
+    paths = sorted(glob.glob(os.path.join(HERE, "bench_*.py")))
+    return {os.path.basename(p)[len("bench_") : -len(".py")]: p for p in paths}
+
+
+def revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def version() -> str:
+    sys.path.insert(0, os.path.join(HERE, os.pardir, "src"))
+    import stepseries
+
+    return stepseries.__version__
+
+
+def run(name: str, path: str, extra: List[str]) -> List[dict]:
+    print(f"== {name}", flush=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "results.json")
+        subprocess.run([sys.executable, path, "--json", output, *extra], check=True)
+        with open(output) as f:
+            return json.load(f)["results"]
+
+
+def key(row: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    # Rows are identified by their names (and device count), and compared
+    # by their measurements
+    return tuple((k, v) for k, v in row.items() if isinstance(v, str) or k == "devices")
+
+
+def compare(results: Dict[str, List[dict]], baseline: Dict[str, Any]) -> None:
+    print(f"\n== compared with {baseline.get('revision') or 'baseline'}")
+    for name, rows in results.items():
+        previous = {key(row): row for row in baseline["benchmarks"].get(name, ())}
+        for row in rows:
+            old = previous.get(key(row))
+            if old is None:
+                continue
+            labels = " ".join(str(v) for _, v in key(row))
+            for column, value in row.items():
+                if isinstance(value, float) and isinstance(old.get(column), float):
+                    change = (value / old[column] - 1) * 100 if old[column] else 0.0
+                    print(
+                        f"{name:10} {labels:40} {column:16} "
+                        f"{old[column]:14.3f} -> {value:14.3f} ({change:+.1f}%)"
+                    )
+
+
+def main() -> None:
+    available = scripts()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(available),
+        default=list(available),
+        help="benchmarks to run (default: all)",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        default="benchmarks.json",
+        help="file to write the results to (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--compare", metavar="PATH", help="results of an earlier run to compare with"
+    )
+    parser.add_argument(
+        "extra",
+        nargs=argparse.REMAINDER,
+        help="arguments passed on to every benchmark, after '--'",
+    )
+    args = parser.parse_args()
+    extra = args.extra[1:] if args.extra[:1] == ["--"] else args.extra
+
+    results = {name: run(name, available[name], extra) for name in args.only}
+    report = {
+        "stepseries": version(),
+        "revision": revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
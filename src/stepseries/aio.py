@@ -0,0 +1,464 @@
+"""Drive STEP-series devices from an asyncio event loop.
+
+These classes mirror :py:class:`stepseries.step400.STEP400` and
+:py:class:`stepseries.step800.STEP800`, but every request is a coroutine
+and all the networking runs on the event loop, without any threads.
+
+Example:
+
+    >>> import asyncio
+    >>> from stepseries.aio import AsyncSTEP400
+    >>> from stepseries.commands import GetVersion, SetDestIP
+    >>> from stepseries.responses import Busy
+    >>>
+    >>> async def main() -> None:
+    ...     async with AsyncSTEP400(0, '10.1.21.56') as driver:
+    ...         await driver.set(SetDestIP())
+    ...         print(await driver.get(GetVersion()))
+    ...         async with driver.reports(Busy) as reports:
+    ...             async for report in reports:
+    ...                 print(report)
+    ...
+    >>> asyncio.run(main())
+"""
+
+
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pythonosc.osc_packet import ParseError as OscParseError
+
+from stepseries.commands import OSCCommand, OSCGetCommand, OSCSetCommand, SetDestIP
+from stepseries.exceptions import ClientNotFoundError
+from stepseries.osc import parse_datagram
+from stepseries.responses import OSCResponse
+from stepseries.server import _pack_bundles
+from stepseries.step800 import STEP800
+from stepseries.stepXXX import _DeviceBase
+
+
+class _ServerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, manager: "AsyncManager") -> None:
+        self._manager = manager
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self._manager._handle_datagram(data, addr)
+
+
+class AsyncManager(object):
+    """Route datagrams between an event loop and the bound devices.
+
+    One datagram endpoint is opened per server address and port and is
+    shared by all the devices bound to it. It is used both to receive
+    their messages and to send them commands.
+    """
+
+    _endpoints: Dict[Tuple[str, int], asyncio.DatagramTransport]
+    _device_endpoints: Dict["AsyncSTEPXXX", Tuple[str, int]]
+    _devices_by_address: Dict[str, List["AsyncSTEPXXX"]]
+    _lock: Optional[asyncio.Lock]
+
+    def __init__(self) -> None:
+        self._endpoints = dict()
+        self._device_endpoints = dict()
+        self._devices_by_address = dict()
+        self._lock = None
+
+    async def add_device(self, device: "AsyncSTEPXXX") -> None:
+        """
+        For internal use only. Add a device to send data to when it is
+        received.
+        """
+
+        if device in self._device_endpoints:
+            return
+
+        # Only open one endpoint per server address, even if devices
+        # are added concurrently
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        key = (device.server_address, device.server_port)
+        async with self._lock:
+            if key not in self._endpoints:
+                loop = asyncio.get_running_loop()
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _ServerProtocol(self), local_addr=key
+                )
+                self._endpoints[key] = transport
+
+        self._device_endpoints[device] = key
+        self._devices_by_address.setdefault(device.address, list()).append(device)
+
+    def remove_device(self, device: "AsyncSTEPXXX") -> None:
+        """
+        For internal use only. Remove a tracked device to stop sending
+        data to it.
+        """
+
+        key = self._device_endpoints.pop(device, None)
+        if key is None:
+            return
+
+        devices = self._devices_by_address[device.address]
+        devices.remove(device)
+        if not devices:
+            del self._devices_by_address[device.address]
+
+        # Close the endpoint once its last device is removed
+        if key not in self._device_endpoints.values():
+            self._endpoints.pop(key).close()
+
+        device._is_closed = True
+
+    def close(self) -> None:
+        """Close all the endpoints and forget every device."""
+
+        for device in list(self._device_endpoints):
+            self.remove_device(device)
+
+    def _get_transport(self, device: "AsyncSTEPXXX") -> asyncio.DatagramTransport:
+        try:
+            return self._endpoints[self._device_endpoints[device]]
+        except KeyError:
+            raise ClientNotFoundError("device is not registered with a server")
+
+    def send(self, device: "AsyncSTEPXXX", message: OSCCommand) -> None:
+        """Send `message` to the `device`."""
+
+        self._get_transport(device).sendto(
+            message.encode(), (device.address, device.port)
+        )
+
+    def send_many(
+        self,
+        device: "AsyncSTEPXXX",
+        messages: Iterable[OSCCommand],
+        bundle: bool = False,
+    ) -> None:
+        """Send all `messages` to the `device`.
+
+        See :py:meth:`stepseries.server.Manager.send_many`.
+        """
+
+        transport = self._get_transport(device)
+        dgrams = [message.encode() for message in messages]
+        if bundle:
+            dgrams = _pack_bundles(dgrams)
+
+        for dgram in dgrams:
+            transport.sendto(dgram, (device.address, device.port))
+
+    def _handle_datagram(self, data: bytes, addr: Tuple[str, int]) -> None:
+        devices = self._devices_by_address.get(addr[0])
+        if not devices:
+            return
+
+        try:
+            messages = parse_datagram(data)
+        except OscParseError:
+            return
+
+        for address, args in messages:
+            for device in list(devices):
+                device._handle_incoming_message(address, *args)
+
+
+DEFAULT_MANAGER = AsyncManager()
+
+
+class AsyncSTEPXXX(_DeviceBase):
+    """Send and receive data from a STEP-series motor driver on asyncio.
+
+    The device must be opened, with :py:meth:`open` or ``async with``,
+    from within the event loop before it is used.
+
+    Args:
+        id (`int`):
+            The id set by the DIP switches on the device.
+        address (`str`):
+            The ip address of the device. Defaults to `10.0.0.100`.
+        port (`int`):
+            The local port the device is listening on. Defaults to
+            `50000`.
+        server_address (`str`):
+            The ip address of the server (this machine). Should always
+            be `0.0.0.0`. Defaults to `0.0.0.0`.
+        server_port (`int`):
+            The port the server is listening on. Defaults to `50100`.
+        manager (`AsyncManager`, `None`):
+            The manager to bind this device to. Defaults to
+            :py:data:`DEFAULT_MANAGER`.
+    """
+
+    _manager: AsyncManager
+
+    def __init__(
+        self,
+        id: int,
+        address: str = "10.0.0.100",
+        port: int = 50000,
+        server_address: str = "0.0.0.0",
+        server_port: int = 50100,
+        manager: Optional[AsyncManager] = None,
+    ) -> None:
+        super().__init__(id, address, port, server_address, server_port)
+
+        self._manager = manager if manager is not None else DEFAULT_MANAGER
+
+    async def __aenter__(self) -> "AsyncSTEPXXX":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _new_future(self) -> asyncio.Future:
+        return asyncio.get_running_loop().create_future()
+
+    def _call_later(self, delay: float, fn: Callable[[], None]) -> asyncio.TimerHandle:
+        return asyncio.get_running_loop().call_later(delay, fn)
+
+    def _call_watch_later(
+        self, delay: float, fn: Callable[[], None]
+    ) -> asyncio.TimerHandle:
+        return self._call_later(delay, fn)
+
+    def _start_future(self, future: asyncio.Future) -> bool:
+        return not future.cancelled()
+
+    async def open(self) -> None:
+        """Bind the device to its manager to start receiving messages.
+
+        Note: Send the command 'SetDestIP' afterwards to open the
+        connection with the device.
+        """
+        await self._manager.add_device(self)
+
+    def close(self) -> None:
+        """Close the connection to the stepseries device.
+
+        Note: No other command after this one should be called on the
+        device.
+        """
+        self._manager.remove_device(self)
+        self._is_closed = True
+
+    async def get(
+        self,
+        command: OSCGetCommand,
+        with_callback: bool = True,
+        timeout: Optional[float] = 2.0,
+    ) -> Union[OSCResponse, List[OSCResponse]]:
+        """Send a 'get' command to the device and return the response.
+
+        Note:
+            The responses are also sent to each applicable callback.
+
+        Args:
+            command (`OSCGetCommand`):
+                The completed command template (`stepseries.commands`).
+            with_callback (`bool`):
+                Send the response to callbacks as well
+                (defaults to `True`).
+            timeout (`float`, `None`):
+                Seconds to wait for the response, or `None` to wait
+                indefinitely (defaults to `2.0`).
+
+        Raises:
+            `TypeError`:
+                `command` is not an `OSCGetCommand`.
+            `TimeoutError`:
+                The response was not received in time.
+        """
+
+        self._prepare_get(command)
+
+        request = self._add_request(command, with_callback, timeout)
+        try:
+            self._manager.send(self, command)
+        except BaseException:
+            request.future.cancel()
+            raise
+
+        return await request.future
+
+    async def get_many(
+        self, commands: Iterable[OSCGetCommand], with_callback: bool = True
+    ) -> List[Union[OSCResponse, List[OSCResponse]]]:
+        """Send several 'get' commands at once and return their responses.
+
+        See :py:meth:`stepseries.stepXXX.STEPXXX.get_many`.
+        """
+
+        commands = list(commands)
+        for command in commands:
+            self._prepare_get(command)
+
+        futures = [
+            self._add_request(command, with_callback, 2.0).future
+            for command in commands
+        ]
+        try:
+            self._manager.send_many(self, commands)
+            return list(await asyncio.gather(*futures))
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def set(self, command: OSCSetCommand) -> None:
+        """Send a 'set' command to the device.
+
+        Args:
+            command (`OSCCommand`):
+                The completed command template (`stepseries.commands`).
+
+        Raises:
+            `TypeError`:
+                `command` is not an `OSCSetCommand`.
+        """
+        # Because SetDestIP has "set" in the name, allow this method
+        # support it
+        if isinstance(command, SetDestIP):
+            await self.get(command)
+            return
+
+        if not isinstance(command, OSCSetCommand):
+            raise TypeError(
+                "argument 'command' expected to be 'OSCSetCommand', "
+                f"'{type(command).__name__}' found"
+            )
+
+        self._check_status()
+        self._prepare_set(command)
+
+        self._manager.send(self, command)
+
+    async def send_many(
+        self, commands: Iterable[OSCSetCommand], bundle: bool = False
+    ) -> None:
+        """Send several 'set' commands to the device at once.
+
+        See :py:meth:`stepseries.stepXXX.STEPXXX.send_many`.
+        """
+
+        commands = list(commands)
+        if not commands:
+            return
+
+        self._check_status()
+        for command in commands:
+            self._prepare_set(command)
+
+        self._manager.send_many(self, commands, bundle)
+
+    def reports(
+        self, message_type: Optional[type] = None, maxsize: int = 0
+    ) -> "ReportIterator":
+        """Iterate over the messages received of `message_type`.
+
+        Messages are buffered from the moment this is called, so no
+        report is missed between sending a command and starting to
+        iterate. Use the iterator with ``async with`` (or call its
+        :py:meth:`ReportIterator.close`) to stop buffering.
+
+        Example:
+
+            >>> async with driver.reports(Busy) as reports:
+            ...     async for report in reports:
+            ...         print(report)
+
+        Args:
+            message_type (`OSCResponse`, `None`):
+                The message type to filter for. If `None`, then all
+                messages received are returned.
+            maxsize (`int`):
+                The most messages to buffer. Once full, the oldest
+                message is discarded for each new one. Defaults to `0`
+                (unbounded).
+        """
+
+        return ReportIterator(self, message_type, maxsize)
+
+
+# Queued once a report iterator is closed, to end the iteration
+_CLOSED = object()
+
+
+class ReportIterator(object):
+    """Asynchronously iterate over the messages received by a device.
+
+    Created by :py:meth:`AsyncSTEPXXX.reports`.
+    """
+
+    _device: AsyncSTEPXXX
+    _queue: asyncio.Queue
+    _maxsize: int
+    _closed: bool
+
+    def __init__(
+        self, device: AsyncSTEPXXX, message_type: Optional[type], maxsize: int
+    ) -> None:
+        self._device = device
+        # Unbounded, so that there is always room to wake up the reader
+        self._queue = asyncio.Queue()
+        self._maxsize = maxsize
+        self._closed = False
+        device.on(message_type, self._put)
+
+    def __aiter__(self) -> "ReportIterator":
+        return self
+
+    async def __anext__(self) -> OSCResponse:
+        message = await self._queue.get()
+        if message is _CLOSED:
+            # Wake up any other reader as well
+            self._queue.put_nowait(_CLOSED)
+            raise StopAsyncIteration
+        return message
+
+    async def __aenter__(self) -> "ReportIterator":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _put(self, message: OSCResponse) -> None:
+        if self._closed:
+            return
+        if self._maxsize and self._queue.qsize() >= self._maxsize:
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    def close(self) -> None:
+        """Stop receiving messages, and end the iteration.
+
+        The messages already received are returned first.
+        """
+
+        if self._closed:
+            return
+        self._device.remove(self._put)
+        self._closed = True
+        self._queue.put_nowait(_CLOSED)
+
+
+class AsyncSTEP400(AsyncSTEPXXX):
+    """Send and receive data from a STEP400 motor driver on asyncio.
+
+    See :py:class:`AsyncSTEPXXX` for the arguments.
+    """
+
+    _n_motors = 4
+
+
+class AsyncSTEP800(AsyncSTEPXXX):
+    """Send and receive data from a STEP800 motor driver on asyncio.
+
+    STEP400-only commands raise `InvalidCommandError`, as they do with
+    :py:class:`stepseries.step800.STEP800`. See :py:class:`AsyncSTEPXXX`
+    for the arguments.
+    """
+
+    _n_motors = 8
+    _invalid_commands = STEP800._invalid_commands
+    _check_command = STEP800._check_command
@@ -14,14 +14,144 @@ responses from the device.
 """
 
 
-from dataclasses import asdict, dataclass, field
-from typing import Callable, Optional, Tuple
+import struct
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from pythonosc.osc_message import OscMessage
 from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.parsing import osc_types
 
 from stepseries import responses
 
+# Fields that describe the command rather than being sent with it
+_NOT_SENT = ("address", "callback", "response_cls")
+
+# OSC type tag and struct format for each natively supported type
+_ARG_TYPES = {
+    int: ("i", "i"),
+    bool: ("i", "i"),
+    float: ("f", "f"),
+    type(None): ("N", ""),
+}
+
+
+def _build_generic(address: str, values: Tuple[Any, ...]) -> bytes:
+    # Code is largely copy-paste from pythonosc.UDPClient
+    builder = OscMessageBuilder(address=address)
+    for v in values:
+        if isinstance(v, bool):
+            v = int(v)
+        builder.add_arg(v)
+
+    return builder.build().dgram
+
+
+def _compile_encoder(
+    cls: type,
+) -> Tuple[Callable[..., Tuple[Any, ...]], Callable[..., bytes]]:
+    """Create the datagram encoder for commands of type `cls`.
+
+    The address padding, and the type tags and ``struct`` format for
+    each combination of argument types, are only worked out once per
+    class. Values the fast path cannot represent (i.e. strings or
+    integers that need 64 bits) are encoded by python-osc's builder.
+
+    Returns:
+        A function returning the values to send from a command and a
+        function packing an address and those values into a datagram.
+    """
+
+    names = tuple(f.name for f in fields(cls) if f.name not in _NOT_SENT)
+    default_address = cls.address
+    address_dgram = osc_types.write_string(default_address)
+    formats: Dict[Tuple[type, ...], Tuple[bytes, Optional[struct.Struct], bool]] = {}
+
+    if len(names) > 1:
+        get_values = attrgetter(*names)
+    elif names:
+        get_value = attrgetter(names[0])
+
+        def get_values(command: "OSCCommand") -> Tuple[Any, ...]:
+            return (get_value(command),)
+
+    else:
+
+        def get_values(command: "OSCCommand") -> Tuple[Any, ...]:
+            return ()
+
+    def compile_format(signature: Tuple[type, ...]):
+        tags, codes = (
+            zip(*[_ARG_TYPES[t] for t in signature]) if signature else ((), ())
+        )
+        prefix = address_dgram + osc_types.write_string("," + "".join(tags))
+        packer = struct.Struct(">" + "".join(codes)) if any(codes) else None
+        formats[signature] = (prefix, packer, "N" in tags)
+        return formats[signature]
+
+    def pack(address: str, *values: Any) -> bytes:
+        if address != default_address:
+            return _build_generic(address, values)
+
+        signature = tuple(map(type, values))
+        try:
+            prefix, packer, has_nil = formats[signature]
+        except KeyError:
+            if not all(t in _ARG_TYPES for t in signature):
+                return _build_generic(address, values)
+            prefix, packer, has_nil = compile_format(signature)
+
+        if packer is None:
+            return prefix
+        try:
+            if has_nil:
+                return prefix + packer.pack(*[v for v in values if v is not None])
+            return prefix + packer.pack(*values)
+        except struct.error:
+            # Integers that do not fit in 32 bits
+            return _build_generic(address, values)
+
+    return get_values, pack
+
+
+def _pack(pack: Callable[..., bytes], address: str, *values: Any) -> bytes:
+    return pack(address, *values)
+
+
+ENCODE_CACHE_SIZE = 1024
+"""Default number of datagrams kept in the encoded-datagram cache."""
+
+# Polling loops send the same commands over and over, so keep the most
+# recent datagrams. `typed` keeps i.e. 1, 1.0 and True apart, since
+# they are encoded differently.
+_encode_cached = lru_cache(maxsize=ENCODE_CACHE_SIZE, typed=True)(_pack)
+
+
+def encode_cache_info():
+    """Report the statistics of the encoded-datagram cache.
+
+    Commands without a ``callback`` are looked up in a bounded LRU cache
+    keyed by their class and values before being encoded.
+
+    Returns:
+        A ``functools`` ``CacheInfo`` named tuple with the ``hits``,
+        ``misses``, ``maxsize`` and ``currsize`` of the cache.
+    """
+    return _encode_cached.cache_info()
+
+
+def set_encode_cache_size(maxsize: int) -> None:
+    """Resize the encoded-datagram cache, clearing it.
+
+    Args:
+        maxsize (`int`):
+            The number of datagrams to keep. ``0`` disables the cache.
+    """
+    global _encode_cached
+    _encode_cached = lru_cache(maxsize=maxsize, typed=True)(_pack)
+
 
 @dataclass
 class OSCCommand(object):
@@ -30,39 +160,46 @@ class OSCCommand(object):
     If implementing your own command, it must inherit this class.
     """
 
-    def build(self) -> OscMessage:
-        """Converts the builder to a usable OSC message."""
-        # Convert the builder to a dictionary
-        builder_dict = asdict(self)
+    def encode(self) -> bytes:
+        """Converts the builder to the raw datagram sent to the device."""
+        cls = type(self)
+        encoder = cls.__dict__.get("_encoder")
+        if encoder is None:
+            encoder = _compile_encoder(cls)
+            cls._encoder = encoder
 
-        # Extract the values
-        # Code is largely copy-paste from pythonosc.UDPClient
-        address = builder_dict.pop("address")
-        builder_dict.pop("callback", None)
-        builder_dict.pop("response_cls", None)
+        get_values, pack = encoder
+        values = get_values(self)
+        if getattr(self, "callback", None) is None:
+            try:
+                return _encode_cached(pack, self.address, *values)
+            except TypeError:
+                # Unhashable values cannot be cached
+                pass
 
-        builder = OscMessageBuilder(address=address)
+        return pack(self.address, *values)
 
-        # Return as a message string
-        for v in builder_dict.values():
-            if isinstance(v, bool):
-                v = int(v)
-            builder.add_arg(v)
+    @property
+    def dgram(self) -> bytes:
+        """The raw datagram, like python-osc's ``OscMessage.dgram``.
 
-        return builder.build()
+        Allows commands to be passed directly to python-osc's clients.
+        """
+        return self.encode()
+
+    def build(self) -> OscMessage:
+        """Converts the builder to a usable OSC message."""
+        return OscMessage(self.encode())
 
     def stringify(self) -> str:
         """Converts the builder to an OSC message string."""
-        # Convert the builder to a dictionary
-        builder_dict = asdict(self)
-        builder_dict.pop("callback", None)
-        builder_dict.pop("response_cls", None)
-
-        # Extract the values
-        address: str = builder_dict.pop("address") + " "
+        address: str = self.address + " "
 
         # Return as a message string
-        for v in builder_dict.values():
+        for f in fields(self):
+            if f.name in _NOT_SENT:
+                continue
+            v = getattr(self, f.name)
             if isinstance(v, bool):
                 v = int(v)
             if v is None:
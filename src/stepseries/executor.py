@@ -0,0 +1,305 @@
+"""Run callbacks on a pool of threads, in order per key.
+
+By default, callbacks registered with :py:meth:`stepseries.stepXXX.STEPXXX.on`
+run on the thread receiving the messages, so a slow callback delays all
+the messages behind it. A device given a :py:class:`CallbackExecutor`
+hands its messages over instead, and the receiving thread moves on.
+
+Messages sharing a key (a device, response type and motor) form a
+strand: they are delivered one at a time, in the order received, while
+different strands run in parallel on the workers.
+
+When callbacks fall behind, the messages waiting in a strand are kept
+according to its policy:
+
+- :py:data:`NEVER_DROP`: every message is kept, without limit.
+- :py:data:`DROP_OLDEST`: up to `maxsize` messages are kept, the oldest
+  is dropped for each new one.
+- :py:data:`LATEST`: only the newest message is kept.
+- :py:data:`BLOCK`: up to `maxsize` messages are kept, then the thread
+  submitting waits for room, leaving the backlog in the socket buffer.
+  Its callbacks must not wait for responses from the device, as these
+  are received by the thread waiting.
+
+Example:
+
+    >>> from stepseries.executor import CallbackExecutor
+    >>> from stepseries.step400 import STEP400
+    >>>
+    >>> executor = CallbackExecutor(workers=4)
+    >>> driver = STEP400(0, '10.1.21.56', executor=executor)
+    >>> driver.on(None, slow_handler)
+    >>> executor.stats()
+"""
+
+
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition
+from time import monotonic
+from typing import Any, Callable, Deque, Dict, Hashable, NamedTuple, Sequence, Tuple
+
+NEVER_DROP = "never_drop"
+"""Keep every message waiting for delivery."""
+
+DROP_OLDEST = "drop_oldest"
+"""Keep the newest `maxsize` messages waiting for delivery."""
+
+LATEST = "latest"
+"""Keep only the newest message waiting for delivery."""
+
+BLOCK = "block"
+"""Wait for room once `maxsize` messages are waiting for delivery."""
+
+POLICIES = (NEVER_DROP, DROP_OLDEST, LATEST, BLOCK)
+"""The policies for the messages waiting for delivery."""
+
+# The most messages a strand delivers before yielding its worker, so
+# that busy strands do not starve the others
+_BATCH = 64
+
+_Item = Tuple[Sequence[Callable[[Any], None]], Any, float]
+
+
+def check_policy(policy: str, maxsize: int) -> None:
+    """Raise `ValueError` if `policy` and `maxsize` are not valid."""
+
+    if policy not in POLICIES:
+        raise ValueError(
+            f"argument 'policy' expected to be one of {list(POLICIES)}, "
+            f"'{policy}' found"
+        )
+    if policy in (DROP_OLDEST, BLOCK) and maxsize < 1:
+        raise ValueError(
+            f"argument 'maxsize' must be at least 1 for '{policy}', {maxsize} found"
+        )
+
+
+class _Strand(object):
+    """The messages waiting for delivery under one key."""
+
+    __slots__ = ("items", "policy", "maxsize")
+
+    def __init__(self, policy: str, maxsize: int) -> None:
+        self.items: Deque[_Item] = deque()
+        self.policy = policy
+        self.maxsize = maxsize
+
+
+class ExecutorStats(NamedTuple):
+    """Counters of a :py:class:`CallbackExecutor`.
+
+    Times are in seconds. ``wait`` is the time from a message being
+    submitted to its first callback starting, ``run`` the time taken by
+    all its callbacks.
+    """
+
+    queued: int
+    strands: int
+    delivered: int
+    dropped: int
+    errors: int
+    mean_wait: float
+    max_wait: float
+    mean_run: float
+    max_run: float
+
+
+class CallbackExecutor(object):
+    """Deliver messages to their callbacks on a pool of threads.
+
+    One executor can be shared by several devices.
+
+    Args:
+        workers (`int`):
+            The threads delivering messages. Defaults to `4`.
+    """
+
+    workers: int
+
+    _pool: ThreadPoolExecutor
+    _lock: Condition
+    _strands: Dict[Hashable, _Strand]
+    _queued: int
+    _blocked: int
+    _delivered: int
+    _dropped: int
+    _errors: int
+    _total_wait: float
+    _max_wait: float
+    _total_run: float
+    _max_run: float
+
+    def __init__(self, workers: int = 4) -> None:
+        if workers < 1:
+            raise ValueError(f"argument 'workers' must be at least 1, {workers} found")
+
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="stepseries")
+        self._lock = Condition()
+        self._strands = dict()
+        self._queued = 0
+        self._blocked = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._errors = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_run = 0.0
+        self._max_run = 0.0
+
+    def submit(
+        self,
+        key: Hashable,
+        callbacks: Sequence[Callable[[Any], None]],
+        message: Any,
+        policy: str = NEVER_DROP,
+        maxsize: int = 0,
+    ) -> int:
+        """Call each of `callbacks` with `message` on a worker.
+
+        The messages submitted with the same `key` are delivered in the
+        order they were submitted, one at a time.
+
+        Args:
+            key (`Hashable`):
+                The strand of the message.
+            callbacks (`Sequence[callable]`):
+                The callbacks to call, in order.
+            message:
+                The argument of the callbacks.
+            policy (`str`):
+                One of :py:data:`POLICIES`, for the messages waiting in
+                the strand. Defaults to :py:data:`NEVER_DROP`.
+            maxsize (`int`):
+                The most messages waiting in the strand, for
+                :py:data:`DROP_OLDEST` and :py:data:`BLOCK`.
+
+        Returns:
+            The number of messages dropped to make room for this one.
+        """
+
+        item = (callbacks, message, monotonic())
+        dropped = 0
+        with self._lock:
+            while True:
+                strand = self._strands.get(key)
+                if strand is None:
+                    strand = self._strands[key] = _Strand(policy, maxsize)
+                    start = True
+                    break
+
+                # A worker is already delivering this strand
+                strand.policy, strand.maxsize = policy, maxsize
+                start = False
+                if policy != BLOCK or len(strand.items) < maxsize:
+                    dropped = self._make_room(strand)
+                    break
+                # The strand may be delivered and gone once woken up
+                self._blocked += 1
+                try:
+                    self._lock.wait()
+                finally:
+                    self._blocked -= 1
+
+            strand.items.append(item)
+            self._queued += 1
+
+        if start:
+            try:
+                self._pool.submit(self._run, key)
+            except RuntimeError:
+                # The executor was shut down
+                with self._lock:
+                    self._queued -= len(self._strands.pop(key).items)
+                raise
+        return dropped
+
+    def stats(self) -> ExecutorStats:
+        """Return the executor's counters since it was created."""
+
+        with self._lock:
+            delivered = self._delivered
+            return ExecutorStats(
+                self._queued,
+                len(self._strands),
+                delivered,
+                self._dropped,
+                self._errors,
+                self._total_wait / delivered if delivered else 0.0,
+                self._max_wait,
+                self._total_run / delivered if delivered else 0.0,
+                self._max_run,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers once the messages queued are delivered.
+
+        Args:
+            wait (`bool`):
+                Wait for the messages queued to be delivered. Defaults to
+                `True`.
+        """
+        self._pool.shutdown(wait)
+
+    def _make_room(self, strand: _Strand) -> int:
+        # Called with the lock held, before adding a message to `strand`
+        items = strand.items
+        if strand.policy == LATEST:
+            dropped = len(items)
+            items.clear()
+        elif strand.policy == DROP_OLDEST:
+            dropped = max(len(items) - strand.maxsize + 1, 0)
+            for _ in range(dropped):
+                items.popleft()
+        else:
+            return 0
+
+        self._queued -= dropped
+        self._dropped += dropped
+        return dropped
+
+    def _run(self, key: Hashable) -> None:
+        strand = self._strands[key]
+        items = strand.items
+        delivered = 0
+        while True:
+            if delivered == _BATCH:
+                # Let the other strands run before carrying on
+                try:
+                    self._pool.submit(self._run, key)
+                    return
+                except RuntimeError:
+                    # Shutting down: finish the strand here
+                    pass
+            delivered += 1
+
+            with self._lock:
+                if not items:
+                    # Later messages start a new strand
+                    del self._strands[key]
+                    return
+                callbacks, message, submitted = items.popleft()
+                self._queued -= 1
+                if self._blocked:
+                    self._lock.notify_all()
+
+            start = monotonic()
+            errors = 0
+            for callback in callbacks:
+                try:
+                    callback(message)
+                except Exception:
+                    errors += 1
+                    traceback.print_exc()
+            end = monotonic()
+
+            with self._lock:
+                self._delivered += 1
+                self._errors += errors
+                wait, run = start - submitted, end - start
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+                self._total_run += run
+                self._max_run = max(self._max_run, run)
@@ -0,0 +1,143 @@
+"""Decode the OSC datagrams sent by the devices.
+
+The parser works directly on any bytes-like object, including a
+``memoryview`` of a reused receive buffer, so a datagram does not need to
+be copied before it is decoded. Only the arguments themselves (and the
+address string) are materialised.
+"""
+
+
+import re
+import struct
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pythonosc.osc_packet import ParseError as OscParseError
+
+Buffer = Union[bytes, bytearray, memoryview]
+Message = Tuple[str, Tuple[Any, ...]]
+
+_STRING = re.compile(rb"[^\0]*")
+_BUNDLE = re.compile(rb"#bundle\0")
+_INT = struct.Struct(">i")
+
+# Arguments of a fixed size, and the struct format that decodes them
+_FIXED = {"i": "i", "f": "f", "h": "q", "d": "d"}
+# Arguments without data
+_CONSTANTS = {"T": True, "F": False, "N": None}
+
+# Type tags seen so far, mapped to the struct decoding all their
+# arguments at once (or None if they include variable sized arguments)
+_structs: Dict[str, Optional[struct.Struct]] = dict()
+
+
+def _read_string(data: Buffer, index: int, end: int) -> Tuple[str, int]:
+    match = _STRING.match(data, index, end)
+    stop = match.end()
+    if stop >= end:
+        raise OscParseError("unterminated string")
+    # Skip the terminating null and the padding to a multiple of 4
+    return match.group().decode(), index + (stop - index) // 4 * 4 + 4
+
+
+def _struct_for(tags: str) -> Optional[struct.Struct]:
+    try:
+        return _structs[tags]
+    except KeyError:
+        pass
+
+    if all(tag in _FIXED for tag in tags):
+        decoder = struct.Struct(">" + "".join(_FIXED[tag] for tag in tags))
+    else:
+        decoder = None
+    # The tags sent by the firmware are few, but never grow unbounded
+    if len(_structs) < 1024:
+        _structs[tags] = decoder
+    return decoder
+
+
+def _parse_args(data: Buffer, tags: str, index: int, end: int) -> Tuple[Any, ...]:
+    decoder = _struct_for(tags)
+    if decoder is not None:
+        if index + decoder.size > end:
+            raise OscParseError("datagram is too short")
+        return decoder.unpack_from(data, index)
+
+    args: List[Any] = list()
+    for tag in tags:
+        if tag == "s":
+            value, index = _read_string(data, index, end)
+        elif tag in _FIXED:
+            decoder = _struct_for(tag)
+            if index + decoder.size > end:
+                raise OscParseError("datagram is too short")
+            (value,) = decoder.unpack_from(data, index)
+            index += decoder.size
+        elif tag in _CONSTANTS:
+            value = _CONSTANTS[tag]
+        elif tag == "b":
+            if index + 4 > end:
+                raise OscParseError("datagram is too short")
+            (size,) = _INT.unpack_from(data, index)
+            index += 4
+            if size < 0 or index + size > end:
+                raise OscParseError("datagram is too short")
+            value = bytes(data[index : index + size])
+            index += -(-size // 4) * 4
+        else:
+            raise OscParseError(f"unsupported type tag '{tag}'")
+        args.append(value)
+    return tuple(args)
+
+
+def _parse_message(data: Buffer, index: int, end: int) -> Message:
+    address, index = _read_string(data, index, end)
+    if index == end:
+        # Type tags are optional in OSC 1.0
+        return address, ()
+    tags, index = _read_string(data, index, end)
+    if not tags.startswith(","):
+        raise OscParseError("missing type tags")
+    return address, _parse_args(data, tags[1:], index, end)
+
+
+def _parse_bundle(data: Buffer, index: int, end: int, messages: List[Message]) -> None:
+    # Skip "#bundle" and the time tag; bundles are always run immediately
+    index += 16
+    while index < end:
+        if index + 4 > end:
+            raise OscParseError("datagram is too short")
+        (size,) = _INT.unpack_from(data, index)
+        index += 4
+        if size <= 0 or size % 4 or index + size > end:
+            raise OscParseError("invalid bundle element size")
+        _parse_element(data, index, index + size, messages)
+        index += size
+
+
+def _parse_element(data: Buffer, index: int, end: int, messages: List[Message]) -> None:
+    if _BUNDLE.match(data, index, end):
+        _parse_bundle(data, index, end, messages)
+    else:
+        messages.append(_parse_message(data, index, end))
+
+
+def parse_datagram(data: Buffer) -> List[Message]:
+    """Decode the messages in an OSC datagram, unpacking any bundles.
+
+    Args:
+        data (`bytes`, `bytearray`, `memoryview`):
+            The datagram. It is only read during the call.
+
+    Returns:
+        The ``(address, args)`` of each message, in order.
+
+    Raises:
+        `pythonosc.osc_packet.ParseError`:
+            The datagram is not valid OSC.
+    """
+
+    messages: List[Message] = list()
+    if not data or len(data) % 4:
+        raise OscParseError("datagram size must be a multiple of 4")
+    _parse_element(data, 0, len(data), messages)
+    return messages
@@ -0,0 +1,667 @@
+"""Receive datagrams from the devices bound to a server port.
+
+Each receiver owns one UDP socket and passes every datagram received to
+a handler, differing in which thread runs the handler:
+
+================= ============================================================
+Mode              Handler thread
+================= ============================================================
+``"threading"``   A new thread per datagram. Slow handlers never delay other
+                  messages, but messages may be handled out of order.
+``"single"``      The receive thread itself. Messages are handled strictly
+                  in order, so handlers must not block. Datagrams are
+                  decoded straight from the receive buffer, without a copy.
+``"pool"``        A fixed pool of worker threads. Each device (ip address)
+                  is always handled by the same worker, keeping its
+                  messages in order.
+``"processes"``   Several processes sharing the port with ``SO_REUSEPORT``
+                  receive and decode the datagrams, forwarding the decoded
+                  messages to one thread of this process. Each device is
+                  always received by the same process, keeping its messages
+                  in order.
+================= ============================================================
+"""
+
+
+import multiprocessing
+import os
+import selectors
+import signal
+import socket
+import sys
+import traceback
+from multiprocessing.connection import Connection
+from queue import SimpleQueue
+from threading import Thread, current_thread
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pythonosc.osc_packet import ParseError as OscParseError
+
+from stepseries.osc import Message, parse_datagram
+
+DatagramHandler = Callable[[Union[bytes, memoryview], Tuple[str, int]], None]
+MessagesHandler = Callable[[List[Message], Tuple[str, int]], None]
+
+# Large enough for any UDP payload
+_MAX_DATAGRAM = 65535
+
+# The most datagrams a receiving process decodes before forwarding them,
+# so that a socket that never drains still gets its messages through
+_MAX_BATCH = 128
+
+
+class SocketStats(NamedTuple):
+    """The counters of a socket, see :py:meth:`stepseries.server.Manager.stats`.
+
+    `drops` and `queued` are read from the kernel (``/proc/net/udp``) and
+    are `None` where it does not report them.
+    """
+
+    kind: str
+    """`"receive"` or `"send"`."""
+    address: Tuple[str, int]
+    """The local address the socket is bound to."""
+    buffer_size: int
+    """The kernel buffer size (``SO_RCVBUF`` or ``SO_SNDBUF``) in bytes."""
+    datagrams: int
+    """The datagrams received or sent."""
+    bytes: int
+    """The bytes received or sent."""
+    drops: Optional[int]
+    """The datagrams dropped by the kernel, e.g. as the buffer was full."""
+    queued: Optional[int]
+    """The bytes waiting in the kernel buffer."""
+
+
+# The kernel only reports socket counters on Linux
+_PROC_NET_UDP = sys.platform.startswith("linux") and os.path.exists("/proc/net/udp")
+
+
+def _socket_inode(sock: socket.socket) -> Optional[int]:
+    """Return the inode of `sock` to look it up with
+    :py:func:`_kernel_udp_stats`, or `None` where it cannot be.
+    """
+
+    # Elsewhere, the socket may not even be a file descriptor (Windows)
+    if not _PROC_NET_UDP:
+        return None
+    return os.fstat(sock.fileno()).st_ino
+
+
+def _kernel_udp_stats(
+    inodes: Iterable[Optional[int]],
+) -> Dict[Optional[int], Tuple[int, int, int]]:
+    """Return the datagrams dropped, and bytes queued to send and receive,
+    of UDP sockets.
+
+    Only the sockets with the given inodes are looked up, and only on
+    Linux; other sockets are missing from the result.
+    """
+
+    inodes = set(inodes)
+    inodes.discard(None)
+    stats: Dict[Optional[int], Tuple[int, int, int]] = dict()
+    if not inodes:
+        return stats
+    for path in ("/proc/net/udp", "/proc/net/udp6"):
+        try:
+            with open(path) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            # sl local_address rem_address st tx_queue:rx_queue tr:tm->when
+            # retrnsmt uid timeout inode ref pointer drops
+            fields = line.split()
+            inode = int(fields[9])
+            if inode in inodes:
+                tx_queue, rx_queue = fields[4].split(":")
+                stats[inode] = (int(fields[12]), int(tx_queue, 16), int(rx_queue, 16))
+    return stats
+
+
+def _bind(
+    address: Tuple[str, int],
+    reuse_port: bool = False,
+    recv_buffer: Optional[int] = None,
+) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        if recv_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer)
+        sock.bind(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class Receiver(object):
+    """Receive datagrams on `address`, handling them on the receive thread.
+
+    Args:
+        address (`Tuple[str, int]`):
+            The address and port to bind to.
+        handler (`callable`):
+            Called with the data and sender address of each datagram.
+            The data is a ``memoryview`` of the receive buffer, only
+            valid until the handler returns.
+        recv_buffer (`int`, `None`):
+            The kernel receive buffer size (``SO_RCVBUF``) to request, in
+            bytes. Defaults to `None` (the system default).
+    """
+
+    recv_buffer: Optional[int]
+    """The receive buffer size last requested, if any."""
+
+    _socket: socket.socket
+    _handler: DatagramHandler
+    _buffer: bytearray
+    _view: memoryview
+    _selector: selectors.BaseSelector
+    _wake_r: socket.socket
+    _wake_w: socket.socket
+    _thread: Optional[Thread]
+    _closed: bool
+    _datagrams: int
+    _bytes: int
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler: DatagramHandler,
+        recv_buffer: Optional[int] = None,
+    ) -> None:
+        self._socket = _bind(address, recv_buffer=recv_buffer)
+        self._socket.setblocking(False)
+        self._handler = handler
+        self.recv_buffer = recv_buffer
+        self._datagrams = 0
+        self._bytes = 0
+
+        # Every datagram is received into the same buffer
+        self._buffer = bytearray(_MAX_DATAGRAM)
+        self._view = memoryview(self._buffer)
+
+        # Wakes the receive thread up when closing
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._socket, selectors.EVENT_READ)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+
+        self._thread = None
+        self._closed = False
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        """The address and port the socket is bound to."""
+        return self._socket.getsockname()
+
+    def set_recv_buffer(self, size: int) -> None:
+        """Request a kernel receive buffer (``SO_RCVBUF``) of `size` bytes.
+
+        The kernel may cap the size (``net.core.rmem_max`` on Linux); the
+        size granted is reported by :py:meth:`stats`.
+        """
+
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+        self.recv_buffer = size
+
+    def stats(self) -> List[SocketStats]:
+        """Return the counters of the receiving socket."""
+
+        inode = _socket_inode(self._socket)
+        drops, _, queued = _kernel_udp_stats([inode]).get(inode, (None, None, None))
+        return [
+            SocketStats(
+                "receive",
+                self.server_address,
+                self._socket.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+                self._datagrams,
+                self._bytes,
+                drops,
+                queued,
+            )
+        ]
+
+    def start(self) -> None:
+        """Start receiving datagrams in the background."""
+
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop receiving datagrams and close the socket.
+
+        May be called by the handler: the socket is then closed once the
+        handler returns.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            # The thread saw the flag and has already stopped
+            pass
+        self._wake_w.close()
+        if self._thread is None:
+            self._release()
+        elif self._thread is not current_thread():
+            self._thread.join()
+
+    def _release(self) -> None:
+        self._selector.close()
+        self._socket.close()
+        self._wake_r.close()
+
+    def _run(self) -> None:
+        # The receive thread closes the socket on its way out, as it may
+        # be stopped by its own handler
+        try:
+            while not self._closed:
+                self._selector.select()
+                self._drain()
+        finally:
+            self._release()
+
+    def _drain(self) -> None:
+        # Read everything queued on the socket before waiting again
+        while not self._closed:
+            try:
+                size, client_address = self._socket.recvfrom_into(self._buffer)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._datagrams += 1
+            self._bytes += size
+            self._dispatch(self._view[:size], client_address)
+
+    def _dispatch(self, data: memoryview, client_address: Tuple[str, int]) -> None:
+        self._handle(data, client_address)
+
+    def _handle(
+        self, data: Union[bytes, memoryview], client_address: Tuple[str, int]
+    ) -> None:
+        # Like socketserver, never let a failing handler stop the server
+        try:
+            self._handler(data, client_address)
+        except Exception:
+            traceback.print_exc()
+
+
+class ThreadingReceiver(Receiver):
+    """Handle every datagram on a new thread."""
+
+    def _dispatch(self, data: memoryview, client_address: Tuple[str, int]) -> None:
+        Thread(
+            target=self._handle, args=(bytes(data), client_address), daemon=True
+        ).start()
+
+
+class PoolReceiver(Receiver):
+    """Handle datagrams on a pool of workers, one worker per device.
+
+    Args:
+        address (`Tuple[str, int]`):
+            The address and port to bind to.
+        handler (`callable`):
+            Called with the data and sender address of each datagram.
+        workers (`int`):
+            The number of worker threads. Defaults to `4`.
+        recv_buffer (`int`, `None`):
+            The kernel receive buffer size to request, in bytes.
+    """
+
+    _queues: List[SimpleQueue]
+    _workers: List[Thread]
+    _assigned: Dict[str, SimpleQueue]
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler: DatagramHandler,
+        workers: int = 4,
+        recv_buffer: Optional[int] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("argument 'workers' must be at least 1")
+        super().__init__(address, handler, recv_buffer)
+
+        self._queues = [SimpleQueue() for _ in range(workers)]
+        self._workers = [
+            Thread(target=self._work, args=(queue,), daemon=True)
+            for queue in self._queues
+        ]
+        self._assigned = dict()
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+        super().start()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        super().close()
+        for queue in self._queues:
+            queue.put(None)
+        for worker in self._workers:
+            # A worker closing the receiver stops once its handler returns
+            if worker is not current_thread():
+                worker.join()
+
+    def _dispatch(self, data: memoryview, client_address: Tuple[str, int]) -> None:
+        # Assign devices to workers in turn as they are first heard from
+        queue = self._assigned.get(client_address[0])
+        if queue is None:
+            queue = self._queues[len(self._assigned) % len(self._queues)]
+            self._assigned[client_address[0]] = queue
+        # The buffer is reused for the next datagram, so copy it out
+        queue.put((bytes(data), client_address))
+
+    def _work(self, queue: SimpleQueue) -> None:
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            self._handle(*item)
+
+
+def _receive_process(
+    address: Tuple[str, int], recv_buffer: Optional[int], conn: Connection
+) -> None:
+    """Receive and decode datagrams, sending them over `conn` in batches.
+
+    Runs in the receiving processes started by :py:class:`ProcessReceiver`
+    until the other end of `conn` is closed. Receive buffer sizes sent
+    over `conn` are applied, and answered with the size granted.
+    """
+
+    # Leave keyboard interrupts to the main process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    try:
+        sock = _bind(address, reuse_port=True, recv_buffer=recv_buffer)
+    except OSError as exc:
+        conn.send(exc)
+        return
+    sock.setblocking(False)
+    conn.send(
+        (
+            sock.getsockname(),
+            _socket_inode(sock),
+            sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF),
+        )
+    )
+
+    buffer = bytearray(_MAX_DATAGRAM)
+    view = memoryview(buffer)
+    selector = selectors.DefaultSelector()
+    selector.register(sock, selectors.EVENT_READ)
+    selector.register(conn, selectors.EVENT_READ)
+    try:
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is conn:
+                    # Raises EOFError once the main process closes its end
+                    size = conn.recv()
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+                    conn.send(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF))
+
+            # Decode what is queued, then forward it all at once
+            batch = list()
+            while len(batch) < _MAX_BATCH:
+                try:
+                    size, client_address = sock.recvfrom_into(buffer)
+                except (BlockingIOError, InterruptedError):
+                    break
+                try:
+                    messages = parse_datagram(view[:size])
+                except OscParseError:
+                    messages = []
+                batch.append((client_address, size, messages))
+            if batch:
+                conn.send(batch)
+    except (BrokenPipeError, EOFError):
+        return
+    finally:
+        selector.close()
+        sock.close()
+        conn.close()
+
+
+class ProcessReceiver(object):
+    """Receive and decode datagrams on several processes.
+
+    The processes bind `address` with ``SO_REUSEPORT`` and the kernel
+    spreads the devices over them, always sending a device's datagrams
+    (by sender address) to the same process. Each process decodes the
+    datagrams it receives and forwards the messages, batched, to a
+    thread of this process which calls the handler.
+
+    Only available on platforms with ``SO_REUSEPORT`` (such as Linux).
+    The processes are spawned, importing the main module again, so a
+    script must create the receiver under ``if __name__ == "__main__":``,
+    or it fails with a ``RuntimeError`` from :py:mod:`multiprocessing`.
+
+    Args:
+        address (`Tuple[str, int]`):
+            The address and port to bind to.
+        handler (`callable`):
+            Called with the decoded ``(address, args)`` messages and the
+            sender address of each datagram.
+        workers (`int`):
+            The number of receiving processes. Defaults to `4`.
+        recv_buffer (`int`, `None`):
+            The kernel receive buffer size to request for each process'
+            socket, in bytes.
+
+    Raises:
+        `OSError`:
+            The processes could not bind `address`.
+    """
+
+    recv_buffer: Optional[int]
+    """The receive buffer size last requested, if any."""
+
+    _handler: MessagesHandler
+    _server_address: Tuple[str, int]
+    _processes: List[Any]
+    _connections: List[Connection]
+    # Per process: the socket inode, granted buffer size and counters
+    _inodes: List[Optional[int]]
+    _buffer_sizes: List[int]
+    _counters: List[List[int]]
+    _wake_r: socket.socket
+    _wake_w: socket.socket
+    _thread: Optional[Thread]
+    _closed: bool
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        handler: MessagesHandler,
+        workers: int = 4,
+        recv_buffer: Optional[int] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError("argument 'workers' must be at least 1")
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise OSError("SO_REUSEPORT is not supported on this platform")
+
+        self._handler = handler
+        self.recv_buffer = recv_buffer
+        self._processes = list()
+        self._connections = list()
+        self._inodes = list()
+        self._buffer_sizes = list()
+        self._counters = list()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._thread = None
+        self._closed = False
+
+        # Spawn rather than fork, as the caller is likely running threads
+        context = multiprocessing.get_context("spawn")
+        try:
+            for _ in range(workers):
+                conn, child_conn = context.Pipe()
+                process = context.Process(
+                    target=_receive_process,
+                    args=(address, recv_buffer, child_conn),
+                    daemon=True,
+                )
+                process.start()
+                child_conn.close()
+                self._processes.append(process)
+                self._connections.append(conn)
+
+                # The first process resolves the port if it is 0
+                result = conn.recv()
+                if isinstance(result, OSError):
+                    raise result
+                address, inode, buffer_size = result
+                self._inodes.append(inode)
+                self._buffer_sizes.append(buffer_size)
+                self._counters.append([0, 0])
+        except BaseException:
+            self.close()
+            raise
+        self._server_address = address
+
+    @property
+    def server_address(self) -> Tuple[str, int]:
+        """The address and port the processes are bound to."""
+        return self._server_address
+
+    def set_recv_buffer(self, size: int) -> None:
+        """Request a kernel receive buffer of `size` bytes for each process.
+
+        See :py:meth:`Receiver.set_recv_buffer`.
+        """
+
+        for conn in self._connections:
+            conn.send(size)
+        self.recv_buffer = size
+
+    def stats(self) -> List[SocketStats]:
+        """Return the counters of each process' socket."""
+
+        kernel_stats = _kernel_udp_stats(self._inodes)
+        stats = list()
+        for inode, buffer_size, (datagrams, n_bytes) in zip(
+            self._inodes, self._buffer_sizes, self._counters
+        ):
+            drops, _, queued = kernel_stats.get(inode, (None, None, None))
+            stats.append(
+                SocketStats(
+                    "receive",
+                    self._server_address,
+                    buffer_size,
+                    datagrams,
+                    n_bytes,
+                    drops,
+                    queued,
+                )
+            )
+        return stats
+
+    def start(self) -> None:
+        """Start handling the messages received in the background."""
+
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop the receiving processes and release the port.
+
+        May be called by the handler: the processes are then stopped once
+        the handler returns.
+        """
+
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            # The thread saw the flag and has already stopped
+            pass
+        self._wake_w.close()
+        if self._thread is None:
+            self._release()
+        elif self._thread is not current_thread():
+            self._thread.join()
+
+    def _release(self) -> None:
+        for conn in self._connections:
+            conn.close()
+        for process in self._processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._wake_r.close()
+
+    def _run(self) -> None:
+        selector = selectors.DefaultSelector()
+        for i, conn in enumerate(self._connections):
+            selector.register(conn, selectors.EVENT_READ, i)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+
+        # As with Receiver, the processes are stopped on the way out
+        try:
+            with selector:
+                self._receive(selector)
+        finally:
+            self._release()
+
+    def _receive(self, selector: selectors.BaseSelector) -> None:
+        while not self._closed:
+            for key, _ in selector.select():
+                if key.fileobj is self._wake_r:
+                    return
+                try:
+                    batch = key.fileobj.recv()
+                except EOFError:
+                    # The process died; stop listening to it
+                    selector.unregister(key.fileobj)
+                    continue
+                if isinstance(batch, int):
+                    # The buffer size granted after set_recv_buffer
+                    self._buffer_sizes[key.data] = batch
+                    continue
+
+                counters = self._counters[key.data]
+                for client_address, size, messages in batch:
+                    counters[0] += 1
+                    counters[1] += size
+                    if messages:
+                        self._handle(messages, client_address)
+
+    def _handle(self, messages: List[Message], client_address: Tuple[str, int]) -> None:
+        try:
+            self._handler(messages, client_address)
+        except Exception:
+            traceback.print_exc()
+
+
+RECEIVERS: Dict[str, type] = {
+    "threading": ThreadingReceiver,
+    "single": Receiver,
+    "pool": PoolReceiver,
+    "processes": ProcessReceiver,
+}
+"""The receivers available to :py:class:`stepseries.server.Manager`."""
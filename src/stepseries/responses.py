@@ -3,13 +3,33 @@
 
 import ast
 import re
+from dataclasses import MISSING, Field
 from dataclasses import dataclass as _dataclass
-from dataclasses import field
-from typing import Any, Callable, Dict, Tuple, TypeVar, Union
+from dataclasses import field, fields
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from stepseries.exceptions import ParseError
 
 # Pylance custom dataclass work around
 _T = TypeVar("_T")
 
+# Maps an OSC address to the response class that parses it and to the
+# typed-argument parser of that class
+_registry: Dict[str, Type["OSCResponse"]] = dict()
+_parsers: Dict[str, Callable[..., "OSCResponse"]] = dict()
+
 
 def __dataclass_transform__(
     *,
@@ -21,81 +41,458 @@ def __dataclass_transform__(
     return lambda a: a
 
 
+_CONSTANTS = ("True", "False", "None")
+_NUMBER_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?\Z")
+
+
+def _literal_eval(value: Any) -> Any:
+    try:
+        capitalized = value.capitalize()
+    except AttributeError:
+        # Not a string
+        return value
+
+    # Words can only evaluate to True, False or None, so skip raising
+    # and catching an error for everything else (i.e. error texts)
+    if capitalized.isidentifier() and capitalized not in _CONSTANTS:
+        return value
+
+    try:
+        return ast.literal_eval(capitalized)
+    except (AttributeError, ValueError, SyntaxError, NameError):
+        # Catch errors for bad strings (i.e. ture instead of true)
+        # or non-evalable strings (i.e. class name)
+        return value
+
+
+def _to_number(value: str) -> Any:
+    # Plain decimals are by far the most common, so skip the evaluator
+    # for those. The results are identical to `_literal_eval`.
+    match = _NUMBER_RE.match(value)
+    if match is None:
+        return _literal_eval(value)
+    return float(value) if match.lastindex else int(value)
+
+
+def _join_message(message_address: str, osc_args: Tuple[Any, ...]) -> str:
+    return message_address + " " + " ".join([str(x) for x in osc_args])
+
+
+def _compile_parsers(cls: type, original_init: Callable[..., None]) -> None:
+    """Generate the string and typed-argument parsers for `cls`.
+
+    Everything that depends on the class alone (field order, value
+    converters, regex fields) is worked out here, once, and baked into
+    generated code the same way ``dataclasses`` generates ``__init__``.
+    """
+
+    all_fields = fields(cls)
+    regex_fields = tuple(
+        (name[:-3], getattr(cls, name))
+        for name in _all_annotations(cls)
+        if name.endswith("_re")
+    )
+    regex_targets = [target for target, _ in regex_fields]
+    field_order = ("address",) + tuple(
+        f.name for f in all_fields if f.name != "address" and not f.name.endswith("_re")
+    )
+    token_fields = [f for f in all_fields if f.name in field_order[1:]]
+    token_fields = [f for f in token_fields if f.name not in regex_targets]
+    other_fields = [
+        f for f in all_fields if f not in token_fields and f.name not in regex_targets
+    ]
+    converters = {
+        f.name: _to_number if f.type in (int, float) else _literal_eval
+        for f in all_fields
+    }
+    address = getattr(cls, "address", None)
+
+    def _generic(self, args, kwargs):
+        # Concat split string args
+        if all([isinstance(x, str) for x in args]):
+            args = (" ".join(args),)
+
+        # Break down the args
+        if len(args) == 1 and isinstance(args[0], str):
+            text = args[0]
+
+            # First look for custom regex strings
+            # These will be <field_name>_re
+            for target, pattern in regex_fields:
+                match: re.Match = pattern.search(text)
+                kwargs[target] = match[0]
+                text = (text[: match.start()] + text[match.end() :]).strip()
+
+            # Now add all to kwargs
+            field_names = [k for k in field_order if k not in kwargs]
+            for i, arg in enumerate(text.split()):
+                kwargs[field_names[i]] = arg
+            args = tuple()
+            kwargs.pop("address", None)
+
+        # Remove unnecessary address identifier
+        args = list(args)
+        if args and args[0] == address:
+            args.pop(0)
+
+        # Eval positional and named args
+        for i, arg in enumerate(args):
+            args[i] = _literal_eval(arg)
+        for k, v in kwargs.items():
+            kwargs[k] = _literal_eval(v)
+
+        # Now call the generated dataclass init
+        original_init(self, *args, **kwargs)
+
+    # Straight-line assignments are only equivalent to the dataclass
+    # init for plain, mutable classes; anything fancier uses the
+    # generic parser above
+    inline = (
+        isinstance(address, str)
+        and not cls.__dataclass_params__.frozen
+        and not hasattr(cls, "__post_init__")
+        and all(f.init for f in token_fields)
+        and all(f.default is not MISSING for f in other_fields)
+        and all(f.default_factory is MISSING for f in all_fields)
+    )
+    if not inline:
+        cls.__init__ = _wraps(_generic_init(_generic), original_init)
+        if isinstance(address, str):
+            cls._osc_parser = staticmethod(
+                lambda *osc_args: cls(_join_message(address, osc_args))
+            )
+        return
+
+    n_required = sum(1 for f in token_fields if f.default is MISSING)
+    namespace = {
+        "_cls": cls,
+        "_new": cls.__new__,
+        "_init": original_init,
+        "_generic": _generic,
+        "_address": address,
+        "_join_message": _join_message,
+        "_literal_eval": _literal_eval,
+        "_token_converters": tuple(converters[f.name] for f in token_fields),
+    }
+    for f in all_fields:
+        namespace[f"_convert_{f.name}"] = converters[f.name]
+        namespace[f"_default_{f.name}"] = f.default
+    for i, (_, pattern) in enumerate(regex_fields):
+        namespace[f"_pattern{i}"] = pattern
+
+    def assignments(values: Callable[[int], str], n_values: int) -> List[str]:
+        lines = []
+        for i, f in enumerate(token_fields):
+            value = values(i) if i < n_values else f"_default_{f.name}"
+            lines.append(f"self.{f.name} = {value}")
+        for target in regex_targets:
+            lines.append(f"self.{target} = _value_{target}")
+        for f in other_fields:
+            lines.append(f"self.{f.name} = _default_{f.name}")
+        return lines
+
+    regex_kwargs = "".join(f", {t}=_value_{t}" for t in regex_targets)
+    source = [
+        "def __init__(self, *args, **kwargs):",
+        "    if kwargs:",
+        "        return _generic(self, args, kwargs)",
+        "    for arg in args:",
+        "        if not isinstance(arg, str):",
+        "            return _generic(self, args, kwargs)",
+        "    text = ' '.join(args)",
+    ]
+    for i, target in enumerate(regex_targets):
+        source += [
+            f"    match = _pattern{i}.search(text)",
+            f"    _value_{target} = _convert_{target}(match[0])",
+            "    text = (text[: match.start()] + text[match.end() :]).strip()",
+        ]
+    source += [
+        "    parts = text.split()",
+        "    n = len(parts)",
+        f"    if n > {len(token_fields) + 1}:",
+        "        raise IndexError('list index out of range')",
+    ]
+    for n_values in range(n_required, len(token_fields) + 1):
+        source.append(f"    if n == {n_values + 1}:")
+        source += [
+            "        " + line
+            for line in assignments(
+                lambda i: f"_convert_{token_fields[i].name}(parts[{i + 1}])", n_values
+            )
+        ]
+        source.append("        return")
+    source.append(
+        "    _init(self, *[c(p) for c, p in zip(_token_converters, parts[1:])]"
+        f"{regex_kwargs})"
+    )
+
+    # Arguments decoded by python-osc are already typed, so they can be
+    # assigned positionally without a string round-trip. Regex fields
+    # need the joined string and exceptions keep it as their message,
+    # so those still use the string parser.
+    source.append("def _osc_parser(*osc_args):")
+    if regex_targets or issubclass(cls, BaseException):
+        source.append("    return _cls(_join_message(_address, osc_args))")
+    else:
+        source.append("    n = len(osc_args)")
+        for n_values in range(n_required, len(token_fields) + 1):
+            names = [f"v{i}" for i in range(n_values)]
+            source.append(f"    if n == {n_values}:")
+            if names:
+                source.append(f"        {', '.join(names)}, = osc_args")
+            source.append("        self = _new(_cls)")
+            source += [
+                "        " + line
+                for line in assignments(
+                    lambda i: (
+                        f"_convert_{token_fields[i].name}(v{i}) "
+                        f"if isinstance(v{i}, str) else v{i}"
+                    ),
+                    n_values,
+                )
+            ]
+            source.append("        return self")
+        source += [
+            "    self = _new(_cls)",
+            "    _init(self, *[_literal_eval(x) if isinstance(x, str) else x for x in osc_args])",
+            "    return self",
+        ]
+    exec("\n".join(source), namespace)
+
+    cls.__init__ = _wraps(namespace["__init__"], original_init)
+    cls._osc_parser = staticmethod(namespace["_osc_parser"])
+
+
+def _generic_init(generic: Callable[..., None]) -> Callable[..., None]:
+    def __init__(self, *args, **kwargs):
+        generic(self, args, kwargs)
+
+    return __init__
+
+
+def _wraps(init: Callable[..., None], original_init: Callable[..., None]):
+    init.__qualname__ = original_init.__qualname__
+    init.__doc__ = original_init.__doc__
+    # Lets `inspect.signature` report the real fields
+    init.__wrapped__ = original_init
+    return init
+
+
+def _all_annotations(cls: type) -> Dict[str, Any]:
+    annotations = dict()
+    for base in reversed(cls.__mro__):
+        annotations.update(base.__dict__.get("__annotations__", {}))
+    return annotations
+
+
+def _move_to_class(cls: type) -> None:
+    # The address and regex patterns are the same for every instance of
+    # a response, so store them once on the class instead
+    annotations = cls.__dict__.get("__annotations__", {})
+    for name, annotation in list(annotations.items()):
+        if name != "address" and not name.endswith("_re"):
+            continue
+
+        annotations[name] = ClassVar[annotation]
+        value = cls.__dict__.get(name, MISSING)
+        if isinstance(value, Field):
+            value = value.default
+        if value is not MISSING:
+            setattr(cls, name, value)
+        elif name in cls.__dict__:
+            delattr(cls, name)
+
+
+def _add_slots(cls: type) -> type:
+    # Slots can only be declared when a class is created, so rebuild the
+    # class the same way `dataclasses` does for `slots=True` (3.10+)
+    inherited = set()
+    for base in cls.__mro__[1:]:
+        slots = base.__dict__.get("__slots__", ())
+        inherited.update((slots,) if isinstance(slots, str) else slots)
+
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    slots = tuple(n for n in field_names if n not in inherited)
+    # Keep instances weakly referenceable, as without slots
+    if not any("__weakref__" in base.__dict__ for base in cls.__mro__[1:]):
+        slots += ("__weakref__",)
+    cls_dict["__slots__"] = slots
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+
+    qualname = cls.__qualname__
+    cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    cls.__qualname__ = qualname
+    return cls
+
+
+def _address_repr(cls: type) -> Callable[[Any], str]:
+    names = tuple(f.name for f in fields(cls) if f.repr)
+
+    # Same format as the dataclass repr when the address was a field
+    def __repr__(self) -> str:
+        values = "".join([f", {name}={getattr(self, name)!r}" for name in names])
+        return f"{self.__class__.__qualname__}(address={self.address!r}{values})"
+
+    return __repr__
+
+
 # Implement a custom dataclass to parse raw strings
 @__dataclass_transform__(field_descriptors=(field,))
 def dataclass(*args: Tuple[Any], **kwargs: Dict[str, Any]):
+    """Turn a response template into a dataclass that parses messages.
+
+    Takes the same arguments as the standard library's ``dataclass``.
+    By default the class is slotted and its ``address`` and regex
+    patterns (``<field_name>_re``) are stored on the class rather than
+    on each instance, which keeps high-rate reports small. Pass
+    ``slots=False`` to keep them as regular per-instance fields.
+    """
+
+    slots = kwargs.pop("slots", True)
+
     def wrapper(cls):
+        if slots:
+            _move_to_class(cls)
         cls = _dataclass(cls, **kwargs)
-        original_init = cls.__init__
-
-        def __init__(self, *args, **kwargs):
-            # Concat split string args
-            if all([isinstance(x, str) for x in args]):
-                args = (" ".join(args),)
-
-            # Break down the args
-            if len(args) == 1 and isinstance(args[0], str):
-                # First look for custom regex strings
-                # These will be <field_name>_re
-                for i, field_name in enumerate(self.__annotations__.keys()):
-                    if field_name.endswith("_re"):
-                        match: re.Match = getattr(self, field_name).search(args[0])
-                        kwargs[field_name[:-3]] = match[0]
-                        args = (
-                            (args[0][: match.start()] + args[0][match.end() :]).strip(),
-                        )
-                args = args[0].split()
-
-                # Now add all to kwargs
-                field_names = [
-                    k
-                    for k in self.__annotations__.keys()
-                    if k not in kwargs and not k.endswith("_re")
-                ]
-                for i, arg in enumerate(args):
-                    field_name = field_names[i]
-                    kwargs[field_name] = arg
-                args = tuple()
-                kwargs.pop("address", None)
-
-            # Remove unnecessary address identifier
-            args = list(args)
-            if args and args[0] == self.address:
-                args.pop(0)
-
-            # Eval positional args
-            for i, arg in enumerate(args):
-                try:
-                    args[i] = ast.literal_eval(arg.capitalize())
-                except (AttributeError, ValueError, SyntaxError, NameError):
-                    # Catch errors for non-strings, bad strings (i.e. ture instead of true)
-                    # or non-evalable strings (i.e. class name)
-                    pass
-
-            # Eval named args
-            for k, v in kwargs.items():
-                try:
-                    kwargs[k] = ast.literal_eval(v.capitalize())
-                except (AttributeError, ValueError, SyntaxError, NameError):
-                    # Catch errors for non-strings, bad strings (i.e. ture instead of true)
-                    # or non-evalable strings (i.e. class name)
-                    pass
-
-            # Now call the generated dataclass init
-            original_init(self, *args, **kwargs)
-
-        cls.__init__ = __init__
+        if slots:
+            cls = _add_slots(cls)
+            if kwargs.get("repr", True) and isinstance(
+                getattr(cls, "address", None), str
+            ):
+                cls.__repr__ = _address_repr(cls)
+        _compile_parsers(cls, cls.__init__)
+
+        # Make the response discoverable by its address
+        if isinstance(getattr(cls, "address", None), str):
+            register(cls)
+
         return cls
 
     return wrapper(args[0]) if args else wrapper
 
 
+def register(cls: Type["OSCResponse"]) -> Type["OSCResponse"]:
+    """Register `cls` as the parser for messages sent to `cls.address`.
+
+    Responses created with this module's ``dataclass`` decorator are
+    registered automatically. Registering a class with an address that
+    is already taken replaces the previous class, which allows a
+    subclass to take over parsing of an existing message.
+
+    Args:
+        cls (`OSCResponse`):
+            The response class to register. Can be used as a decorator.
+
+    Raises:
+        `TypeError`:
+            `cls` has no ``address`` string.
+    """
+
+    address = getattr(cls, "address", None)
+    if not isinstance(address, str):
+        raise TypeError(
+            "argument 'cls' expected to have an 'address' string, "
+            f"'{type(address).__name__}' found"
+        )
+
+    _registry[address] = cls
+    _parsers[address] = (
+        cls.__dict__["_osc_parser"].__func__
+        if "_osc_parser" in cls.__dict__
+        else cls.from_osc
+    )
+    return cls
+
+
+def _iter_subclasses(cls: type) -> Iterator[type]:
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _iter_subclasses(subclass)
+
+
+def lookup(address: str) -> Optional[Type["OSCResponse"]]:
+    """Return the response class registered for `address`.
+
+    Subclasses of :py:class:`OSCResponse` that were not registered (i.e.
+    created with the standard library's ``dataclass``) are discovered and
+    registered the first time their address is requested.
+
+    Returns:
+        The response class, or ``None`` if no class matches `address`.
+    """
+
+    try:
+        return _registry[address]
+    except KeyError:
+        pass
+
+    for cls in _iter_subclasses(OSCResponse):
+        if getattr(cls, "address", None) == address:
+            return register(cls)
+
+    return None
+
+
+def parse(message_address: str, *osc_args: Any) -> "OSCResponse":
+    """Build the response object for a message decoded by python-osc.
+
+    Args:
+        message_address (`str`):
+            The OSC address of the message.
+        osc_args (`Any`):
+            The typed arguments of the message.
+
+    Raises:
+        `ParseError`:
+            No response matched `message_address` or the arguments do
+            not fit the response. The raw message is available via the
+            ``response`` attribute of the error.
+    """
+
+    try:
+        parser = _parsers[message_address]
+    except KeyError:
+        if lookup(message_address) is None:
+            exc = ParseError("no response object matched this message")
+            exc.response = _join_message(message_address, osc_args)
+            raise exc
+        parser = _parsers[message_address]
+
+    try:
+        return parser(*osc_args)
+    except (IndexError, TypeError) as original_exc:
+        exc = ParseError("parsing failed to deconstruct response")
+        exc.response = _join_message(message_address, osc_args)
+        exc.original_exc = original_exc
+        raise exc
+
+
 @dataclass
 class OSCResponse(object):
     """An abstract class meant to be implemented by OSC resp objects."""
 
     address: str
 
+    @classmethod
+    def from_osc(cls, *osc_args: Any) -> "OSCResponse":
+        """Build the response from the typed arguments of an OSC message.
+
+        Unlike the string constructor, the message address must not be
+        included in `osc_args`.
+        """
+
+        parser = cls.__dict__.get("_osc_parser")
+        if parser is None:
+            # A subclass that did not use this module's decorator
+            return cls(*osc_args)
+        # Before Python 3.10, a staticmethod must be unwrapped to be called
+        return parser.__func__(*osc_args)
+
 
 # Automatic Messages
 
@@ -0,0 +1,87 @@
+"""Run callables at a deadline on a single shared thread."""
+
+
+import heapq
+import traceback
+from itertools import count
+from threading import Condition, Thread
+from time import monotonic
+from typing import Callable, List, Optional, Tuple
+
+
+class ScheduledCall(object):
+    """A handle to a call scheduled with :py:meth:`Scheduler.call_at`."""
+
+    __slots__ = ("deadline", "fn", "cancelled")
+
+    def __init__(self, deadline: float, fn: Callable[[], None]) -> None:
+        self.deadline = deadline
+        self.fn = fn
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Prevent the call from running if it has not already."""
+        self.cancelled = True
+
+
+class Scheduler(object):
+    """Run callables at a deadline on a single background thread.
+
+    This is used to time-out requests without creating a thread (or a
+    blocked thread) for each one. Scheduled callables should be quick,
+    as they delay all the calls behind them.
+    """
+
+    _heap: List[Tuple[float, int, ScheduledCall]]
+    _condition: Condition
+    _seq: count
+    _thread: Optional[Thread]
+
+    def __init__(self) -> None:
+        self._heap = list()
+        self._condition = Condition()
+        self._seq = count()
+        self._thread = None
+
+    def call_at(self, deadline: float, fn: Callable[[], None]) -> ScheduledCall:
+        """Run `fn` once `time.monotonic()` reaches `deadline`."""
+
+        call = ScheduledCall(deadline, fn)
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._seq), call))
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+            elif self._heap[0][2] is call:
+                # Wake up the thread to wait for an earlier deadline
+                self._condition.notify()
+
+        return call
+
+    def call_later(self, delay: float, fn: Callable[[], None]) -> ScheduledCall:
+        """Run `fn` after `delay` seconds."""
+        return self.call_at(monotonic() + delay, fn)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                deadline, _, call = self._heap[0]
+                if call.cancelled:
+                    heapq.heappop(self._heap)
+                    continue
+                now = monotonic()
+                if now < deadline:
+                    self._condition.wait(deadline - now)
+                    continue
+                heapq.heappop(self._heap)
+
+            if not call.cancelled:
+                try:
+                    call.fn()
+                except Exception:
+                    traceback.print_exc()
+
+
+DEFAULT_SCHEDULER = Scheduler()
@@ -2,15 +2,39 @@
 
 
 import atexit
-from threading import Thread
-from typing import Any, List, Tuple
+import ctypes
+import os
+import socket
+import struct
+import sys
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from pythonosc.dispatcher import Dispatcher
-from pythonosc.osc_server import ThreadingOSCUDPServer
-from pythonosc.udp_client import SimpleUDPClient
+from pythonosc.osc_packet import ParseError as OscParseError
+from pythonosc.parsing import osc_types
 
 from stepseries.commands import OSCCommand
 from stepseries.exceptions import ClientNotFoundError
+from stepseries.osc import Message, parse_datagram
+from stepseries.receivers import (
+    RECEIVERS,
+    PoolReceiver,
+    ProcessReceiver,
+    Receiver,
+    SocketStats,
+    _kernel_udp_stats,
+    _socket_inode,
+)
 
 # Work around for this circular import; allows annotations while
 # writing code and doesn't break when running it.
@@ -20,85 +44,488 @@ except ImportError:
     STEPXXX = Any
 
 
+MAX_DATAGRAM_SIZE = 1472
+"""The largest UDP payload that fits an Ethernet frame unfragmented."""
+
+# "#bundle" followed by the "immediately" time tag
+_BUNDLE_HEADER = osc_types.write_string("#bundle") + struct.pack(">Q", 1)
+
+
+def _pack_bundles(
+    dgrams: List[bytes], max_size: int = MAX_DATAGRAM_SIZE
+) -> List[bytes]:
+    """Pack `dgrams` into as few OSC bundles of up to `max_size` as possible.
+
+    Messages too large to share a bundle are returned on their own.
+    """
+
+    packets = list()
+    bundle = bytearray()
+    for dgram in dgrams:
+        element = struct.pack(">i", len(dgram)) + dgram
+        if len(_BUNDLE_HEADER) + len(element) > max_size:
+            packets.append(dgram)
+            continue
+        if bundle and len(bundle) + len(element) > max_size:
+            packets.append(bytes(bundle))
+            bundle = bytearray()
+        if not bundle:
+            bundle += _BUNDLE_HEADER
+        bundle += element
+    if bundle:
+        packets.append(bytes(bundle))
+
+    return packets
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+# The most messages the kernel accepts in one call (UIO_MAXIOV)
+_SENDMMSG_MAX = 1024
+
+# The structures are packed in bulk with struct, which is much faster
+# than filling in the ctypes structures field by field
+_IOVEC = struct.Struct("@PN")
+_MMSGHDR = struct.Struct(
+    "@PIPNPNi{}xI{}x".format(
+        _MMsgHdr.msg_len.offset - struct.calcsize("@PIPNPNi"),
+        ctypes.sizeof(_MMsgHdr) - _MMsgHdr.msg_len.offset - struct.calcsize("@I"),
+    )
+)
+
+
+def _load_sendmmsg() -> Optional[Callable[..., int]]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        fn = ctypes.CDLL(None, use_errno=True).sendmmsg
+    except (OSError, AttributeError):
+        return None
+    fn.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    fn.restype = ctypes.c_int
+    return fn
+
+
+_sendmmsg = _load_sendmmsg()
+
+
+def _sockaddr_in(destination: Tuple[str, int]) -> ctypes.Array:
+    address, port = destination
+    return ctypes.create_string_buffer(
+        struct.pack("=H", socket.AF_INET)
+        + struct.pack(">H", port)
+        + socket.inet_aton(address)
+        + bytes(8),
+        16,
+    )
+
+
+def _address_of(buffer: bytearray) -> int:
+    return ctypes.addressof((ctypes.c_char * len(buffer)).from_buffer(buffer))
+
+
+def _send_batch(
+    sock: socket.socket,
+    dgrams: List[bytes],
+    destination: Tuple[str, int],
+    sockaddr: Optional[ctypes.Array],
+) -> None:
+    """Send all `dgrams` to `destination`, with ``sendmmsg`` if possible.
+
+    ``sendmmsg`` is only used when `sockaddr` (the packed destination)
+    is given.
+    """
+
+    if _sendmmsg is None or sockaddr is None or len(dgrams) < 2:
+        for dgram in dgrams:
+            sock.sendto(dgram, destination)
+        return
+
+    name, name_len = ctypes.addressof(sockaddr), len(sockaddr)
+    for start in range(0, len(dgrams), _SENDMMSG_MAX):
+        chunk = dgrams[start : start + _SENDMMSG_MAX]
+        n = len(chunk)
+
+        # One contiguous copy of the data, one iovec per datagram
+        data = bytearray(b"".join(chunk))
+        iovecs = bytearray(_IOVEC.size * n)
+        offset = _address_of(data)
+        for i, dgram in enumerate(chunk):
+            _IOVEC.pack_into(iovecs, i * _IOVEC.size, offset, len(dgram))
+            offset += len(dgram)
+
+        headers = bytearray(_MMSGHDR.size * n)
+        iovec = _address_of(iovecs)
+        for i in range(n):
+            _MMSGHDR.pack_into(
+                headers, i * _MMSGHDR.size, name, name_len, iovec, 1, 0, 0, 0, 0
+            )
+            iovec += _IOVEC.size
+
+        sent = 0
+        while sent < n:
+            result = _sendmmsg(
+                sock.fileno(), _address_of(headers) + sent * _MMSGHDR.size, n - sent, 0
+            )
+            if result < 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+            sent += result
+
+
+def _max_size(*sizes: Optional[int]) -> Optional[int]:
+    return max((size for size in sizes if size is not None), default=None)
+
+
+class _BoundServer(NamedTuple):
+    receiver: Union[Receiver, ProcessReceiver]
+    # Devices bound to this server, by ip address
+    routes: Dict[str, List[STEPXXX]]
+
+
+class _BoundDevice(NamedTuple):
+    socket: socket.socket
+    destination: Tuple[str, int]
+    # The destination packed for sendmmsg, None for other address families
+    sockaddr: Optional[ctypes.Array]
+    server_key: Tuple[str, int]
+    # The datagrams and bytes sent from the socket, shared by its devices
+    sent: List[int]
+
+
 class Manager:
+    """Route messages between STEP-series devices and their servers.
 
-    _bound_devices: List[Tuple[STEPXXX, SimpleUDPClient, ThreadingOSCUDPServer, Thread]]
+    All outgoing traffic is sent with ``sendto`` from a small pool of
+    unconnected UDP sockets, shared by every device, rather than one
+    socket per device.
+
+    Args:
+        send_sockets (`int`):
+            The number of sockets to send from. Devices are spread over
+            them. Defaults to `1`.
+        sendmmsg (`bool`):
+            Send bursts of datagrams (see `send_many`) with a single
+            ``sendmmsg`` call where available (Linux, IPv4). Defaults to
+            `False`.
+        receiver (`str`):
+            How incoming messages are handled, one of `"threading"`,
+            `"single"`, `"pool"` or `"processes"` (see
+            :py:mod:`stepseries.receivers`). Defaults to `"threading"`.
+            `"processes"` starts new Python interpreters which import
+            the main module, so a script using it must create the
+            manager under ``if __name__ == "__main__":``.
+        workers (`int`):
+            The number of worker threads (`"pool"`) or processes
+            (`"processes"`) per server. Defaults to `4`.
+        recv_buffer (`int`, `None`):
+            The kernel receive buffer size (``SO_RCVBUF``) to request for
+            the server sockets, in bytes. Raise it if bursts of reports
+            are dropped (see :py:meth:`stats`). Defaults to `None` (the
+            system default).
+        send_buffer (`int`, `None`):
+            The kernel send buffer size (``SO_SNDBUF``) to request for
+            the send sockets, in bytes. Defaults to `None` (the system
+            default).
+    """
+
+    _servers: Dict[Tuple[str, int], _BoundServer]
+    _devices: Dict[STEPXXX, _BoundDevice]
+    _send_sockets: Dict[int, List[socket.socket]]
+    # The counters and send buffer size requested for each send socket
+    _sent: Dict[socket.socket, List[int]]
+    _send_buffers: Dict[socket.socket, int]
+    _n_send_sockets: int
+    _next_socket: int
+    _use_sendmmsg: bool
+    _receiver: str
+    _workers: int
+    _recv_buffer: Optional[int]
+    _send_buffer: Optional[int]
+
+    def __init__(
+        self,
+        send_sockets: int = 1,
+        sendmmsg: bool = False,
+        receiver: str = "threading",
+        workers: int = 4,
+        recv_buffer: Optional[int] = None,
+        send_buffer: Optional[int] = None,
+    ) -> None:
+        if send_sockets < 1:
+            raise ValueError("argument 'send_sockets' must be at least 1")
+        if receiver not in RECEIVERS:
+            raise ValueError(
+                f"argument 'receiver' expected to be one of {list(RECEIVERS)}, "
+                f"'{receiver}' found"
+            )
+        if workers < 1:
+            raise ValueError("argument 'workers' must be at least 1")
 
-    def __init__(self) -> None:
-        self._bound_devices = list()
+        self._servers = dict()
+        self._devices = dict()
+        self._send_sockets = dict()
+        self._sent = dict()
+        self._send_buffers = dict()
+        self._n_send_sockets = send_sockets
+        self._next_socket = 0
+        self._use_sendmmsg = sendmmsg
+        self._receiver = receiver
+        self._workers = workers
+        self._recv_buffer = recv_buffer
+        self._send_buffer = send_buffer
 
         # Shutdown hook to ensure servers are properly closed
         atexit.register(self.shutdown)
 
     def _handle_incoming_message(
         self,
+        routes: Dict[str, List[STEPXXX]],
         client_address: Tuple[str, int],
         message_address: str,
-        *osc_args: Tuple[Any]
+        *osc_args: Tuple[Any],
     ) -> None:
-        # Find the device bound to this address
-        address, _ = client_address
-        for (device, _, _, _) in self._bound_devices:
-            if device.address == address:
+        # Find the devices bound to this address
+        devices = routes.get(client_address[0])
+        if devices:
+            for device in devices:
                 device._handle_incoming_message(message_address, *osc_args)
 
-    def add_device(self, device: STEPXXX) -> None:
+    def _handle_datagram(
+        self,
+        routes: Dict[str, List[STEPXXX]],
+        data: Union[bytes, memoryview],
+        client_address: Tuple[str, int],
+    ) -> None:
+        if client_address[0] not in routes:
+            return
+
+        try:
+            messages = parse_datagram(data)
+        except OscParseError:
+            return
+
+        self._handle_messages(routes, messages, client_address)
+
+    def _handle_messages(
+        self,
+        routes: Dict[str, List[STEPXXX]],
+        messages: List[Message],
+        client_address: Tuple[str, int],
+    ) -> None:
+        for address, args in messages:
+            self._handle_incoming_message(routes, client_address, address, *args)
+
+    def _new_receiver(
+        self,
+        key: Tuple[str, int],
+        routes: Dict[str, List[STEPXXX]],
+        recv_buffer: Optional[int],
+    ) -> Union[Receiver, ProcessReceiver]:
+        if self._receiver == "processes":
+            # The processes decode the datagrams themselves
+            handler = partial(self._handle_messages, routes)
+            return ProcessReceiver(key, handler, self._workers, recv_buffer)
+
+        handler = partial(self._handle_datagram, routes)
+        if self._receiver == "pool":
+            return PoolReceiver(key, handler, self._workers, recv_buffer)
+        return RECEIVERS[self._receiver](key, handler, recv_buffer)
+
+    def add_device(
+        self,
+        device: STEPXXX,
+        recv_buffer: Optional[int] = None,
+        send_buffer: Optional[int] = None,
+    ) -> None:
         """
         For internal use only. Add a device to send data to when it is
         received.
+
+        The sockets the device uses are grown to at least `recv_buffer`
+        and `send_buffer` bytes, if given, as they may be shared with
+        other devices.
         """
+
+        if device in self._devices:
+            return
+
+        recv_buffer = _max_size(self._recv_buffer, recv_buffer)
+        send_buffer = _max_size(self._send_buffer, send_buffer)
+
         # Check if the device wants to bind to a pre-existing server
-        # Bind the device to that server if needed
-        client = SimpleUDPClient(device.address, device.port)
-        for (_, _, server, _) in self._bound_devices:
-            if (device.server_address, device.server_port) == server.server_address:
-                self._bound_devices.append((device, client, server, None))
-                return
-
-        # Create a new server and bind the device to it
-        dispatcher = Dispatcher()
-        dispatcher.set_default_handler(self._handle_incoming_message, True)
-        server = ThreadingOSCUDPServer(
-            (device.server_address, device.server_port), dispatcher
+        # Create a new server and bind the device to it if needed
+        key = (device.server_address, device.server_port)
+        bound_server = self._servers.get(key)
+        if bound_server is None:
+            routes = dict()
+            receiver = self._new_receiver(key, routes, recv_buffer)
+            receiver.start()
+            bound_server = self._servers[key] = _BoundServer(receiver, routes)
+        elif recv_buffer is not None and recv_buffer > (
+            bound_server.receiver.recv_buffer or 0
+        ):
+            bound_server.receiver.set_recv_buffer(recv_buffer)
+
+        family, _, _, _, destination = socket.getaddrinfo(
+            device.address, device.port, type=socket.SOCK_DGRAM
+        )[0]
+        sockaddr = None
+        if self._use_sendmmsg and family == socket.AF_INET:
+            sockaddr = _sockaddr_in(destination)
+        sock = self._get_send_socket(family)
+        if send_buffer is not None and send_buffer > self._send_buffers.get(sock, 0):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, send_buffer)
+            self._send_buffers[sock] = send_buffer
+        self._devices[device] = _BoundDevice(
+            sock, destination, sockaddr, key, self._sent[sock]
         )
-        thread = Thread(target=server.serve_forever, daemon=True)
-        thread.start()
 
-        # Only add the thread to this list to keep a reference to it
-        self._bound_devices.append((device, client, server, thread))
+        # Replace the list rather than appending to it, so the receive
+        # threads never iterate over a list while it changes
+        routes = bound_server.routes
+        routes[device.address] = routes.get(device.address, list()) + [device]
 
     def remove_device(self, device: STEPXXX) -> None:
         """
         For internal use only. Remove a tracked device to stop sending
         data to it.
         """
-        for i, (d, _, s, _) in enumerate(self._bound_devices):
-            if d == device:
-                self._bound_devices.pop(i)
-                s.shutdown()
-                d._is_closed = True
-                break
+
+        bound_device = self._devices.pop(device, None)
+        if bound_device is None:
+            return
+        device._is_closed = True
+
+        bound_server = self._servers[bound_device.server_key]
+        routes = bound_server.routes
+        devices = [d for d in routes[device.address] if d is not device]
+        if devices:
+            routes[device.address] = devices
+        else:
+            del routes[device.address]
+
+        # Shutdown the server once its last device is removed
+        if not routes:
+            del self._servers[bound_device.server_key]
+            bound_server.receiver.close()
 
     def shutdown(self) -> None:
         """Shuts down all tracked servers."""
 
-        for _, _, s, _ in self._bound_devices:
-            s.shutdown()
-        self._bound_devices = list()
+        servers = list(self._servers.values())
+        self._servers = dict()
+        self._devices = dict()
+        for bound_server in servers:
+            bound_server.receiver.close()
+
+        for sockets in self._send_sockets.values():
+            for sock in sockets:
+                sock.close()
+        self._send_sockets = dict()
+        self._sent = dict()
+        self._send_buffers = dict()
+
+    def stats(self) -> List[SocketStats]:
+        """Return the counters of every socket, to size their buffers.
+
+        The server sockets come first (one per receiving process with the
+        `"processes"` receiver), followed by the send sockets. Counters
+        accumulate from when each socket was opened; compare two calls to
+        get rates.
+
+        Example:
+
+            >>> for stats in DEFAULT_SERVER.stats():
+            ...     print(stats.kind, stats.address, stats.drops)
+        """
+
+        stats = list()
+        for bound_server in self._servers.values():
+            stats.extend(bound_server.receiver.stats())
+
+        inodes = {sock: _socket_inode(sock) for sock in self._sent}
+        kernel_stats = _kernel_udp_stats(inodes.values())
+        for sock, (datagrams, n_bytes) in self._sent.items():
+            drops, queued, _ = kernel_stats.get(inodes[sock], (None, None, None))
+            stats.append(
+                SocketStats(
+                    "send",
+                    sock.getsockname()[:2],
+                    sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF),
+                    datagrams,
+                    n_bytes,
+                    drops,
+                    queued,
+                )
+            )
+        return stats
+
+    def _get_send_socket(self, family: int) -> socket.socket:
+        # Open the pool as devices are added, then share it round-robin
+        sockets = self._send_sockets.setdefault(family, list())
+        if len(sockets) < self._n_send_sockets:
+            sockets.append(socket.socket(family, socket.SOCK_DGRAM))
+            self._sent[sockets[-1]] = [0, 0]
+            return sockets[-1]
+        self._next_socket = (self._next_socket + 1) % len(sockets)
+        return sockets[self._next_socket]
+
+    def _get_bound_device(self, device: STEPXXX) -> _BoundDevice:
+        try:
+            return self._devices[device]
+        except KeyError:
+            raise ClientNotFoundError("device is not registered with a server")
 
     def send(self, device: STEPXXX, message: OSCCommand) -> None:
         """Send `message` to the `device`."""
 
-        # Get the client bound to this device
-        client = None
-        for d, c, _, _ in self._bound_devices:
-            if d == device:
-                client = c
-                break
-        else:
-            raise ClientNotFoundError("device is not registered with a server")
+        bound_device = self._get_bound_device(device)
+        dgram = message.encode()
+        bound_device.socket.sendto(dgram, bound_device.destination)
+        sent = bound_device.sent
+        sent[0] += 1
+        sent[1] += len(dgram)
+
+    def send_many(
+        self, device: STEPXXX, messages: Iterable[OSCCommand], bundle: bool = False
+    ) -> None:
+        """Send all `messages` to the `device` in as few datagrams as possible.
+
+        If `bundle` is `True`, the messages are packed into OSC bundles of
+        up to :py:data:`MAX_DATAGRAM_SIZE` bytes. Otherwise they are
+        encoded up front and sent back-to-back, one per datagram.
+        """
 
-        client.send(message.build())
+        bound_device = self._get_bound_device(device)
+        dgrams = [message.encode() for message in messages]
+        if bundle:
+            dgrams = _pack_bundles(dgrams)
+
+        _send_batch(
+            bound_device.socket, dgrams, bound_device.destination, bound_device.sockaddr
+        )
+        sent = bound_device.sent
+        sent[0] += len(dgrams)
+        sent[1] += sum(map(len, dgrams))
 
 
 DEFAULT_SERVER = Manager()
@@ -0,0 +1,673 @@
+"""Simulate STEP400 and STEP800 devices on localhost.
+
+The simulator speaks the devices' OSC protocol over UDP, so the library
+(and anything built on it) can be exercised, benchmarked and tested
+without any hardware:
+
+- Every 'get' command is answered with its response, reporting the
+  settings stored by the matching 'set' commands.
+- Motion commands (``Run``, ``Move``, ``GoTo``, ``SoftStop``...) move
+  simulated motors along their speed profile. ``Busy``, ``HiZ`` and
+  ``Dir`` changes are reported when enabled.
+- Positions and position lists are reported at the intervals set with
+  ``SetPositionReportInterval`` and ``SetPositionListReportInterval``.
+- ``Booted`` is sent when the simulator starts (if a destination is
+  given) and after ``ResetDevice``.
+
+Like the devices, nothing but ``Booted`` is sent until ``SetDestIP`` is
+received. Switches, the electromagnetic brake, servo mode and driver
+faults are not simulated: their settings are stored and reported back,
+but never change on their own.
+
+Example:
+
+    >>> from stepseries.commands import GetVersion, SetDestIP
+    >>> from stepseries.simulator import Simulator
+    >>> from stepseries.step400 import STEP400
+    >>>
+    >>> with Simulator("STEP400") as simulator:
+    ...     driver = STEP400(0, simulator.address, simulator.port)
+    ...     driver.get(SetDestIP())
+    ...     print(driver.get(GetVersion()))
+"""
+
+
+import math
+import socket
+import struct
+import time
+from dataclasses import fields
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_packet import ParseError as OscParseError
+from pythonosc.parsing import osc_types
+
+from stepseries import commands, responses
+from stepseries.osc import parse_datagram
+from stepseries.receivers import Receiver
+from stepseries.step800 import STEP800
+
+MODELS = {"STEP400": 4, "STEP800": 8}
+"""The models simulated, with their number of motors."""
+
+FIRMWARE_VERSION = "1.0.3"
+"""The firmware version the simulator reports."""
+
+_COMMANDS: Dict[str, Type[commands.OSCCommand]] = {
+    cls.address: cls
+    for cls in vars(commands).values()
+    if isinstance(cls, type)
+    and issubclass(cls, commands.OSCCommand)
+    and "address" in getattr(cls, "__dataclass_fields__", ())
+    and isinstance(getattr(cls, "address", None), str)
+}
+
+# 'set' commands storing the settings returned by a 'get' command, by
+# the response class of the 'get' command
+_SETTINGS: Dict[str, Type[responses.OSCResponse]] = dict()
+for _cls in _COMMANDS.values():
+    _getter = getattr(commands, "Get" + _cls.__name__[3:], None)
+    if _cls.__name__.startswith("Set") and _getter is not None:
+        _SETTINGS[_cls.address] = _getter.response_cls
+
+# 'enable...Report' commands, by the address of the report
+_REPORTS = {
+    "/enableBusyReport": "/busy",
+    "/enableHizReport": "/HiZ",
+    "/enableDirReport": "/dir",
+    "/enableMotorStatusReport": "/motorStatus",
+    "/enableHomeSwReport": "/homeSw",
+    "/enableLimitSwReport": "/limitSw",
+    "/enableSwEventReport": "/swEvent",
+    "/enableUvloReport": "/uvlo",
+    "/enableThermalStatusReport": "/thermalStatus",
+    "/enableOverCurrentReport": "/overCurrent",
+    "/enableStallReport": "/stall",
+}
+
+# The settings of a motor after a reset, where they are not all zeros
+_DEFAULTS: Dict[Type[responses.OSCResponse], Tuple[Any, ...]] = {
+    responses.MicrostepMode: (7,),
+    responses.LowSpeedOptimizeThreshold: (20.0, 0),
+    responses.OverCurrentThreshold: (2812.5,),
+    responses.StallThreshold: (2031.25,),
+    responses.Kval: (16, 16, 16, 16),
+    responses.BemfParam: (1032, 25, 41, 41),
+    responses.Tval: (16, 16, 16, 16),
+    responses.DecayModeParam: (25, 41, 41),
+    responses.SpeedProfile: (1000.0, 1000.0, 650.0),
+    responses.FullstepSpeed: (15625.0,),
+    responses.HomingDirection: (1,),
+    responses.HomingSpeed: (50.0,),
+    responses.GoUntilTimeout: (10000,),
+    responses.ReleaseSwTimeout: (5000,),
+    responses.BrakeTransitionDuration: (100,),
+    responses.ServoParam: (0.06, 0.0, 0.0),
+}
+
+# OSC type tags of the response fields
+_TAGS = {int: "i", float: "f", str: "s"}
+
+# MOT_STATUS values
+_STOPPED, _ACCELERATING, _DECELERATING, _CONSTANT_SPEED = range(4)
+
+# What a motor is doing
+_IDLE, _RUN, _GOTO, _STOP = range(4)
+
+# Motion within this many microsteps of the target has arrived
+_ARRIVED = 0.5
+
+
+def _field_types(cls: Type[responses.OSCResponse]) -> List[type]:
+    return [f.type for f in fields(cls) if f.init and f.name != "address"]
+
+
+def _default_settings(cls: Type[responses.OSCResponse]) -> List[Any]:
+    if cls in _DEFAULTS:
+        return list(_DEFAULTS[cls])
+    # Zeros, without the motor ID
+    return [t() for t in _field_types(cls)[1:]]
+
+
+class _Encoder(object):
+    """Encode the datagrams of one response type."""
+
+    def __init__(self, cls: Type[responses.OSCResponse]) -> None:
+        tags = "".join(_TAGS[t] for t in _field_types(cls))
+        self.address = cls.address
+        self.tags = tags
+        self.address_dgram = osc_types.write_string(cls.address)
+        # The type tags and packer by number of values
+        self.formats: Dict[int, Tuple[bytes, struct.Struct]] = dict()
+
+    def encode(self, values: Sequence[Any]) -> bytes:
+        n = len(values)
+        tags = self.tags[:n]
+        if "s" in tags:
+            builder = OscMessageBuilder(self.address)
+            for tag, value in zip(tags, values):
+                builder.add_arg(value, tag)
+            return builder.build().dgram
+
+        try:
+            prefix, packer = self.formats[n]
+        except KeyError:
+            prefix = self.address_dgram + osc_types.write_string("," + tags)
+            packer = struct.Struct(">" + tags)
+            self.formats[n] = (prefix, packer)
+        return prefix + packer.pack(*values)
+
+
+class _Motor(object):
+    """The state of a simulated motor."""
+
+    def __init__(self) -> None:
+        self.settings: Dict[Type[responses.OSCResponse], List[Any]] = dict()
+        # In microsteps
+        self.position = 0.0
+        self.target = 0.0
+        # In steps per second, signed
+        self.speed = 0.0
+        self.target_speed = 0.0
+        self.mode = _IDLE
+        self.status = _STOPPED
+        self.hiz = True
+        self.hiz_when_stopped = False
+        self.direction = 1
+        self.homing_status = 0
+        # Milliseconds between position reports, 0 to disable
+        self.position_interval = 0
+        self.next_position_report = 0.0
+
+    def setting(self, cls: Type[responses.OSCResponse]) -> List[Any]:
+        try:
+            return self.settings[cls]
+        except KeyError:
+            return self.settings.setdefault(cls, _default_settings(cls))
+
+    @property
+    def microsteps(self) -> int:
+        return 1 << self.setting(responses.MicrostepMode)[0]
+
+    @property
+    def busy(self) -> bool:
+        if self.mode == _RUN:
+            return self.speed != self.target_speed
+        return self.mode != _IDLE
+
+    def start(self, mode: int) -> None:
+        self.mode = mode
+        self.hiz = False
+        self.hiz_when_stopped = False
+
+    def advance(self, dt: float) -> None:
+        """Move the motor along its speed profile for `dt` seconds."""
+
+        if self.mode == _IDLE:
+            return
+
+        acc, dec, max_speed = self.setting(responses.SpeedProfile)
+        microsteps = self.microsteps
+        speed = self.speed
+
+        if self.mode == _RUN:
+            wanted = self.target_speed
+        elif self.mode == _STOP:
+            wanted = 0.0
+        else:
+            # Stay on the speed curve that stops at the target
+            remaining = (self.target - self.position) / microsteps
+            wanted = math.copysign(
+                min(max_speed, math.sqrt(2 * dec * abs(remaining))), remaining
+            )
+
+        if speed * wanted < 0 or abs(wanted) < abs(speed):
+            change, self.status = dec * dt, _DECELERATING
+        elif abs(wanted) > abs(speed):
+            change, self.status = acc * dt, _ACCELERATING
+        else:
+            change, self.status = 0, _CONSTANT_SPEED if speed else _STOPPED
+        # Approach the wanted speed by at most `change`
+        speed = min(max(wanted, speed - change), speed + change)
+        self.speed = speed
+        self.position += speed * dt * microsteps
+
+        if self.mode == _GOTO:
+            remaining = self.target - self.position
+            if abs(remaining) < _ARRIVED or remaining * speed < 0:
+                self.position = self.target
+                self.stop()
+        elif self.mode == _STOP and speed == 0:
+            self.stop()
+
+    def stop(self) -> None:
+        self.speed = 0.0
+        self.mode = _IDLE
+        self.status = _STOPPED
+        if self.homing_status == 1:
+            self.homing_status = 2
+        if self.hiz_when_stopped:
+            self.hiz = True
+
+
+class Simulator(object):
+    """Simulate a STEP400 or STEP800 on a local UDP port.
+
+    Point a device at :py:attr:`address` and :py:attr:`port` to use it.
+
+    Args:
+        model (`str`):
+            `"STEP400"` or `"STEP800"`. Defaults to `"STEP400"`.
+        id (`int`):
+            The id reported by ``Booted``, as set by the DIP switches.
+            Defaults to `0`.
+        address (`str`):
+            The ip address to listen on. Defaults to `127.0.0.1`.
+        port (`int`):
+            The port to listen on. Defaults to `0` (any free port).
+        server_port (`int`):
+            The port replies and reports are sent to. Defaults to
+            `50100`.
+        destination (`str`, `None`):
+            The ip address to send replies and reports to before
+            ``SetDestIP`` is received, if any. Defaults to `None`.
+        tick (`float`):
+            Seconds between updates of the motors and reports. Defaults
+            to `0.005`.
+        boot_time (`float`):
+            Seconds taken to reboot after ``ResetDevice``. Defaults to
+            `0.1`.
+    """
+
+    model: str
+    id: int
+    server_port: int
+    n_motors: int
+
+    _destination: Optional[str]
+    _motors: List[_Motor]
+    _reports: Dict[str, set]
+    _position_list_interval: int
+    _next_position_list_report: float
+    _lock: Lock
+    _receiver: Receiver
+    _socket: socket.socket
+    _encoders: Dict[Type[responses.OSCResponse], _Encoder]
+    _tick: float
+    _boot_time: float
+    _closed: Event
+    _thread: Optional[Thread]
+
+    def __init__(
+        self,
+        model: str = "STEP400",
+        id: int = 0,
+        address: str = "127.0.0.1",
+        port: int = 0,
+        server_port: int = 50100,
+        destination: Optional[str] = None,
+        tick: float = 0.005,
+        boot_time: float = 0.1,
+    ) -> None:
+        if model not in MODELS:
+            raise ValueError(
+                f"argument 'model' expected to be one of {list(MODELS)}, "
+                f"'{model}' found"
+            )
+
+        self.model = model
+        self.id = id
+        self.server_port = server_port
+        self.n_motors = MODELS[model]
+        self._destination = destination
+        self._tick = tick
+        self._boot_time = boot_time
+        self._encoders = dict()
+        self._lock = Lock()
+        self._closed = Event()
+        self._thread = None
+        self._reset()
+
+        self._receiver = Receiver((address, port), self._handle_datagram)
+        # Reply from the address listened on, as the devices do, so that
+        # several simulators can be told apart by their address
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((self.address, 0))
+
+    @property
+    def address(self) -> str:
+        """The ip address the simulator listens on."""
+        return self._receiver.server_address[0]
+
+    @property
+    def port(self) -> int:
+        """The port the simulator listens on."""
+        return self._receiver.server_address[1]
+
+    def __enter__(self) -> "Simulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start answering commands and sending reports."""
+
+        self._receiver.start()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._send(responses.Booted, (self.id,))
+
+    def close(self) -> None:
+        """Stop the simulator and release its port."""
+
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._receiver.close()
+        self._socket.close()
+
+    def _reset(self) -> None:
+        self._motors = [_Motor() for _ in range(self.n_motors)]
+        self._reports = {report: set() for report in _REPORTS.values()}
+        self._position_list_interval = 0
+        self._next_position_list_report = 0.0
+
+    # Sending
+
+    def _send(self, cls: Type[responses.OSCResponse], values: Sequence[Any]) -> None:
+        # Like the devices, say nothing until told where to
+        if self._destination is None:
+            return
+
+        encoder = self._encoders.get(cls)
+        if encoder is None:
+            encoder = self._encoders[cls] = _Encoder(cls)
+        try:
+            self._socket.sendto(
+                encoder.encode(values), (self._destination, self.server_port)
+            )
+        except OSError:
+            # The destination may not be listening
+            pass
+
+    def _report(self, address: str, motor_id: int) -> None:
+        if motor_id in self._reports[address]:
+            cls = responses.lookup(address)
+            self._send(cls, (motor_id, *self._read(cls, motor_id)))
+
+    # Reading state
+
+    def _read(self, cls: Type[responses.OSCResponse], motor_id: int) -> List[Any]:
+        """Return the values of the response `cls`, without the motor ID."""
+
+        motor = self._motors[motor_id - 1]
+        reader = _READERS.get(cls)
+        if reader is not None:
+            return reader(motor)
+        return motor.setting(cls)
+
+    def _motor_ids(self, motor_id: Any) -> Optional[List[int]]:
+        if motor_id == 255:
+            return list(range(1, self.n_motors + 1))
+        if isinstance(motor_id, int) and 1 <= motor_id <= self.n_motors:
+            return [motor_id]
+        self._send(
+            responses.ErrorCommand,
+            ("MotorIdNotMatch", motor_id if isinstance(motor_id, int) else 0),
+        )
+        return None
+
+    # Receiving
+
+    def _handle_datagram(
+        self, data: memoryview, client_address: Tuple[str, int]
+    ) -> None:
+        try:
+            messages = parse_datagram(data)
+        except OscParseError:
+            return
+
+        with self._lock:
+            for address, args in messages:
+                self._handle_message(address, args, client_address)
+
+    def _handle_message(
+        self, address: str, args: Tuple[Any, ...], client_address: Tuple[str, int]
+    ) -> None:
+        cls = _COMMANDS.get(address)
+        if cls is None or (
+            self.model == "STEP800" and cls in STEP800._invalid_commands
+        ):
+            self._send(responses.ErrorOSC, ("messageNotMatch", 0))
+            return
+
+        if address == "/setDestIp":
+            is_new = int(self._destination != client_address[0])
+            self._destination = client_address[0]
+            ip = [int(part) for part in client_address[0].split(".")]
+            self._send(responses.DestIP, (*ip, is_new))
+            return
+        if address == "/resetDevice":
+            Thread(target=self._reboot, daemon=True).start()
+            return
+
+        try:
+            handler = _HANDLERS.get(address)
+            if handler is not None:
+                handler(self, args)
+            elif address in _SETTINGS:
+                self._set(_SETTINGS[address], args)
+            elif address in _REPORTS:
+                self._enable_report(_REPORTS[address], args)
+            elif issubclass(cls, commands.OSCGetCommand):
+                self._get(cls.response_cls, args)
+        except (TypeError, IndexError, struct.error):
+            # Missing or mistyped arguments
+            self._send(responses.ErrorOSC, ("messageNotMatch", 0))
+
+    def _reboot(self) -> None:
+        time.sleep(self._boot_time)
+        with self._lock:
+            self._reset()
+            self._send(responses.Booted, (self.id,))
+
+    def _get(self, cls: Type[responses.OSCResponse], args: Tuple[Any, ...]) -> None:
+        if cls is responses.Version:
+            self._send(cls, (self.model, FIRMWARE_VERSION, "Jan  1 2022 00:00:00"))
+        elif cls is responses.ConfigName:
+            # No SD card
+            self._send(cls, ("", 0, 0, 0))
+        elif cls is responses.PositionList:
+            self._send(cls, self._positions())
+        else:
+            for motor_id in self._motor_ids(args[0] if args else None) or ():
+                self._send(cls, (motor_id, *self._read(cls, motor_id)))
+
+    def _set(self, cls: Type[responses.OSCResponse], args: Tuple[Any, ...]) -> None:
+        if not args:
+            return
+        for motor_id in self._motor_ids(args[0]) or ():
+            setting = self._motors[motor_id - 1].setting(cls)
+            setting[: len(args) - 1] = args[1 : len(setting) + 1]
+
+    def _enable_report(self, report: str, args: Tuple[Any, ...]) -> None:
+        if len(args) < 2:
+            return
+        for motor_id in self._motor_ids(args[0]) or ():
+            if args[1]:
+                self._reports[report].add(motor_id)
+            else:
+                self._reports[report].discard(motor_id)
+
+    def _positions(self) -> List[int]:
+        return [round(motor.position) for motor in self._motors]
+
+    # Motion
+
+    def _for_motors(self, args: Tuple[Any, ...], fn: Callable[[_Motor], None]) -> None:
+        for motor_id in self._motor_ids(args[0] if args else None) or ():
+            motor = self._motors[motor_id - 1]
+            before = (motor.busy, motor.hiz, motor.direction)
+            fn(motor)
+            self._report_changes(motor_id, motor, before)
+
+    def _report_changes(
+        self, motor_id: int, motor: _Motor, before: Tuple[bool, bool, int]
+    ) -> None:
+        busy, hiz, direction = before
+        if motor.busy != busy:
+            self._report("/busy", motor_id)
+        if motor.hiz != hiz:
+            self._report("/HiZ", motor_id)
+        if motor.direction != direction:
+            self._report("/dir", motor_id)
+
+    def _run(self) -> None:
+        last = time.monotonic()
+        while not self._closed.wait(self._tick):
+            now = time.monotonic()
+            dt, last = now - last, now
+            with self._lock:
+                self._update(now, dt)
+
+    def _update(self, now: float, dt: float) -> None:
+        for motor_id, motor in enumerate(self._motors, 1):
+            before = (motor.busy, motor.hiz, motor.direction)
+            status = motor.status
+            motor.advance(dt)
+            self._report_changes(motor_id, motor, before)
+            if motor.status != status:
+                self._report("/motorStatus", motor_id)
+
+            if motor.position_interval and now >= motor.next_position_report:
+                motor.next_position_report = now + motor.position_interval / 1000
+                self._send(responses.Position, (motor_id, round(motor.position)))
+
+        if self._position_list_interval and now >= self._next_position_list_report:
+            self._next_position_list_report = now + self._position_list_interval / 1000
+            self._send(responses.PositionList, self._positions())
+
+
+def _goto(motor: _Motor, position: float) -> None:
+    motor.target = position
+    if position != motor.position:
+        motor.direction = int(position > motor.position)
+        motor.start(_GOTO)
+
+
+def _run(motor: _Motor, speed: float) -> None:
+    max_speed = motor.setting(responses.SpeedProfile)[2]
+    motor.target_speed = math.copysign(min(abs(speed), max_speed), speed)
+    motor.direction = int(speed >= 0)
+    motor.start(_RUN)
+
+
+def _soft_stop(motor: _Motor, hiz: bool) -> None:
+    if motor.mode == _IDLE:
+        motor.hiz = motor.hiz or hiz
+        return
+    motor.mode = _STOP
+    motor.hiz_when_stopped = hiz
+
+
+def _hard_stop(motor: _Motor, hiz: bool) -> None:
+    motor.stop()
+    motor.hiz = motor.hiz or hiz
+
+
+def _homing(motor: _Motor) -> None:
+    # Without switches, homing ends at the origin
+    motor.homing_status = 1
+    _goto(motor, 0)
+    if motor.mode == _IDLE:
+        motor.homing_status = 2
+
+
+def _set_position(motor: _Motor, position: float) -> None:
+    if motor.mode == _IDLE:
+        motor.position = motor.target = position
+
+
+def _enable_low_speed_optimize(motor: _Motor, enable: int) -> None:
+    motor.setting(responses.LowSpeedOptimizeThreshold)[1] = int(enable)
+
+
+def _set_speed_profile(index: int) -> Callable[[Simulator, Tuple[Any, ...]], None]:
+    def handler(simulator: Simulator, args: Tuple[Any, ...]) -> None:
+        def set_value(motor: _Motor) -> None:
+            motor.setting(responses.SpeedProfile)[index] = args[1]
+
+        simulator._for_motors(args, set_value)
+
+    return handler
+
+
+def _set_position_interval(simulator: Simulator, args: Tuple[Any, ...]) -> None:
+    def set_interval(motor: _Motor) -> None:
+        motor.position_interval = args[1]
+
+    simulator._for_motors(args, set_interval)
+    if args[1]:
+        # The reports are exclusive
+        simulator._position_list_interval = 0
+
+
+def _set_position_list_interval(simulator: Simulator, args: Tuple[Any, ...]) -> None:
+    simulator._position_list_interval = args[0]
+    if args[0]:
+        for motor in simulator._motors:
+            motor.position_interval = 0
+
+
+def _motion(
+    fn: Callable[..., None], *extra: Any
+) -> Callable[[Simulator, Tuple[Any, ...]], None]:
+    def handler(simulator: Simulator, args: Tuple[Any, ...]) -> None:
+        simulator._for_motors(args, lambda motor: fn(motor, *args[1:], *extra))
+
+    return handler
+
+
+_HANDLERS: Dict[str, Callable[[Simulator, Tuple[Any, ...]], None]] = {
+    "/run": _motion(_run),
+    "/move": _motion(lambda motor, steps: _goto(motor, motor.position + steps)),
+    "/goTo": _motion(_goto),
+    "/goToDir": _motion(lambda motor, direction, position: _goto(motor, position)),
+    "/goHome": _motion(lambda motor: _goto(motor, 0)),
+    "/goMark": _motion(lambda motor: _goto(motor, motor.setting(responses.Mark)[0])),
+    "/homing": _motion(_homing),
+    "/softStop": _motion(_soft_stop, False),
+    "/hardStop": _motion(_hard_stop, False),
+    "/softHiZ": _motion(_soft_stop, True),
+    "/hardHiZ": _motion(_hard_stop, True),
+    "/setPosition": _motion(_set_position),
+    "/resetPos": _motion(lambda motor: _set_position(motor, 0)),
+    "/resetMotorDriver": _motion(lambda motor: motor.settings.clear()),
+    "/enableLowSpeedOptimize": _motion(_enable_low_speed_optimize),
+    "/setMaxSpeed": _set_speed_profile(2),
+    "/setAcc": _set_speed_profile(0),
+    "/setDec": _set_speed_profile(1),
+    "/setPositionReportInterval": _set_position_interval,
+    "/setPositionListReportInterval": _set_position_list_interval,
+}
+
+# Responses read from the motion rather than the settings
+_READERS: Dict[Type[responses.OSCResponse], Callable[[_Motor], List[Any]]] = {
+    responses.Busy: lambda motor: [int(motor.busy)],
+    responses.HiZ: lambda motor: [int(motor.hiz)],
+    responses.Dir: lambda motor: [motor.direction],
+    responses.MotorStatus: lambda motor: [motor.status],
+    responses.Position: lambda motor: [round(motor.position)],
+    responses.Speed: lambda motor: [abs(motor.speed)],
+    responses.HomingStatus: lambda motor: [motor.homing_status],
+    responses.HomeSw: lambda motor: [0, motor.direction],
+    responses.LimitSw: lambda motor: [0, motor.direction],
+    responses.ElPos: lambda motor: [
+        round(motor.position) // motor.microsteps % 4,
+        round(motor.position) % motor.microsteps,
+    ],
+}
@@ -32,7 +32,24 @@ class STEP400(STEPXXX):
             be `0.0.0.0`. Defaults to `0.0.0.0`.
         server_port (`int`):
             The port the server is listening on. Defaults to `50100`.
+        manager (`Manager`, `None`):
+            The manager to bind this device to. Defaults to
+            :py:data:`stepseries.server.DEFAULT_SERVER`.
+        recv_buffer (`int`, `None`):
+            The least kernel receive buffer size, in bytes, for the
+            server socket, shared with the other devices on the same
+            server port. Defaults to `None` (the manager's setting).
+        send_buffer (`int`, `None`):
+            The least kernel send buffer size, in bytes, for the socket
+            sending to this device. Defaults to `None` (the manager's
+            setting).
+        executor (`CallbackExecutor`, `None`):
+            Run the callbacks on this executor, instead of on the thread
+            receiving the messages (see :py:mod:`stepseries.executor`).
+            Defaults to `None`.
         add_id_to_args (`bool`):
             Whether to add `id` to `address` and `server_port`
             (the default behavior on the device). Defaults to `True`.
     """
+
+    _n_motors = 4
@@ -1,7 +1,8 @@
 """8 axis stepper motor driver with Ethernet interface."""
 
 
-from typing import List, Union
+from concurrent.futures import Future
+from typing import List, Optional, Union
 
 from stepseries import commands
 from stepseries.exceptions import InvalidCommandError
@@ -37,45 +38,54 @@ class STEP800(STEPXXX):
             be `0.0.0.0`. Defaults to `0.0.0.0`.
         server_port (`int`):
             The port the server is listening on. Defaults to `50100`.
+        manager (`Manager`, `None`):
+            The manager to bind this device to. Defaults to
+            :py:data:`stepseries.server.DEFAULT_SERVER`.
+        recv_buffer (`int`, `None`):
+            The least kernel receive buffer size, in bytes, for the
+            server socket, shared with the other devices on the same
+            server port. Defaults to `None` (the manager's setting).
+        send_buffer (`int`, `None`):
+            The least kernel send buffer size, in bytes, for the socket
+            sending to this device. Defaults to `None` (the manager's
+            setting).
+        executor (`CallbackExecutor`, `None`):
+            Run the callbacks on this executor, instead of on the thread
+            receiving the messages (see :py:mod:`stepseries.executor`).
+            Defaults to `None`.
         add_id_to_args (`bool`):
             Whether to add `id` to `address` and `server_port`
             (the default behavior on the device). Defaults to `True`.
     """
 
-    _invalid_commands: List[Union[commands.OSCGetCommand, commands.OSCSetCommand]]
-
-    def __init__(
-        self,
-        id: int,
-        address: str = "10.0.0.100",
-        port: int = 50000,
-        server_address: str = "0.0.0.0",
-        server_port: int = 50100,
+    _n_motors = 8
+    _invalid_commands: List[Union[commands.OSCGetCommand, commands.OSCSetCommand]] = [
+        commands.SetVoltageMode,
+        commands.SetCurrentMode,
+        commands.SetTval,
+        commands.GetTval,
+        commands.GetTval_mA,
+        commands.SetDecayModeParam,
+        commands.GetDecayModeParam,
+        commands.EnableLimitSwReport,
+        commands.GetLimitSw,
+        commands.SetLimitSwMode,
+        commands.GetLimitSwMode,
+        commands.GetAdcVal,
+        commands.GetProhibitMotionOnLimitSw,
+        commands.SetProhibitMotionOnLimitSw,
+    ]
+
+    def _check_command(
+        self, command: Union[commands.OSCGetCommand, commands.OSCSetCommand]
     ) -> None:
-        super().__init__(
-            id,
-            address=address,
-            port=port,
-            server_address=server_address,
-            server_port=server_port,
-        )
-
-        self._invalid_commands = [
-            commands.SetVoltageMode,
-            commands.SetCurrentMode,
-            commands.SetTval,
-            commands.GetTval,
-            commands.GetTval_mA,
-            commands.SetDecayModeParam,
-            commands.GetDecayModeParam,
-            commands.EnableLimitSwReport,
-            commands.GetLimitSw,
-            commands.SetLimitSwMode,
-            commands.GetLimitSwMode,
-            commands.GetAdcVal,
-            commands.GetProhibitMotionOnLimitSw,
-            commands.SetProhibitMotionOnLimitSw,
-        ]
+        if command.__class__ in self._invalid_commands:
+            raise InvalidCommandError(
+                f"command '{command.__class__.__name__}' cannot run on a STEP800"
+                "\n\n\tSTEP400-only commands:\n"
+                + "\n".join(["\t  - " + c.__name__ for c in self._invalid_commands])
+                + "\n\nFor more information, see: https://ponoor.com/en/docs/step-series/osc-command-reference/differences-between-step400-and-step800/"  # noqa
+            )
 
     def get(
         self,
@@ -116,16 +126,50 @@ class STEP800(STEPXXX):
                 f"'{type(command).__name__}' found"
             )
 
-        if command.__class__ in self._invalid_commands:
-            raise InvalidCommandError(
-                f"command '{command.__class__.__name__}' cannot run on a STEP800"
-                "\n\n\tSTEP400-only commands:\n"
-                + "\n".join(["\t  - " + c.__name__ for c in self._invalid_commands])
-                + "\n\nFor more information, see: https://ponoor.com/en/docs/step-series/osc-command-reference/differences-between-step400-and-step800/"  # noqa
-            )
+        self._check_command(command)
 
         return super().get(command, with_callback, wait)
 
+    def get_async(
+        self,
+        command: commands.OSCGetCommand,
+        with_callback: bool = True,
+        timeout: Optional[float] = 2.0,
+    ) -> "Future[Union[OSCResponse, List[OSCResponse]]]":
+        """Send a 'get' command to the device without waiting for it.
+
+        The returned future is resolved by the receive thread with the
+        response, or with `TimeoutError` if none arrives within
+        `timeout`. Cancelling the future stops waiting for the response,
+        which is then handled like any other message.
+
+        Args:
+            command (`OSCGetCommand`):
+                The completed command template (`stepseries.commands`).
+            with_callback (`bool`):
+                Send the response to callbacks as well
+                (defaults to `True`).
+            timeout (`float`, `None`):
+                Seconds to wait for the response, or `None` to wait
+                indefinitely (defaults to `2.0`).
+
+        Raises:
+            `TypeError`:
+                `command` is not an `OSCGetCommand`.
+            `InvalidCommandError`:
+                `command` cannot run on a STEP800.
+        """
+
+        if not isinstance(command, commands.OSCGetCommand):
+            raise TypeError(
+                "argument 'command' expected to be 'OSCGetCommand', "
+                f"'{type(command).__name__}' found"
+            )
+
+        self._check_command(command)
+
+        return super().get_async(command, with_callback, timeout)
+
     def set(self, command: commands.OSCSetCommand) -> None:
         """Send a 'set' command to the device.
 
@@ -136,6 +180,8 @@ class STEP800(STEPXXX):
         Raises:
             `TypeError`:
                 `command` is not an `OSCSetCommand`.
+            `InvalidCommandError`:
+                `command` cannot run on a STEP800.
         """
 
         if not isinstance(command, commands.OSCSetCommand):
@@ -144,12 +190,6 @@ class STEP800(STEPXXX):
                 f"'{type(command).__name__}' found"
             )
 
-        if command.__class__ in self._invalid_commands:
-            raise InvalidCommandError(
-                f"command '{command.__class__.__name__}' cannot run on a STEP800"
-                "\n\n\tSTEP400-only commands:\n"
-                + "\n".join(["\t  - " + c.__name__ for c in self._invalid_commands])
-                + "\n\nFor more information, see: https://ponoor.com/en/docs/step-series/osc-command-reference/differences-between-step400-and-step800/"  # noqa
-            )
+        self._check_command(command)
 
         return super().set(command)
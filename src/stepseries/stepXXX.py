@@ -1,8 +1,26 @@
 """Stepper motor driver with an Ethernet interface."""
 
 
-from queue import Empty, Queue
-from typing import Any, Callable, Dict, List, Tuple, Union
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import count
+from threading import Condition, Lock
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 
 from stepseries.commands import (
     OSCGetCommand,
@@ -12,26 +30,262 @@ from stepseries.commands import (
     SetDestIP,
 )
 from stepseries.exceptions import ClientClosedError, ParseError, StepSeriesException
-from stepseries.responses import DestIP, ErrorCommand, ErrorOSC, OSCResponse
-from stepseries.server import DEFAULT_SERVER
+from stepseries.executor import LATEST, NEVER_DROP, CallbackExecutor, check_policy
+from stepseries.responses import (
+    Booted,
+    DestIP,
+    ErrorCommand,
+    ErrorOSC,
+    OSCResponse,
+    Position,
+    PositionList,
+    parse,
+)
+from stepseries.scheduler import DEFAULT_SCHEDULER, Scheduler
+from stepseries.server import DEFAULT_SERVER, Manager
 
+_RequestKey = Tuple[Type[OSCResponse], Optional[int]]
+_Callback = Callable[[OSCResponse], None]
+# A callback and the motors it is registered for (`None` for all)
+_Subscription = Tuple[_Callback, Optional[FrozenSet[int]]]
+_Delivery = Dict[Optional[type], Tuple[str, int]]
+# The futures and timers of the requests: `Future` and `ScheduledCall`,
+# or their asyncio counterparts for asyncio devices
+_Future = Any
+_Timer = Any
 
-class STEPXXX(object):
-    """Send and receive data from a STEP-series motor driver.
+# Only the newest position matters. Errors and reboots are kept even
+# when the policy of all messages is changed.
+_DEFAULT_DELIVERY: _Delivery = {
+    None: (NEVER_DROP, 0),
+    Position: (LATEST, 1),
+    PositionList: (LATEST, 1),
+    Booted: (NEVER_DROP, 0),
+    ErrorCommand: (NEVER_DROP, 0),
+    ErrorOSC: (NEVER_DROP, 0),
+    ParseError: (NEVER_DROP, 0),
+}
 
-    Args:
-        id (`int`):
-            The id set by the DIP switches on the device.
-        address (`str`):
-            The ip address of the device. Defaults to `10.0.0.100`.
-        port (`int`):
-            The local port the device is listening on. Defaults to
-            `50000`.
-        server_address (`str`):
-            The ip address of the server (this machine). Should always
-            be `0.0.0.0`. Defaults to `0.0.0.0`.
-        server_port (`int`):
-            The port the server is listening on. Defaults to `50100`.
+# Watch callbacks may wait for responses, so they must not hold up the
+# scheduler timing out the requests
+_WATCH_SCHEDULER = Scheduler()
+
+
+class _GetRequest(object):
+    """A 'get' command waiting for its response(s)."""
+
+    __slots__ = (
+        "key",
+        "seq",
+        "n_responses",
+        "with_callback",
+        "responses",
+        "result",
+        "future",
+        "timer",
+    )
+
+    def __init__(
+        self, key: _RequestKey, seq: int, n_responses: int, with_callback: bool
+    ) -> None:
+        self.key = key
+        self.seq = seq
+        self.n_responses = n_responses
+        self.with_callback = with_callback
+        self.responses: List[OSCResponse] = list()
+        self.result: Union[OSCResponse, List[OSCResponse], Exception, None] = None
+        self.future: _Future = None
+        self.timer: Optional[_Timer] = None
+
+
+class Watcher(object):
+    """Pass a callable the newest messages, at most once per interval.
+
+    The messages are kept per type and motor: each is passed the newest
+    message received for it, at most once every `interval` seconds,
+    and the messages it replaces are dropped. Created by
+    :py:meth:`_DeviceBase.watch`.
+    """
+
+    _device: "_DeviceBase"
+    _fn: _Callback
+    _interval: float
+    _lock: Lock
+    _latest: Dict[Tuple[type, Optional[int]], OSCResponse]
+    _last_call: Dict[Tuple[type, Optional[int]], float]
+    _coalesced: int
+    _closed: bool
+
+    def __init__(self, device: "_DeviceBase", fn: _Callback, interval: float) -> None:
+        self._device = device
+        self._fn = fn
+        self._interval = interval
+        self._lock = Lock()
+        self._latest = dict()
+        self._last_call = dict()
+        self._coalesced = 0
+        self._closed = False
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def coalesced(self) -> int:
+        """The messages replaced by a newer one before being passed on."""
+        return self._coalesced
+
+    def close(self) -> None:
+        """Stop watching the messages."""
+
+        self._device.remove(self._put)
+        with self._lock:
+            self._closed = True
+            self._latest.clear()
+
+    def _put(self, message: OSCResponse) -> None:
+        key = (message.__class__, getattr(message, "motorID", None))
+        with self._lock:
+            if self._closed:
+                return
+            if key in self._latest:
+                # Already waiting for its turn
+                self._coalesced += 1
+                self._latest[key] = message
+                return
+            self._latest[key] = message
+            last_call = self._last_call.get(key)
+            delay = 0.0
+            if last_call is not None:
+                delay = max(last_call + self._interval - monotonic(), 0.0)
+
+        self._device._call_watch_later(delay, lambda: self._emit(key))
+
+    def _emit(self, key: Tuple[type, Optional[int]]) -> None:
+        with self._lock:
+            message = self._latest.pop(key, None)
+            if message is None:
+                return
+            self._last_call[key] = monotonic()
+
+        executor = self._device._executor
+        if executor is None:
+            self._fn(message)
+        else:
+            executor.submit((self, key), (self._fn,), message, LATEST, 1)
+
+
+class ReportStream(object):
+    """Iterate over the messages received by a device, as they arrive.
+
+    Messages are buffered from the moment the stream is created, in a
+    bounded buffer: once full, the oldest message is dropped for each
+    new one. Use the stream with ``with`` (or call :py:meth:`close`) to
+    stop buffering. Created by :py:meth:`STEPXXX.stream` and
+    :py:meth:`STEPXXX.stream_batches`.
+    """
+
+    _device: "_DeviceBase"
+    _buffer: Deque[OSCResponse]
+    _condition: Condition
+    _timeout: Optional[float]
+    _batch: Optional[int]
+    _max_wait: float
+    # When the oldest message buffered was received
+    _first_received: float
+    _dropped: int
+    _closed: bool
+
+    def __init__(
+        self,
+        device: "_DeviceBase",
+        timeout: Optional[float],
+        maxsize: int,
+        batch: Optional[int] = None,
+        max_wait: float = 0.0,
+    ) -> None:
+        self._device = device
+        self._buffer = deque(maxlen=maxsize)
+        self._condition = Condition()
+        self._timeout = timeout
+        self._batch = batch
+        self._max_wait = max_wait
+        self._first_received = 0.0
+        self._dropped = 0
+        self._closed = False
+
+    def __iter__(self) -> "ReportStream":
+        return self
+
+    def __next__(self) -> Union[OSCResponse, List[OSCResponse]]:
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._buffer or self._closed, self._timeout
+            ):
+                # Nothing received in time
+                self._close()
+                raise StopIteration
+            if not self._buffer:
+                raise StopIteration
+            if self._batch is None:
+                return self._buffer.popleft()
+
+            # Fill the batch until it is full, or `max_wait` after its
+            # first message was received
+            self._condition.wait_for(
+                lambda: len(self._buffer) >= self._batch or self._closed,
+                max(self._first_received + self._max_wait - monotonic(), 0.0),
+            )
+            n = min(self._batch, len(self._buffer))
+            batch = [self._buffer.popleft() for _ in range(n)]
+            if self._buffer:
+                # The next batch starts waiting now
+                self._first_received = monotonic()
+            return batch
+
+    def __enter__(self) -> "ReportStream":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def dropped(self) -> int:
+        """The messages dropped as the buffer was full."""
+        return self._dropped
+
+    def close(self) -> None:
+        """Stop receiving messages, and end the iteration."""
+
+        with self._condition:
+            self._close()
+
+    def _close(self) -> None:
+        self._device.remove(self._put)
+        self._closed = True
+        self._condition.notify_all()
+
+    def _put(self, message: OSCResponse) -> None:
+        with self._condition:
+            if len(self._buffer) == self._buffer.maxlen:
+                self._dropped += 1
+            elif not self._buffer:
+                self._first_received = monotonic()
+            self._buffer.append(message)
+            # Wake the reader for the first message of a batch, and once
+            # the batch is full
+            n = len(self._buffer)
+            if self._batch is None or n == 1 or n >= self._batch:
+                self._condition.notify()
+
+
+class _DeviceBase(object):
+    """The state and message handling shared by every STEP-series device.
+
+    Subclasses provide the transport: sending commands and passing the
+    messages received to :py:meth:`_handle_incoming_message`.
     """
 
     _id: int
@@ -40,16 +294,17 @@ class STEPXXX(object):
     _server_address: str
     _server_port: int
 
-    _boards_to_n_motors: Dict[str, int]
-    _registered_callbacks: Dict[
-        Union[OSCResponse, None], List[Callable[[OSCResponse], None]]
-    ]
-    _get_request: OSCResponse
-    _get_with_callback: bool
-    _get_queue: Queue
+    _n_motors: int
+    _registered_callbacks: Dict[Optional[Type[OSCResponse]], Tuple[_Subscription, ...]]
+    _dispatch: Dict[Tuple[type, Optional[int]], Tuple[_Callback, ...]]
+    _callbacks_lock: Lock
+    _executor: Optional[CallbackExecutor] = None
+    _delivery: _Delivery
+    _dropped: Dict[type, int]
+    _pending_gets: Dict[_RequestKey, Deque[_GetRequest]]
+    _pending_lock: Lock
+    _request_seq: Iterator[int]
     _is_closed: bool
-    _is_multiple_response: bool
-    _multiple_responses: List[OSCResponse]
 
     def __init__(
         self,
@@ -65,17 +320,13 @@ class STEPXXX(object):
         self._server_address = server_address
         self._server_port = server_port
 
-        self._boards_to_n_motors = {"STEP400": 4, "STEP800": 8}
         self._registered_callbacks = dict()
-        self._get_request = None
-        self._get_with_callback = True
-        self._get_queue = Queue()
+        self._dispatch = dict()
+        self._callbacks_lock = Lock()
+        self._pending_gets = dict()
+        self._pending_lock = Lock()
+        self._request_seq = count()
         self._is_closed = True
-        self._is_multiple_response = False
-        self._multiple_responses = list()
-
-        # Bind this device
-        DEFAULT_SERVER.add_device(self)
 
     @property
     def address(self) -> str:
@@ -102,68 +353,161 @@ class STEPXXX(object):
         """Is the connection to the device closed."""
         return self._is_closed
 
+    def _new_future(self) -> _Future:
+        return Future()
+
+    def _call_later(self, delay: float, fn: Callable[[], None]) -> _Timer:
+        return DEFAULT_SCHEDULER.call_later(delay, fn)
+
+    def _call_watch_later(self, delay: float, fn: Callable[[], None]) -> _Timer:
+        return _WATCH_SCHEDULER.call_later(delay, fn)
+
+    def _start_future(self, future: _Future) -> bool:
+        # False if the future was cancelled, otherwise it can be resolved
+        return future.set_running_or_notify_cancel()
+
+    def _add_request(
+        self, command: OSCGetCommand, with_callback: bool, timeout: Optional[float]
+    ) -> _GetRequest:
+        motor_id = getattr(command, "motorID", None)
+        n_responses = 1
+        if motor_id == 255:
+            n_responses = self._n_motors
+
+        key = (command.response_cls, motor_id)
+        with self._pending_lock:
+            request = _GetRequest(
+                key, next(self._request_seq), n_responses, with_callback
+            )
+            request.future = self._new_future()
+            if timeout is not None:
+                request.timer = self._call_later(
+                    timeout, lambda: self._expire_request(request)
+                )
+            self._pending_gets.setdefault(key, deque()).append(request)
+
+        # Stop waiting for a response once cancelled
+        request.future.add_done_callback(
+            lambda f: f.cancelled() and self._discard_request(request)
+        )
+
+        return request
+
+    def _remove_request(self, request: _GetRequest) -> bool:
+        # Must be called with the lock held
+        pending = self._pending_gets.get(request.key)
+        if not pending or request not in pending:
+            return False
+        pending.remove(request)
+        if not pending:
+            del self._pending_gets[request.key]
+        return True
+
+    def _claim_request(
+        self, resp: Union[OSCResponse, Exception]
+    ) -> Optional[_GetRequest]:
+        # Must be called with the lock held. Finds the oldest request
+        # waiting for `resp`, and removes it once it is complete.
+        motor_id = getattr(resp, "motorID", None)
+
+        # Errors go to the oldest request, preferring the same motor
+        if isinstance(resp, Exception):
+            requests = [pending[0] for pending in self._pending_gets.values()]
+            same_motor = [r for r in requests if r.key[1] in (motor_id, 255)]
+            request = min(same_motor or requests, key=lambda r: r.seq)
+            request.result = resp
+            self._remove_request(request)
+            return request
+
+        for cls in type(resp).__mro__:
+            if cls is OSCResponse:
+                break
+            for key in ((cls, motor_id), (cls, 255), (cls, None)):
+                pending = self._pending_gets.get(key)
+                if pending:
+                    request = pending[0]
+                    request.responses.append(resp)
+                    if len(request.responses) >= request.n_responses:
+                        if request.n_responses > 1:
+                            request.result = request.responses
+                        else:
+                            request.result = resp
+                        self._remove_request(request)
+                    return request
+
+        return None
+
+    def _discard_request(self, request: _GetRequest) -> None:
+        with self._pending_lock:
+            self._remove_request(request)
+        if request.timer is not None:
+            request.timer.cancel()
+
+    def _expire_request(self, request: _GetRequest) -> None:
+        with self._pending_lock:
+            expired = self._remove_request(request)
+        if expired:
+            request.result = TimeoutError(
+                "timed-out waiting for a response from the device"
+            )
+            self._resolve_request(request)
+
+    def _resolve_request(self, request: _GetRequest) -> None:
+        # Only called by whoever removed `request` from the table
+        if request.timer is not None:
+            request.timer.cancel()
+        if not self._start_future(request.future):
+            return
+
+        result = request.result
+        if isinstance(result, Exception):
+            if isinstance(result, StepSeriesException):
+                if result.original_exc is not None:
+                    result.__cause__ = result.original_exc
+            request.future.set_exception(result)
+        else:
+            request.future.set_result(result)
+
     def _handle_incoming_message(
         self, message_address: str, *osc_args: Tuple[Any]
     ) -> None:
         # Reconstruct message as an object
-        resp = None
-        raw_resp = message_address + " " + " ".join([str(x) for x in osc_args])
-        for cls in OSCResponse.__subclasses__():
-            if cls.address == message_address:
-                try:
-                    resp = cls(raw_resp)
-                except (IndexError, TypeError) as exc:
-                    resp = ParseError("parsing failed to deconstruct response")
-                    resp.response = raw_resp
-                    resp.original_exc = exc
-                break
-        else:
-            resp = ParseError("no response object matched this message")
-            resp.response = raw_resp
+        try:
+            resp = parse(message_address, *osc_args)
+        except ParseError as exc:
+            resp = exc
 
         # Set the flag that the connection is open
         if isinstance(resp, DestIP):
             self._is_closed = False
 
-        # Support multiple responses
-        if self._is_multiple_response:
-            if not isinstance(resp, Exception):
-                if isinstance(resp, self._get_request):
-                    self._multiple_responses.append(resp)
-                    if (
-                        len(self._multiple_responses)
-                        < self._boards_to_n_motors[self.__class__.__name__]
-                    ):
-                        return
+        # Match the message to a pending get request
+        request = None
+        if self._pending_gets:
+            with self._pending_lock:
+                if self._pending_gets:
+                    request = self._claim_request(resp)
+            if request is not None and request.result is None:
+                # Wait for the responses from the other motors
+                return
+
+        # Send the message to all required callbacks, on the executor if
+        # the device has one
+        if request is None or request.with_callback or isinstance(resp, Exception):
+            payload = resp
+            if request is not None and not isinstance(resp, Exception):
+                payload = request.result
+            motor_id = getattr(payload, "motorID", None)
+            callbacks = self._callbacks_for(resp.__class__, motor_id)
+            if callbacks and self._executor is not None:
+                self._submit(resp.__class__, motor_id, callbacks, payload)
             else:
-                if self._get_request:
-                    if isinstance(resp, self._get_request):
-                        self._get_queue.put(resp)
-                        self._get_queue.join()
-
-        # Send the message to all required callbacks
-        # TODO: Look at thread pooling this process
-        if (
-            not isinstance(resp, self._get_request or type(None))
-            or self._get_with_callback
-            or isinstance(resp, Exception)
-        ):
-            for resp_type, callbacks in self._registered_callbacks.items():
-                if resp.__class__ == resp_type or resp_type is None:
-                    for callback in callbacks:
-                        if self._multiple_responses:
-                            callback(self._multiple_responses)
-                        else:
-                            callback(resp)
+                for callback in callbacks:
+                    callback(payload)
 
-        # Return the get request
-        if self._get_request:
-            if isinstance(resp, self._get_request) or isinstance(resp, Exception):
-                if self._multiple_responses:
-                    self._get_queue.put(self._multiple_responses)
-                else:
-                    self._get_queue.put(resp)
-                self._get_queue.join()
+        # Return the get request without waiting for the caller
+        if request is not None:
+            self._resolve_request(request)
 
     def _check_status(self) -> None:
         if self.is_closed:
@@ -173,17 +517,11 @@ class STEPXXX(object):
                 "or check your configurations"
             )
 
-    def close(self) -> None:
-        """Close the connection to the stepseries device.
-
-        Note: No other command after this one should be called on the
-        device.
-        """
-        DEFAULT_SERVER.remove_device(self)
-        self._is_closed = True
-
     def on(
-        self, message_type: Union[OSCResponse, None], fn: Callable[[OSCResponse], None]
+        self,
+        message_type: Union[OSCResponse, None],
+        fn: Callable[[OSCResponse], None],
+        motorID: Union[int, Iterable[int], None] = None,
     ) -> None:
         """Register `fn` to be executed when `message_type` is received.
 
@@ -199,14 +537,27 @@ class STEPXXX(object):
                     Note:
                         `fn` should accept one and only one argument
                         being the message received.
+            motorID (`int`, `Iterable[int]`, `None`):
+                Only send `fn` the messages about this motor (or these
+                motors). Messages without a motor ID, like
+                ``PositionList`` or the list of responses of a 'get'
+                command to all motors, are then not sent to `fn`.
+                Registering `fn` again for other motors adds them. If
+                `None`, the messages of all motors are sent to `fn`
+                (the default).
 
         Raises:
             `TypeError`:
                 `message_type` is not an `OSCResponse`.
                 `fn` is not a callable.
+                `motorID` is not an `int` or an iterable of `int`.
+            `ValueError`:
+                `motorID` is not a motor of the device.
         """
 
-        if message_type is not None and OSCResponse not in message_type.__bases__:
+        if message_type is not None and not (
+            isinstance(message_type, type) and issubclass(message_type, OSCResponse)
+        ):
             raise TypeError(
                 "argument 'message_type' expected to be 'OSCResponse', "
                 f"'{type(message_type).__name__}' found"
@@ -216,19 +567,425 @@ class STEPXXX(object):
                 "argument 'fn' expected to be callable, " f"'{type(fn).__name__}' found"
             )
 
-        try:
-            if fn not in self._registered_callbacks[message_type]:
-                self._registered_callbacks[message_type].append(fn)
-        except KeyError:
-            self._registered_callbacks[message_type] = [fn]
+        motors = self._check_motors(motorID)
+
+        with self._callbacks_lock:
+            subscriptions = self._registered_callbacks.get(message_type, ())
+            for i, (callback, callback_motors) in enumerate(subscriptions):
+                if callback == fn:
+                    # Widen the motors of the registered callback
+                    if callback_motors is None or motors is None:
+                        motors = None
+                    else:
+                        motors = callback_motors | motors
+                    if motors == callback_motors:
+                        return
+                    subscriptions = (
+                        subscriptions[:i] + ((fn, motors),) + subscriptions[i + 1 :]
+                    )
+                    break
+            else:
+                subscriptions += ((fn, motors),)
+
+            registered = dict(self._registered_callbacks)
+            registered[message_type] = subscriptions
+            self._set_callbacks(registered)
 
     def remove(self, fn: Callable[[OSCResponse], None]) -> None:
         """Remove `fn` from the registered callbacks."""
 
-        for k, callbacks in self._registered_callbacks.items():
-            for callback in callbacks:
-                if callback == fn:
-                    self._registered_callbacks[k].remove(fn)
+        with self._callbacks_lock:
+            self._set_callbacks(
+                {
+                    k: tuple(s for s in subscriptions if s[0] != fn)
+                    for k, subscriptions in self._registered_callbacks.items()
+                }
+            )
+
+    def watch(
+        self,
+        message_type: Union[OSCResponse, None],
+        fn: Callable[[OSCResponse], None],
+        interval: float,
+        motorID: Union[int, Iterable[int], None] = None,
+    ) -> Watcher:
+        """Pass `fn` the newest `message_type`, at most every `interval`.
+
+        This suits displays and monitors, which only need the latest
+        value of reports that may be received much more often. Each type
+        and motor is handled separately: `fn` gets the newest message of
+        each, at most once every `interval` seconds, and the messages
+        received in between are dropped.
+
+        `fn` is run on the device's executor if it has one, otherwise on
+        a thread shared by all the watches (the event loop for asyncio
+        devices), so it should return quickly.
+
+        Example:
+
+            >>> with driver.watch(Position, update_display, 1 / 30):
+            ...     driver.set(SetPositionReportInterval(255, 1))
+            ...     time.sleep(10)
+
+        Args:
+            message_type (`OSCResponse`, `None`):
+                The message type to watch. If `None`, then all messages
+                received are watched.
+            fn (`callable`):
+                The callable to pass the messages to.
+            interval (`float`):
+                The least seconds between two messages of the same type
+                and motor.
+            motorID (`int`, `Iterable[int]`, `None`):
+                Only watch the messages about these motors, as with
+                :py:meth:`on`. Defaults to `None` (all messages).
+
+        Returns:
+            The :py:class:`Watcher`, to close once done.
+
+        Raises:
+            `TypeError`:
+                See :py:meth:`on`.
+            `ValueError`:
+                `interval` is not positive, or `motorID` is not a motor
+                of the device.
+        """
+
+        if not interval > 0:
+            raise ValueError(f"argument 'interval' must be positive, {interval} found")
+        if not callable(fn):
+            raise TypeError(
+                "argument 'fn' expected to be callable, " f"'{type(fn).__name__}' found"
+            )
+
+        watcher = Watcher(self, fn, interval)
+        self.on(message_type, watcher._put, motorID)
+        return watcher
+
+    def _check_motors(
+        self, motorID: Union[int, Iterable[int], None]
+    ) -> Optional[FrozenSet[int]]:
+        if motorID is None:
+            return None
+
+        try:
+            motors = frozenset((motorID,) if isinstance(motorID, int) else motorID)
+        except TypeError:
+            motors = None
+        if motors is None or not all(
+            isinstance(m, int) and not isinstance(m, bool) for m in motors
+        ):
+            raise TypeError(
+                "argument 'motorID' expected to be 'int' or an iterable of 'int', "
+                f"'{type(motorID).__name__}' found"
+            )
+        invalid = [m for m in motors if not 1 <= m <= self._n_motors]
+        if invalid or not motors:
+            raise ValueError(
+                f"argument 'motorID' expected to be motors 1 to {self._n_motors}, "
+                f"{motorID!r} found"
+            )
+        return motors
+
+    def _set_callbacks(
+        self, registered: Dict[Optional[Type[OSCResponse]], Tuple[_Subscription, ...]]
+    ) -> None:
+        # Registrations are never changed in place: they are replaced,
+        # along with an empty dispatch table, so messages being delivered
+        # keep the callbacks they started with. The table is replaced
+        # last, so that it is never filled from outdated registrations.
+        self._registered_callbacks = registered
+        self._dispatch = dict()
+
+    def _submit(
+        self,
+        cls: type,
+        motor_id: Optional[int],
+        callbacks: Tuple[_Callback, ...],
+        payload: Any,
+    ) -> None:
+        # Keep the messages of each type and motor in order
+        key = (self, cls, motor_id)
+        delivery = self._delivery
+        policy, maxsize = delivery.get(cls) or delivery[None]
+        dropped = self._executor.submit(key, callbacks, payload, policy, maxsize)
+        if dropped:
+            with self._callbacks_lock:
+                self._dropped[cls] = self._dropped.get(cls, 0) + dropped
+
+    def _callbacks_for(
+        self, cls: type, motor_id: Optional[int]
+    ) -> Tuple[_Callback, ...]:
+        # The callbacks for `cls` and for all messages, of all motors or
+        # of `motor_id`, in the order their types were first registered
+        dispatch = self._dispatch
+        key = (cls, motor_id)
+        try:
+            return dispatch[key]
+        except KeyError:
+            pass
+
+        callbacks: Tuple[_Callback, ...] = ()
+        for message_type, subscriptions in self._registered_callbacks.items():
+            if message_type is cls or message_type is None:
+                callbacks += tuple(
+                    fn
+                    for fn, motors in subscriptions
+                    if motors is None or motor_id in motors
+                )
+        dispatch[key] = callbacks
+        return callbacks
+
+    def _prepare_get(self, command: OSCGetCommand) -> None:
+        if not isinstance(command, OSCGetCommand):
+            raise TypeError(
+                "argument 'command' expected to be 'OSCGetCommand', "
+                f"'{type(command).__name__}' found"
+            )
+        self._check_command(command)
+
+        if not isinstance(command, SetDestIP):
+            self._check_status()
+
+    def _check_command(self, command: Union[OSCGetCommand, OSCSetCommand]) -> None:
+        # Hook for devices that do not support every command
+        pass
+
+    def _prepare_set(self, command: OSCSetCommand) -> None:
+        if not isinstance(command, OSCSetCommand):
+            raise TypeError(
+                "argument 'command' expected to be 'OSCSetCommand', "
+                f"'{type(command).__name__}' found"
+            )
+        self._check_command(command)
+
+        if isinstance(command, ResetDevice):
+            self._is_closed = True
+
+        if command.__dict__.get("callback", None):
+            if isinstance(command, ReportError):
+                self.on(ErrorCommand, command.callback)
+                self.on(ErrorOSC, command.callback)
+            else:
+                self.on(command.response_cls, command.callback)
+
+
+class STEPXXX(_DeviceBase):
+    """Send and receive data from a STEP-series motor driver.
+
+    Args:
+        id (`int`):
+            The id set by the DIP switches on the device.
+        address (`str`):
+            The ip address of the device. Defaults to `10.0.0.100`.
+        port (`int`):
+            The local port the device is listening on. Defaults to
+            `50000`.
+        server_address (`str`):
+            The ip address of the server (this machine). Should always
+            be `0.0.0.0`. Defaults to `0.0.0.0`.
+        server_port (`int`):
+            The port the server is listening on. Defaults to `50100`.
+        manager (`Manager`, `None`):
+            The manager to bind this device to. Defaults to
+            :py:data:`stepseries.server.DEFAULT_SERVER`.
+        recv_buffer (`int`, `None`):
+            The least kernel receive buffer size, in bytes, for the
+            server socket. As the socket is shared with the other devices
+            on the same server port, it is only ever grown. Defaults to
+            `None` (the manager's setting).
+        send_buffer (`int`, `None`):
+            The least kernel send buffer size, in bytes, for the socket
+            sending to this device. Defaults to `None` (the manager's
+            setting).
+        executor (`CallbackExecutor`, `None`):
+            Run the callbacks on this executor, instead of on the thread
+            receiving the messages. Messages of the same type and motor
+            are still delivered in the order received. See
+            :py:meth:`set_delivery_policy` for the messages kept when
+            the callbacks fall behind. Defaults to `None`.
+    """
+
+    _manager: Manager
+
+    def __init__(
+        self,
+        id: int,
+        address: str = "10.0.0.100",
+        port: int = 50000,
+        server_address: str = "0.0.0.0",
+        server_port: int = 50100,
+        manager: Optional[Manager] = None,
+        recv_buffer: Optional[int] = None,
+        send_buffer: Optional[int] = None,
+        executor: Optional[CallbackExecutor] = None,
+    ) -> None:
+        super().__init__(id, address, port, server_address, server_port)
+        self._executor = executor
+        self._delivery = dict(_DEFAULT_DELIVERY)
+        self._dropped = dict()
+
+        # Bind this device
+        self._manager = manager if manager is not None else DEFAULT_SERVER
+        self._manager.add_device(self, recv_buffer, send_buffer)
+
+    def close(self) -> None:
+        """Close the connection to the stepseries device.
+
+        Note: No other command after this one should be called on the
+        device.
+        """
+        self._manager.remove_device(self)
+        self._is_closed = True
+
+    def set_delivery_policy(
+        self,
+        message_type: Optional[Type[OSCResponse]],
+        policy: str,
+        maxsize: int = 1024,
+    ) -> None:
+        """Set which messages are kept when the callbacks fall behind.
+
+        This applies to the messages waiting for the device's executor,
+        per response type and motor. Without an executor, callbacks run
+        as the messages are received, and the backlog is left in the
+        socket buffer.
+
+        By default, only the newest ``Position`` and ``PositionList``
+        are kept, and every other message is kept. ``Booted`` and the
+        errors keep their own policy when the policy of all the types
+        (`None`) is changed.
+
+        Args:
+            message_type (`OSCResponse`, `None`):
+                The message type to set the policy of. If `None`, the
+                policy of all the types without their own.
+            policy (`str`):
+                One of :py:data:`stepseries.executor.POLICIES`.
+            maxsize (`int`):
+                The most messages kept waiting, for
+                :py:data:`stepseries.executor.DROP_OLDEST` and
+                :py:data:`stepseries.executor.BLOCK`. Defaults to `1024`.
+
+        Raises:
+            `ValueError`:
+                `policy` is unknown, or `maxsize` is not positive.
+        """
+
+        check_policy(policy, maxsize)
+        delivery = dict(self._delivery)
+        delivery[message_type] = (policy, maxsize)
+        self._delivery = delivery
+
+    @property
+    def dropped(self) -> Dict[type, int]:
+        """The messages dropped by the delivery policies, by type."""
+        with self._callbacks_lock:
+            return dict(self._dropped)
+
+    def stream(
+        self,
+        message_type: Optional[Type[OSCResponse]] = None,
+        timeout: Optional[float] = None,
+        maxsize: int = 1024,
+        motorID: Union[int, Iterable[int], None] = None,
+    ) -> ReportStream:
+        """Iterate over the messages received of `message_type`.
+
+        Messages are buffered from the moment this is called, so no
+        report is missed between sending a command and starting to
+        iterate.
+
+        Example:
+
+            >>> with driver.stream(PositionList, timeout=1) as positions:
+            ...     driver.set(SetPositionListReportInterval(10))
+            ...     for message in positions:
+            ...         print(message)
+
+        Args:
+            message_type (`OSCResponse`, `None`):
+                The message type to filter for. If `None`, then all
+                messages received are returned.
+            timeout (`float`, `None`):
+                End the iteration once no message is received for this
+                many seconds, or never if `None` (the default).
+            maxsize (`int`):
+                The most messages to buffer. Once full, the oldest
+                message is dropped for each new one. Defaults to `1024`.
+            motorID (`int`, `Iterable[int]`, `None`):
+                Only return the messages about these motors, as with
+                :py:meth:`on`. Defaults to `None` (all messages).
+
+        Raises:
+            `ValueError`:
+                `maxsize` is not positive.
+        """
+
+        if maxsize < 1:
+            raise ValueError(f"argument 'maxsize' must be at least 1, {maxsize} found")
+
+        stream = ReportStream(self, timeout, maxsize)
+        self.on(message_type, stream._put, motorID)
+        return stream
+
+    def stream_batches(
+        self,
+        message_type: Optional[Type[OSCResponse]],
+        n: int,
+        max_wait: float,
+        timeout: Optional[float] = None,
+        maxsize: int = 1024,
+        motorID: Union[int, Iterable[int], None] = None,
+    ) -> ReportStream:
+        """Iterate over lists of the messages received of `message_type`.
+
+        Each list holds up to `n` messages: once the first message is
+        received, the list is returned when `n` messages are buffered,
+        or after `max_wait` seconds with those received so far. Taking
+        messages in batches spreads the cost of each iteration over many
+        messages.
+
+        Example:
+
+            >>> with driver.stream_batches(Position, 100, 0.1) as batches:
+            ...     for positions in batches:
+            ...         store(positions)
+
+        Args:
+            message_type (`OSCResponse`, `None`):
+                The message type to filter for. If `None`, then all
+                messages received are returned.
+            n (`int`):
+                The most messages in a list.
+            max_wait (`float`):
+                The most seconds to wait for a list to fill up.
+            timeout (`float`, `None`):
+                End the iteration once no message is received for this
+                many seconds, or never if `None` (the default).
+            maxsize (`int`):
+                The most messages to buffer, at least `n`. Once full,
+                the oldest message is dropped for each new one. Defaults
+                to `1024`.
+            motorID (`int`, `Iterable[int]`, `None`):
+                Only return the messages about these motors, as with
+                :py:meth:`on`. Defaults to `None` (all messages).
+
+        Raises:
+            `ValueError`:
+                `n` is not positive, or `maxsize` is less than `n`.
+        """
+
+        if n < 1:
+            raise ValueError(f"argument 'n' must be at least 1, {n} found")
+        if maxsize < n:
+            raise ValueError(
+                f"argument 'maxsize' must be at least 'n' ({n}), {maxsize} found"
+            )
+
+        stream = ReportStream(self, timeout, maxsize, n, max_wait)
+        self.on(message_type, stream._put, motorID)
+        return stream
 
     def reset(self) -> None:
         """Resets the device.
@@ -266,48 +1023,99 @@ class STEPXXX(object):
                 `command` is not an `OSCSetCommand`.
         """
 
-        if not isinstance(command, OSCGetCommand):
-            raise TypeError(
-                "argument 'command' expected to be 'OSCGetCommand', "
-                f"'{type(command).__name__}' found"
-            )
+        if not wait:
+            self._prepare_get(command)
+            self._manager.send(self, command)
+            return None
 
-        if not isinstance(command, SetDestIP):
-            self._check_status()
+        return self.get_async(command, with_callback).result()
+
+    def get_async(
+        self,
+        command: OSCGetCommand,
+        with_callback: bool = True,
+        timeout: Optional[float] = 2.0,
+    ) -> "Future[Union[OSCResponse, List[OSCResponse]]]":
+        """Send a 'get' command to the device without waiting for it.
+
+        The returned future is resolved by the receive thread with the
+        response, or with `TimeoutError` if none arrives within
+        `timeout`. Cancelling the future stops waiting for the response,
+        which is then handled like any other message.
+
+        Example:
+
+            >>> futures = [d.get_async(GetVersion()) for d in drivers]
+            >>> # ... do other work ...
+            >>> versions = [f.result() for f in futures]
+
+        Args:
+            command (`OSCGetCommand`):
+                The completed command template (`stepseries.commands`).
+            with_callback (`bool`):
+                Send the response to callbacks as well
+                (defaults to `True`).
+            timeout (`float`, `None`):
+                Seconds to wait for the response, or `None` to wait
+                indefinitely (defaults to `2.0`).
 
-        # Prepare for get request
-        if wait:
-            self._get_request = command.response_cls
-        self._get_with_callback = with_callback
-        if hasattr(command, "motorID"):
-            if command.motorID == 255:
-                self._is_multiple_response = True
+        Raises:
+            `TypeError`:
+                `command` is not an `OSCGetCommand`.
+        """
 
-        # Send the request
-        DEFAULT_SERVER.send(self, command)
+        self._prepare_get(command)
 
-        # Wait for data and reset
+        request = self._add_request(command, with_callback, timeout)
         try:
-            if wait:
-                resp = self._get_queue.get(timeout=2)
-                self._get_queue.task_done()
-            else:
-                resp = None
-        except Empty:
-            raise TimeoutError("timed-out waiting for a response from the device")
-        finally:
-            self._get_request = None
-            self._get_with_callback = True
-            self._multiple_responses = list()
-            self._is_multiple_response = False
+            self._manager.send(self, command)
+        except BaseException:
+            request.future.cancel()
+            raise
 
-        if isinstance(resp, Exception):
-            if isinstance(resp, StepSeriesException):
-                if resp.original_exc is not None:
-                    raise resp from resp.original_exc
-            raise resp
+        return request.future
+
+    def get_many(
+        self, commands: Iterable[OSCGetCommand], with_callback: bool = True
+    ) -> List[Union[OSCResponse, List[OSCResponse]]]:
+        """Send several 'get' commands at once and return their responses.
 
-        return resp
+        All the requests are in flight together, so reading back many
+        parameters takes about one round trip instead of one per
+        command. Responses are matched to their command by type and
+        motor ID; identical commands are answered in the order sent.
+
+        Args:
+            commands (`Iterable[OSCGetCommand]`):
+                The completed command templates (`stepseries.commands`).
+            with_callback (`bool`):
+                Send the responses to callbacks as well
+                (defaults to `True`).
+
+        Raises:
+            `TypeError`:
+                A command is not an `OSCGetCommand`.
+            `TimeoutError`:
+                A response was not received in time.
+
+        Returns:
+            The responses, in the same order as `commands`.
+        """
+
+        commands = list(commands)
+        for command in commands:
+            self._prepare_get(command)
+
+        futures = [
+            self._add_request(command, with_callback, 2.0).future
+            for command in commands
+        ]
+        try:
+            self._manager.send_many(self, commands)
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
 
     def set(self, command: OSCSetCommand) -> None:
         """Send a 'set' command to the device.
@@ -333,15 +1141,60 @@ class STEPXXX(object):
             )
 
         self._check_status()
+        self._prepare_set(command)
 
-        if isinstance(command, ResetDevice):
-            self._is_closed = True
+        self._manager.send(self, command)
 
-        if command.__dict__.get("callback", None):
-            if isinstance(command, ReportError):
-                self.on(ErrorCommand, command.callback)
-                self.on(ErrorOSC, command.callback)
-            else:
-                self.on(command.response_cls, command.callback)
+    def send_many(
+        self, commands: Iterable[OSCSetCommand], bundle: bool = False
+    ) -> None:
+        """Send several 'set' commands to the device at once.
+
+        Every command is validated and encoded before anything is sent,
+        then the datagrams go out back-to-back. This is much cheaper than
+        calling :py:meth:`set` in a loop when configuring many motors.
+
+        Note:
+            The commands are sent in order, but like any UDP traffic
+            there is no guarantee they arrive in order.
+
+        Args:
+            commands (`Iterable[OSCSetCommand]`):
+                The completed command templates (`stepseries.commands`).
+            bundle (`bool`):
+                Pack the commands into OSC bundles, sending as few
+                datagrams as possible (defaults to `False`). Only enable
+                this if the firmware on the device accepts bundles.
+
+        Raises:
+            `TypeError`:
+                A command is not an `OSCSetCommand`.
+        """
+
+        commands = list(commands)
+        if not commands:
+            return
+
+        self._check_status()
+        for command in commands:
+            self._prepare_set(command)
+
+        self._manager.send_many(self, commands, bundle)
+
+    @contextmanager
+    def batch(self, bundle: bool = False) -> Iterator[List[OSCSetCommand]]:
+        """Collect 'set' commands and send them together on exit.
+
+        Example:
+
+            >>> with driver.batch() as batch:
+            ...     for motor_id in range(1, 5):
+            ...         batch.append(SetMicrostepMode(motor_id, 7))
+
+        Nothing is sent if the block raises an exception. See
+        :py:meth:`send_many` for `bundle`.
+        """
 
-        DEFAULT_SERVER.send(self, command)
+        commands = list()
+        yield commands
+        self.send_many(commands, bundle)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure compiled command encoders match python-osc's builder."""
+
+
+from dataclasses import dataclass, field
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.udp_client import UDPClient
+
+from stepseries import commands
+
+
+def build(address: str, *args) -> bytes:
+    builder = OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(int(arg) if isinstance(arg, bool) else arg)
+    return builder.build().dgram
+
+
+def test_encode_matches_builder() -> None:
+    assert commands.GetVersion().encode() == build("/getVersion")
+    assert commands.GetPosition(2).encode() == build("/getPosition", 2)
+    assert commands.Run(1, 620).encode() == build("/run", 1, 620)
+    assert commands.Run(1, 620.5).encode() == build("/run", 1, 620.5)
+    assert commands.GoUntil(1, True, -1.5).encode() == build("/goUntil", 1, 1, -1.5)
+    assert commands.SetTargetPositionList(1, 2, 3, 4).encode() == build(
+        "/setTargetPositionList", 1, 2, 3, 4, None, None, None, None
+    )
+
+    # Values that need python-osc's builder
+    assert commands.SetPosition(1, 2**40).encode() == build(
+        "/setPosition", 1, 2**40
+    )
+    assert commands.SetTargetPositionList(1, None, 2**40, 4).encode() == build(
+        "/setTargetPositionList", 1, None, 2**40, 4, None, None, None, None
+    )
+
+
+def test_encode_custom_command() -> None:
+    @dataclass
+    class SetDummy(commands.OSCSetCommand):
+        address: str = field(default="/setDummy", init=False)
+        name: str
+        value: float
+
+    command = SetDummy("abc", 1.5)
+    assert command.encode() == build("/setDummy", "abc", 1.5)
+    assert command.stringify() == "/setDummy abc 1.5"
+
+    command.address = "/setOther"
+    assert command.encode() == build("/setOther", "abc", 1.5)
+
+
+def test_dgram() -> None:
+    command = commands.SetTargetPosition(3, -900875)
+    assert command.dgram == command.build().dgram
+
+    # Can be sent by python-osc's clients directly
+    UDPClient("127.0.0.1", 9).send(command)
+
+
+def test_encode_cache() -> None:
+    commands.set_encode_cache_size(8)
+    try:
+        commands.GetBusy(255).encode()
+        commands.GetBusy(255).encode()
+        info = commands.encode_cache_info()
+        assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+        # Values of different types are encoded differently
+        assert commands.Run(1, 620).encode() != commands.Run(1, 620.0).encode()
+        assert commands.encode_cache_info().misses == 3
+
+        # Commands with callbacks bypass the cache
+        commands.EnableBusyReport(1, True, callback=print).encode()
+        assert commands.encode_cache_info().currsize == 3
+
+        for motor_id in range(16):
+            commands.GetPosition(motor_id).encode()
+        assert commands.encode_cache_info().currsize == 8
+    finally:
+        commands.set_encode_cache_size(commands.ENCODE_CACHE_SIZE)
@@ -1,13 +1,20 @@
 """conftest.py for stepseries."""
 
 
+import socket
+import time
 from queue import Empty, Queue
-from typing import Dict, Tuple
+from threading import Thread
+from typing import Callable, Dict, List, Tuple
 
 import pytest
+from pythonosc.osc_message import OscMessage
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_packet import OscPacket
 
-from stepseries.commands import OSCCommand, OSCGetCommand
+from stepseries.commands import OSCCommand, OSCGetCommand, SetDestIP
 from stepseries.responses import OSCResponse
+from stepseries.step400 import STEP400
 from stepseries.stepXXX import STEPXXX
 
 # store history of failures per test class name and per index in parametrize (if parametrize used)
@@ -88,3 +95,84 @@ def wait_for() -> None:
             device.remove(callback)
 
     return wrapper
+
+
+class FakeDevice:
+    """A stand-in for a STEP-series board listening on localhost.
+
+    Every datagram received is recorded, and '/setDestIp' is answered so
+    that devices pointed at it open like real hardware. Other messages
+    can be answered by adding a callable to `handlers`, keyed by address.
+    """
+
+    def __init__(self) -> None:
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.address, self.port = self.socket.getsockname()
+        self.server_port = free_port()
+        self.datagrams: List[bytes] = list()
+        self.handlers: Dict[str, Callable[[OscMessage], None]] = {
+            "/setDestIp": lambda _: self.reply("/destIp", 127, 0, 0, 1, 0)
+        }
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def messages(self) -> List[OscMessage]:
+        return [m.message for d in list(self.datagrams) for m in OscPacket(d).messages]
+
+    def reply(self, address: str, *args) -> None:
+        builder = OscMessageBuilder(address)
+        for arg in args:
+            builder.add_arg(arg)
+        self.socket.sendto(builder.build().dgram, ("127.0.0.1", self.server_port))
+
+    def wait_for_messages(self, n: int, timeout: float = 2) -> List[OscMessage]:
+        deadline = time.monotonic() + timeout
+        while len(self.messages) < n and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.messages
+
+    def close(self) -> None:
+        self.socket.close()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                dgram, _ = self.socket.recvfrom(65535)
+            except OSError:
+                return
+            self.datagrams.append(dgram)
+            for message in OscPacket(dgram).messages:
+                handler = self.handlers.get(message.message.address)
+                if handler is not None:
+                    handler(message.message)
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def unused_port() -> int:
+    return free_port()
+
+
+@pytest.fixture
+def fake_device() -> FakeDevice:
+    device = FakeDevice()
+    yield device
+    device.close()
+
+
+@pytest.fixture
+def local_device(fake_device: FakeDevice) -> STEP400:
+    device = STEP400(
+        0, fake_device.address, fake_device.port, "0.0.0.0", fake_device.server_port
+    )
+    device.set(SetDestIP())
+    fake_device.datagrams.clear()
+    yield device
+    device.close()
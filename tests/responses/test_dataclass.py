@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure the response dataclass decorator produces compact objects."""
+
+
+import pickle
+import re
+import weakref
+from dataclasses import field, fields
+
+import pytest
+
+from stepseries import responses
+
+
+def test_slotted_response() -> None:
+    osc_message = responses.Position.from_osc(1, -900875)
+
+    assert not hasattr(osc_message, "__dict__")
+    assert osc_message.address == responses.Position.address == "/position"
+    assert [f.name for f in fields(osc_message)] == ["motorID", "ABS_POS"]
+    assert (
+        repr(osc_message) == "Position(address='/position', motorID=1, ABS_POS=-900875)"
+    )
+    assert pickle.loads(pickle.dumps(osc_message)) == osc_message
+    assert weakref.ref(osc_message)() is osc_message
+
+    with pytest.raises(AttributeError):
+        osc_message.unknown = 0
+
+    # Regex patterns are shared by the class as well
+    assert isinstance(responses.Version.compile_date_re, re.Pattern)
+    assert "compile_date_re" not in [f.name for f in fields(responses.Version)]
+
+
+def test_unslotted_response() -> None:
+    @responses.dataclass(slots=False)
+    class Unslotted(responses.OSCResponse):
+        address: str = field(default="/unslotted", init=False)
+        motorID: int
+
+    try:
+        osc_message = Unslotted("/unslotted 2")
+        assert osc_message.motorID == 2
+        assert osc_message.__dict__ == {"address": "/unslotted", "motorID": 2}
+        assert Unslotted.from_osc(2) == osc_message
+    finally:
+        responses._registry.pop("/unslotted", None)
+        responses._parsers.pop("/unslotted", None)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure typed OSC arguments build the same responses as raw strings."""
+
+
+from dataclasses import fields
+
+import pytest
+
+from stepseries import exceptions, responses
+
+SAMPLE_VALUES = {int: 3, float: 620.5, str: "Default"}
+RESPONSE_CLASSES = [
+    cls
+    for cls in vars(responses).values()
+    if isinstance(cls, type)
+    and issubclass(cls, responses.OSCResponse)
+    and cls is not responses.OSCResponse
+]
+
+
+def sample_args(cls) -> tuple:
+    return tuple(
+        SAMPLE_VALUES[f.type]
+        for f in fields(cls)
+        if f.init and f.name != "address" and f.type in SAMPLE_VALUES
+    )
+
+
+@pytest.mark.parametrize(
+    "cls",
+    [cls for cls in RESPONSE_CLASSES if cls is not responses.Version],
+)
+def test_from_osc(cls) -> None:
+    osc_args = sample_args(cls)
+    message = cls.address + " " + " ".join([str(x) for x in osc_args])
+
+    osc_message = responses.parse(cls.address, *osc_args)
+    assert type(osc_message) is cls
+    assert osc_message == cls(message)
+
+
+def test_from_osc_version() -> None:
+    osc_message = responses.parse(
+        "/version", "STEP400", "1.0.2", "Nov  1 2021 13:55:40"
+    )
+
+    gospel = responses.Version("/version", "STEP400", "1.0.2", "Nov  1 2021 13:55:40")
+    assert osc_message == gospel
+
+
+def test_from_osc_position_list() -> None:
+    osc_message = responses.PositionList.from_osc(8096, 1921, 4445, 8798)
+
+    gospel = responses.PositionList("/positionList 8096 1921 4445 8798")
+    assert osc_message == gospel
+    assert osc_message.position5 is None
+
+
+def test_parse_errors() -> None:
+    with pytest.raises(exceptions.ParseError) as exc_info:
+        responses.parse("/notAnAddress", 1, 2)
+    assert exc_info.value.response == "/notAnAddress 1 2"
+
+    with pytest.raises(exceptions.ParseError) as exc_info:
+        responses.parse("/position", 1, 2, 3)
+    assert exc_info.value.response == "/position 1 2 3"
+    assert isinstance(exc_info.value.original_exc, TypeError)
+
+
+def test_string_constructor_variants() -> None:
+    gospel = responses.Busy("/busy 4 1")
+    assert gospel.motorID == 4 and gospel.state == 1
+
+    assert responses.Busy("/busy", 4, 1) == gospel
+    assert responses.Busy(4, "1") == gospel
+    assert responses.Busy(motorID="4", state=1) == gospel
+    assert responses.Busy("/busy 4", state="1") == gospel
+
+    error = responses.ErrorCommand("/error/command MotorIdNotMatch 9")
+    assert error.errorText == "MotorIdNotMatch"
+    assert error.motorID == 9
+
+    with pytest.raises(IndexError):
+        responses.Busy("/busy 4 1 0")
+    with pytest.raises(TypeError):
+        responses.Busy("/busy 4")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure OSC addresses resolve to the correct response objects."""
+
+
+from dataclasses import dataclass as std_dataclass
+from dataclasses import field
+
+import pytest
+
+from stepseries import responses
+
+RESPONSE_CLASSES = [
+    cls
+    for cls in vars(responses).values()
+    if isinstance(cls, type)
+    and issubclass(cls, responses.OSCResponse)
+    and cls is not responses.OSCResponse
+]
+
+
+def test_lookup_builtin() -> None:
+    for cls in RESPONSE_CLASSES:
+        assert responses.lookup(cls.address) is cls
+
+    assert responses.lookup("/notAnAddress") is None
+
+
+def test_register_subclass() -> None:
+    try:
+
+        @responses.dataclass
+        class DecoratedPosition(responses.Position):
+            pass
+
+        assert responses.lookup("/position") is DecoratedPosition
+
+        @std_dataclass
+        class NestedReport(DecoratedPosition):
+            address: str = field(default="/nestedReport", init=False)
+
+        # Discovered on the first lookup
+        assert responses.lookup("/nestedReport") is NestedReport
+    finally:
+        responses.register(responses.Position)
+        responses._registry.pop("/nestedReport", None)
+        responses._parsers.pop("/nestedReport", None)
+
+    assert responses.lookup("/position") is responses.Position
+
+
+def test_register_errors() -> None:
+    with pytest.raises(TypeError):
+        responses.register(responses.OSCResponse)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure devices can be driven from an asyncio event loop."""
+
+
+import asyncio
+
+import pytest
+
+from stepseries import commands, exceptions, responses
+from stepseries.aio import AsyncManager, AsyncSTEP400, AsyncSTEP800
+
+
+@pytest.fixture
+def run():
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def manager():
+    manager = AsyncManager()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def async_device(fake_device, manager):
+    fake_device.handlers["/getKval"] = lambda m: fake_device.reply(
+        "/kval", m.params[0], 60, 119, 119, 119
+    )
+    return AsyncSTEP400(
+        0,
+        fake_device.address,
+        fake_device.port,
+        server_port=fake_device.server_port,
+        manager=manager,
+    )
+
+
+def test_get(run, async_device) -> None:
+    async def main():
+        async with async_device:
+            assert async_device.is_closed
+            await async_device.set(commands.SetDestIP())
+            assert not async_device.is_closed
+
+            kval = await async_device.get(commands.GetKval(2))
+            kvals = await async_device.get_many(
+                [commands.GetKval(i) for i in range(1, 5)]
+            )
+            return kval, kvals
+
+    kval, kvals = run(main())
+    assert kval == responses.Kval(2, 60, 119, 119, 119)
+    assert [k.motorID for k in kvals] == [1, 2, 3, 4]
+    assert async_device.is_closed
+
+
+def test_get_concurrently(run, async_device) -> None:
+    async def main():
+        async with async_device:
+            await async_device.set(commands.SetDestIP())
+            return await asyncio.gather(
+                *[async_device.get(commands.GetKval(i)) for i in range(1, 5)]
+            )
+
+    assert [k.motorID for k in run(main())] == [1, 2, 3, 4]
+
+
+def test_get_errors(run, async_device, fake_device, manager) -> None:
+    async def main():
+        async with async_device:
+            with pytest.raises(exceptions.ClientClosedError):
+                await async_device.get(commands.GetKval(1))
+            await async_device.set(commands.SetDestIP())
+
+            with pytest.raises(TimeoutError):
+                await async_device.get(commands.GetSpeed(1), timeout=0.1)
+            with pytest.raises(TypeError):
+                await async_device.get(commands.SetKval(1, 60, 119, 119, 119))
+
+            # Cancelling the caller drops the request
+            task = asyncio.ensure_future(async_device.get(commands.GetSpeed(1)))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert not async_device._pending_gets
+
+        step800 = AsyncSTEP800(
+            0, fake_device.address, fake_device.port, manager=manager
+        )
+        with pytest.raises(exceptions.InvalidCommandError):
+            await step800.get(commands.GetTval(1))
+
+    run(main())
+
+
+def test_set_and_reports(run, async_device, fake_device) -> None:
+    def busy(message) -> None:
+        for i in range(5):
+            fake_device.reply("/busy", message.params[0], i % 2)
+
+    fake_device.handlers["/setMicrostepMode"] = busy
+
+    async def main():
+        async with async_device:
+            await async_device.set(commands.SetDestIP())
+
+            received = list()
+            async with async_device.reports(responses.Busy) as reports:
+                await async_device.send_many(
+                    [commands.SetMicrostepMode(3, 7)], bundle=True
+                )
+                async for report in reports:
+                    received.append(report)
+                    if len(received) == 5:
+                        break
+
+            assert not async_device._registered_callbacks[responses.Busy]
+            return received
+
+    received = run(asyncio.wait_for(main(), timeout=2))
+    assert [r.motorID for r in received] == [3] * 5
+    assert [r.state for r in received] == [0, 1, 0, 1, 0]
+
+
+def test_close_reports(run, async_device) -> None:
+    async def main():
+        async with async_device:
+            reports = async_device.reports(responses.Busy, maxsize=1)
+            async_device._handle_incoming_message("/busy", 1, 0)
+            async_device._handle_incoming_message("/busy", 1, 1)
+
+            async def read():
+                return [report async for report in reports]
+
+            task = asyncio.ensure_future(read())
+            await asyncio.sleep(0.05)
+            reports.close()
+            return await task
+
+    # The reader stops once closed, after the reports already received
+    assert run(asyncio.wait_for(main(), timeout=1)) == [responses.Busy(1, 1)]
+
+
+def test_watch(run, async_device, fake_device) -> None:
+    def busy(message) -> None:
+        for i in range(50):
+            fake_device.reply("/busy", message.params[0], i % 2)
+
+    fake_device.handlers["/setMicrostepMode"] = busy
+
+    async def main():
+        async with async_device:
+            await async_device.set(commands.SetDestIP())
+
+            received = list()
+            with async_device.watch(responses.Busy, received.append, 0.1):
+                await async_device.set(commands.SetMicrostepMode(3, 7))
+                await asyncio.sleep(0.3)
+            return received
+
+    received = run(asyncio.wait_for(main(), timeout=2))
+    # The first report, then the newest of the rest
+    assert 2 <= len(received) <= 3
+    assert received[-1] == responses.Busy(3, 1)
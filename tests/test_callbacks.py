@@ -0,0 +1,439 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure messages reach the callbacks registered for them."""
+
+
+import time
+from threading import Event, Thread
+
+import pytest
+
+from stepseries import commands, responses
+from stepseries.executor import BLOCK, DROP_OLDEST, LATEST, NEVER_DROP, CallbackExecutor
+from stepseries.step400 import STEP400
+
+
+def test_dispatch(local_device) -> None:
+    received = list()
+    local_device.on(responses.Busy, lambda m: received.append(("busy", m)))
+    local_device.on(None, lambda m: received.append(("all", m)))
+    local_device.on(responses.HiZ, lambda m: received.append(("hiz", m)))
+
+    local_device._handle_incoming_message("/busy", 1, 1)
+    local_device._handle_incoming_message("/HiZ", 2, 0)
+    local_device._handle_incoming_message("/dir", 3, 1)
+
+    assert [name for name, _ in received] == ["busy", "all", "all", "hiz", "all"]
+    assert received[0][1] == responses.Busy("/busy", 1, 1)
+
+
+def test_register_once(local_device) -> None:
+    received = list()
+    local_device.on(responses.Busy, received.append)
+    local_device.on(responses.Busy, received.append)
+
+    local_device._handle_incoming_message("/busy", 1, 1)
+    assert len(received) == 1
+
+
+def test_remove(local_device) -> None:
+    received = list()
+    local_device.on(responses.Busy, received.append)
+    local_device.on(None, received.append)
+    local_device._handle_incoming_message("/busy", 1, 1)
+
+    local_device.remove(received.append)
+    local_device._handle_incoming_message("/busy", 1, 0)
+    assert len(received) == 2
+
+
+def test_change_during_delivery(local_device) -> None:
+    # Callbacks added or removed while a message is delivered only see
+    # the following messages
+    received = list()
+
+    def first(message) -> None:
+        received.append("first")
+        local_device.remove(first)
+        local_device.on(responses.Busy, second)
+
+    def second(message) -> None:
+        received.append("second")
+
+    local_device.on(responses.Busy, first)
+    local_device._handle_incoming_message("/busy", 1, 1)
+    local_device._handle_incoming_message("/busy", 1, 0)
+    assert received == ["first", "second"]
+
+
+def test_concurrent_registration(local_device) -> None:
+    callbacks = [lambda m, i=i: None for i in range(200)]
+
+    def register(fns) -> None:
+        for fn in fns:
+            local_device.on(responses.Busy, fn)
+
+    threads = [Thread(target=register, args=(callbacks[i::4],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(200):
+        local_device._handle_incoming_message("/busy", 1, 1)
+    for thread in threads:
+        thread.join()
+
+    subscriptions = local_device._registered_callbacks[responses.Busy]
+    assert {fn for fn, _ in subscriptions} == set(callbacks)
+
+
+def test_motor_filter(local_device) -> None:
+    received = list()
+    local_device.on(responses.Position, lambda m: received.append(("one", m)), 1)
+    local_device.on(
+        responses.Position, lambda m: received.append(("some", m)), motorID={2, 3}
+    )
+    local_device.on(None, lambda m: received.append(("all", m)), motorID=3)
+
+    for motor_id in range(1, 5):
+        local_device._handle_incoming_message("/position", motor_id, 0)
+    local_device._handle_incoming_message("/positionList", 0, 0, 0, 0)
+
+    names = [(name, m.motorID) for name, m in received]
+    assert names == [("one", 1), ("some", 2), ("some", 3), ("all", 3)]
+
+
+def test_motor_filter_widen(local_device) -> None:
+    received = list()
+    local_device.on(responses.Busy, received.append, motorID=1)
+    local_device.on(responses.Busy, received.append, motorID=[2])
+    for motor_id in range(1, 5):
+        local_device._handle_incoming_message("/busy", motor_id, 1)
+    assert [m.motorID for m in received] == [1, 2]
+
+    local_device.on(responses.Busy, received.append)
+    local_device._handle_incoming_message("/busy", 4, 1)
+    assert [m.motorID for m in received] == [1, 2, 4]
+
+    local_device.remove(received.append)
+    local_device._handle_incoming_message("/busy", 1, 1)
+    assert len(received) == 3
+
+
+@pytest.mark.parametrize(
+    "motor_id, error",
+    [("1", TypeError), ([1.0], TypeError), (5, ValueError), ([], ValueError)],
+)
+def test_motor_filter_errors(local_device, motor_id, error) -> None:
+    with pytest.raises(error):
+        local_device.on(responses.Busy, print, motorID=motor_id)
+
+
+@pytest.fixture
+def executor():
+    executor = CallbackExecutor(workers=4)
+    yield executor
+    executor.shutdown()
+
+
+def wait_until(condition, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_executor_order(local_device, executor) -> None:
+    local_device._executor = executor
+    local_device.set_delivery_policy(responses.Position, NEVER_DROP)
+    received = {1: list(), 2: list()}
+    local_device.on(
+        responses.Position,
+        lambda m: (time.sleep(0.0005), received[m.motorID].append(m.ABS_POS)),
+    )
+
+    for i in range(200):
+        local_device._handle_incoming_message("/position", 1 + i % 2, i)
+    wait_until(lambda: executor.stats().delivered == 200)
+
+    assert received[1] == list(range(0, 200, 2))
+    assert received[2] == list(range(1, 200, 2))
+    stats = executor.stats()
+    assert (stats.queued, stats.strands, stats.errors) == (0, 0, 0)
+    assert stats.max_run >= stats.mean_run > 0
+
+
+def test_executor_decouples(local_device, executor) -> None:
+    # A slow callback does not hold up the receiving thread, nor the
+    # callbacks of other motors
+    local_device._executor = executor
+    release = Event()
+    received = list()
+
+    def callback(message) -> None:
+        if message.motorID == 1:
+            release.wait(2)
+        received.append(message.motorID)
+
+    local_device.on(responses.Busy, callback)
+    start = time.monotonic()
+    local_device._handle_incoming_message("/busy", 1, 1)
+    local_device._handle_incoming_message("/busy", 2, 1)
+    assert time.monotonic() - start < 0.5
+
+    wait_until(lambda: received == [2])
+    assert executor.stats().queued == 0
+    release.set()
+    wait_until(lambda: received == [2, 1])
+
+
+def test_executor_errors(local_device, executor, capsys) -> None:
+    local_device._executor = executor
+    received = list()
+    local_device.on(responses.Busy, lambda m: 1 / 0)
+    local_device.on(responses.Busy, received.append)
+
+    local_device._handle_incoming_message("/busy", 1, 1)
+    wait_until(lambda: executor.stats().delivered == 1)
+    assert received and executor.stats().errors == 1
+    assert "ZeroDivisionError" in capsys.readouterr().err
+
+
+def test_executor_argument(fake_device, executor) -> None:
+    device = STEP400(
+        0,
+        fake_device.address,
+        fake_device.port,
+        server_port=fake_device.server_port,
+        executor=executor,
+    )
+    try:
+        received = list()
+        device.on(None, received.append)
+        device.get(commands.SetDestIP())
+        wait_until(lambda: executor.stats().delivered == 1)
+        assert isinstance(received[0], responses.DestIP)
+    finally:
+        device.close()
+
+
+def blocked_device(device, executor, message_type):
+    # Hold up the first message of motor 1 until released
+    device._executor = executor
+    release = Event()
+    received = list()
+
+    def callback(message) -> None:
+        if not received:
+            release.wait(2)
+        received.append(message)
+
+    device.on(message_type, callback)
+    return release, received
+
+
+def test_policy_latest(local_device, executor) -> None:
+    release, received = blocked_device(local_device, executor, responses.Position)
+    for i in range(100):
+        local_device._handle_incoming_message("/position", 1, i)
+    local_device._handle_incoming_message("/position", 2, 0)
+    release.set()
+    wait_until(lambda: executor.stats().delivered == 3)
+
+    # The first position of motor 1, its latest, and the one of motor 2
+    positions = sorted((m.motorID, m.ABS_POS) for m in received)
+    assert positions == [(1, 0), (1, 99), (2, 0)]
+    assert local_device.dropped == {responses.Position: 98}
+    assert executor.stats().dropped == 98
+
+
+def test_policy_drop_oldest(local_device, executor) -> None:
+    local_device.set_delivery_policy(None, DROP_OLDEST, maxsize=10)
+    release, received = blocked_device(local_device, executor, responses.Busy)
+    for i in range(100):
+        local_device._handle_incoming_message("/busy", 1, i % 2)
+    release.set()
+    wait_until(lambda: executor.stats().delivered == 11)
+
+    assert len(received) == 11
+    assert local_device.dropped == {responses.Busy: 89}
+
+
+def test_policy_never_drop(local_device, executor) -> None:
+    # Errors are kept even if every other message may be dropped
+    local_device.set_delivery_policy(None, LATEST)
+    release, received = blocked_device(local_device, executor, None)
+    for i in range(50):
+        local_device._handle_incoming_message("/error/command", "Busy", 1)
+    release.set()
+    wait_until(lambda: executor.stats().delivered == 50)
+    assert local_device.dropped == {}
+
+
+def test_policy_block(local_device, executor) -> None:
+    local_device.set_delivery_policy(responses.Busy, BLOCK, maxsize=2)
+    release, received = blocked_device(local_device, executor, responses.Busy)
+
+    def receive() -> None:
+        for i in range(10):
+            local_device._handle_incoming_message("/busy", 1, i % 2)
+
+    thread = Thread(target=receive)
+    thread.start()
+    time.sleep(0.2)
+    # The receiving thread waits for room, instead of dropping messages
+    assert thread.is_alive()
+    assert executor.stats().queued == 2
+
+    release.set()
+    thread.join(2)
+    wait_until(lambda: executor.stats().delivered == 10)
+    assert [m.state for m in received] == [i % 2 for i in range(10)]
+    assert local_device.dropped == {}
+
+
+@pytest.mark.parametrize("policy, maxsize", [("newest", 1), (BLOCK, 0)])
+def test_policy_errors(local_device, policy, maxsize) -> None:
+    with pytest.raises(ValueError):
+        local_device.set_delivery_policy(responses.Busy, policy, maxsize)
+
+
+def test_watch(local_device) -> None:
+    received = list()
+    watcher = local_device.watch(responses.Position, received.append, 0.1)
+
+    start = time.monotonic()
+    while time.monotonic() - start < 0.35:
+        for motor_id in (1, 2):
+            local_device._handle_incoming_message("/position", motor_id, 7)
+        time.sleep(0.001)
+    for motor_id in (1, 2):
+        local_device._handle_incoming_message("/position", motor_id, 8)
+    wait_until(lambda: len([m for m in received if m.ABS_POS == 8]) == 2)
+
+    # At most once per interval per motor, ending with the newest value
+    for motor_id in (1, 2):
+        positions = [m.ABS_POS for m in received if m.motorID == motor_id]
+        assert 2 <= len(positions) <= 6
+        assert positions[-1] == 8
+    assert watcher.coalesced > 100
+
+    watcher.close()
+    local_device._handle_incoming_message("/position", 1, 9)
+    time.sleep(0.15)
+    assert all(m.ABS_POS != 9 for m in received)
+
+
+def test_watch_motor(local_device, executor) -> None:
+    local_device._executor = executor
+    received = list()
+    with local_device.watch(None, received.append, 0.05, motorID=2):
+        local_device._handle_incoming_message("/busy", 1, 1)
+        local_device._handle_incoming_message("/busy", 2, 1)
+        local_device._handle_incoming_message("/HiZ", 2, 1)
+        wait_until(lambda: len(received) == 2)
+
+    assert {(type(m), m.motorID) for m in received} == {
+        (responses.Busy, 2),
+        (responses.HiZ, 2),
+    }
+
+
+def test_watch_get(local_device) -> None:
+    # A watch callback waiting for a response must not stop it timing out
+    errors = list()
+
+    def fn(message) -> None:
+        try:
+            local_device.get(commands.GetSpeed(1))
+        except Exception as e:
+            errors.append(e)
+
+    with local_device.watch(responses.Position, fn, 0.1):
+        start = time.monotonic()
+        local_device._handle_incoming_message("/position", 1, 7)
+        wait_until(lambda: errors, timeout=4)
+
+    assert isinstance(errors[0], TimeoutError)
+    assert time.monotonic() - start < 3
+
+
+def test_watch_errors(local_device) -> None:
+    with pytest.raises(ValueError):
+        local_device.watch(responses.Busy, print, 0)
+    with pytest.raises(TypeError):
+        local_device.watch(responses.Busy, None, 1)
+
+
+def test_stream(local_device) -> None:
+    with local_device.stream(responses.Position, timeout=0.2, motorID=1) as stream:
+        for i in range(5):
+            local_device._handle_incoming_message("/position", 1, i)
+            local_device._handle_incoming_message("/position", 2, i)
+        positions = [m.ABS_POS for m in stream]
+
+    # The stream ends once nothing is received in time
+    assert positions == list(range(5))
+    assert not local_device._registered_callbacks[responses.Position]
+
+
+def test_stream_live(local_device) -> None:
+    def report() -> None:
+        for i in range(20):
+            local_device._handle_incoming_message("/busy", 1, i % 2)
+            time.sleep(0.002)
+
+    received = list()
+    with local_device.stream(responses.Busy) as stream:
+        Thread(target=report).start()
+        for message in stream:
+            received.append(message.state)
+            if len(received) == 20:
+                stream.close()
+    assert received == [i % 2 for i in range(20)]
+
+
+def test_stream_bounded(local_device) -> None:
+    with local_device.stream(responses.Position, timeout=0, maxsize=10) as stream:
+        for i in range(100):
+            local_device._handle_incoming_message("/position", 1, i)
+        assert [m.ABS_POS for m in stream] == list(range(90, 100))
+        assert stream.dropped == 90
+
+
+def test_stream_batches(local_device) -> None:
+    stream = local_device.stream_batches(responses.Position, 8, 0.05, timeout=0.2)
+    with stream:
+        for i in range(20):
+            local_device._handle_incoming_message("/position", 1, i)
+        batches = [[m.ABS_POS for m in batch] for batch in stream]
+
+    assert batches == [list(range(8)), list(range(8, 16)), list(range(16, 20))]
+
+
+@pytest.mark.parametrize("timeout", [None, 1.0])
+def test_stream_partial_batch(local_device, timeout) -> None:
+    sent = list()
+
+    def report() -> None:
+        time.sleep(0.05)
+        sent.append(time.monotonic())
+        for i in range(3):
+            local_device._handle_incoming_message("/position", 1, i)
+
+    with local_device.stream_batches(responses.Position, 5, 0.1, timeout) as stream:
+        Thread(target=report).start()
+        batch = next(stream)
+        received = time.monotonic()
+
+    # Returned `max_wait` after its first message, whatever the timeout
+    assert [m.ABS_POS for m in batch] == [0, 1, 2]
+    assert 0.09 <= received - sent[0] < 0.5
+
+
+def test_stream_errors(local_device) -> None:
+    with pytest.raises(ValueError):
+        local_device.stream(responses.Busy, maxsize=0)
+    with pytest.raises(ValueError):
+        local_device.stream_batches(responses.Busy, 0, 1)
+    with pytest.raises(ValueError):
+        local_device.stream_batches(responses.Busy, 10, 1, maxsize=5)
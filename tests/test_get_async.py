@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure 'get' requests can be made without blocking the caller."""
+
+
+import time
+from concurrent.futures import Future, wait
+from threading import Timer
+
+import pytest
+
+from stepseries import commands, exceptions, responses
+from stepseries.step800 import STEP800
+
+
+@pytest.fixture
+def replying_device(local_device, fake_device):
+    def kval(message):
+        Timer(
+            0.1, fake_device.reply, ("/kval", message.params[0], 60, 119, 119, 119)
+        ).start()
+
+    fake_device.handlers["/getKval"] = kval
+    return local_device
+
+
+def test_get_async(replying_device) -> None:
+    futures = [replying_device.get_async(commands.GetKval(i)) for i in range(1, 5)]
+    assert all(isinstance(f, Future) and not f.done() for f in futures)
+
+    done, not_done = wait(futures, timeout=2)
+    assert not not_done
+    assert [f.result().motorID for f in futures] == [1, 2, 3, 4]
+    assert not replying_device._pending_gets
+
+
+def test_get_async_timeout(replying_device) -> None:
+    start = time.monotonic()
+    future = replying_device.get_async(commands.GetSpeed(1), timeout=0.2)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=2)
+    assert time.monotonic() - start < 1
+    assert not replying_device._pending_gets
+
+    # The blocking call raises the same error
+    with pytest.raises(TimeoutError):
+        replying_device.get(commands.GetSpeed(1))
+
+
+def test_get_async_cancel(replying_device) -> None:
+    received = list()
+    replying_device.on(responses.Kval, received.append)
+
+    future = replying_device.get_async(commands.GetKval(1), with_callback=False)
+    assert future.cancel()
+    assert not replying_device._pending_gets
+
+    # The response is handled like any other message
+    time.sleep(0.3)
+    assert [r.motorID for r in received] == [1]
+
+
+def test_get_async_errors(replying_device, fake_device, unused_port) -> None:
+    with pytest.raises(TypeError):
+        replying_device.get_async(commands.SetKval(1, 60, 119, 119, 119))
+
+    device = STEP800(0, fake_device.address, fake_device.port, server_port=unused_port)
+    try:
+        with pytest.raises(exceptions.InvalidCommandError):
+            device.get_async(commands.GetTval(1))
+        with pytest.raises(exceptions.ClientClosedError):
+            device.get_async(commands.GetKval(1))
+    finally:
+        device.close()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure concurrent 'get' requests are matched to their responses."""
+
+
+import time
+from threading import Thread, Timer, active_count
+
+import pytest
+
+from stepseries import commands, exceptions, responses
+
+DELAY = 0.2
+
+
+@pytest.fixture
+def replying_device(local_device, fake_device):
+    def delayed(address, *args):
+        Timer(DELAY, fake_device.reply, (address, *args)).start()
+
+    def microstep_mode(message):
+        motor_id = message.params[0]
+        for i in range(1, 5) if motor_id == 255 else [motor_id]:
+            delayed("/microstepMode", i, i + 3)
+
+    fake_device.handlers["/getMicrostepMode"] = microstep_mode
+    fake_device.handlers["/getKval"] = lambda m: delayed(
+        "/kval", m.params[0], 60, 119, 119, 119
+    )
+    fake_device.handlers["/getVersion"] = lambda _: delayed(
+        "/version", "STEP400", "1.0.2", "Nov  1 2021 13:55:40"
+    )
+    return local_device
+
+
+def test_get_many(replying_device) -> None:
+    queries = [commands.GetMicrostepMode(i) for i in range(1, 5)] + [
+        commands.GetKval(i) for i in range(1, 5)
+    ]
+
+    start = time.monotonic()
+    resps = replying_device.get_many(queries)
+    elapsed = time.monotonic() - start
+
+    # All requests were in flight together
+    assert elapsed < len(queries) * DELAY / 2
+    assert [r.motorID for r in resps] == [1, 2, 3, 4] * 2
+    assert [type(r) for r in resps] == [responses.MicrostepMode] * 4 + [
+        responses.Kval
+    ] * 4
+    assert [r.STEP_SEL for r in resps[:4]] == [4, 5, 6, 7]
+    assert not replying_device._pending_gets
+
+
+def test_get_many_mixed(replying_device) -> None:
+    version, all_modes, mode = replying_device.get_many(
+        [
+            commands.GetVersion(),
+            commands.GetMicrostepMode(255),
+            commands.GetMicrostepMode(2),
+        ]
+    )
+
+    assert version.firmware_name == "STEP400"
+    assert sorted(m.motorID for m in all_modes) == [1, 2, 3, 4]
+    assert mode.motorID == 2
+
+
+def test_get_many_callbacks(replying_device) -> None:
+    received = list()
+    replying_device.on(responses.Kval, received.append)
+
+    replying_device.get_many([commands.GetKval(1)], with_callback=False)
+    assert received == []
+
+    replying_device.get_many([commands.GetKval(1)])
+    assert [r.motorID for r in received] == [1]
+
+
+def test_get_many_errors(replying_device, fake_device) -> None:
+    fake_device.handlers["/getTval"] = lambda m: fake_device.reply(
+        "/error/command", "MotorIdNotMatch", m.params[0]
+    )
+
+    with pytest.raises(responses.ErrorCommand):
+        replying_device.get_many([commands.GetKval(1), commands.GetTval(2)])
+    assert not replying_device._pending_gets
+
+    with pytest.raises(TimeoutError):
+        replying_device.get_many([commands.GetKval(1), commands.GetSpeed(1)])
+    assert not replying_device._pending_gets
+
+    with pytest.raises(TypeError):
+        replying_device.get_many([commands.SetKval(1, 60, 119, 119, 119)])
+
+    replying_device.close()
+    with pytest.raises(exceptions.ClientClosedError):
+        replying_device.get_many([commands.GetKval(1)])
+
+
+def test_handler_does_not_block(local_device) -> None:
+    # Nobody is waiting for this request, the handler must still return
+    local_device._add_request(commands.GetKval(1), True, None)
+    handler = Thread(
+        target=local_device._handle_incoming_message,
+        args=("/kval", 1, 60, 119, 119, 119),
+    )
+    handler.start()
+    handler.join(timeout=1)
+
+    assert not handler.is_alive()
+    assert not local_device._pending_gets
+
+
+def test_get_under_load(local_device, fake_device) -> None:
+    # A device streaming 10k reports/s while gets are in flight
+    rate, duration = 10000, 1.0
+    fake_device.handlers["/getKval"] = lambda m: fake_device.reply(
+        "/kval", m.params[0], 60, 119, 119, 119
+    )
+    reports = list()
+    local_device.on(responses.Busy, reports.append)
+
+    def flood() -> None:
+        start = time.monotonic()
+        for i in range(int(rate * duration)):
+            fake_device.reply("/busy", 1, i % 2)
+            if i % 100 == 99:
+                time.sleep(max(start + (i + 1) / rate - time.monotonic(), 0))
+
+    n_threads = active_count()
+    flooder = Thread(target=flood)
+    flooder.start()
+    n_gets = n_timeouts = 0
+    while flooder.is_alive():
+        try:
+            assert local_device.get(commands.GetKval(1)).motorID == 1
+            n_gets += 1
+        except TimeoutError:
+            # The reply was dropped with the reports that overflowed
+            n_timeouts += 1
+    flooder.join()
+    time.sleep(0.5)
+
+    # How many reports overflow the receive buffer depends on the host
+    assert n_gets and n_timeouts <= max(1, n_gets // 10)
+    assert reports
+    # No receive thread is left waiting on a caller
+    assert active_count() <= n_threads
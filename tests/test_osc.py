@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure datagrams decode like python-osc, from any buffer."""
+
+
+import pytest
+from pythonosc.osc_bundle_builder import IMMEDIATELY, OscBundleBuilder
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_packet import OscPacket
+from pythonosc.osc_packet import ParseError as OscParseError
+
+from stepseries.osc import parse_datagram
+
+
+def build(address: str, *args):
+    builder = OscMessageBuilder(address)
+    for arg in args:
+        builder.add_arg(arg)
+    return builder.build()
+
+
+MESSAGES = [
+    build("/position", 1, 123456),
+    build("/position", 2, -1),
+    build("/version", "STEP400", "1.0.2", "Nov  1 2021 13:55:40"),
+    build("/speed", 3, 620.5),
+    build("/blob", b"\x01\x02\x03", True, False, "abcd"),
+    build("/empty"),
+]
+
+
+def reference(dgram: bytes) -> list:
+    return [
+        (m.message.address, tuple(m.message.params)) for m in OscPacket(dgram).messages
+    ]
+
+
+@pytest.mark.parametrize("message", MESSAGES, ids=lambda m: m.address)
+@pytest.mark.parametrize("buffer", [bytes, bytearray, memoryview])
+def test_message(message, buffer) -> None:
+    messages = parse_datagram(buffer(message.dgram))
+    assert messages == reference(message.dgram)
+    assert [type(a) for a in messages[0][1]] == [type(a) for a in message.params]
+
+
+def test_view_of_larger_buffer() -> None:
+    dgram = MESSAGES[0].dgram
+    view = memoryview(bytearray(dgram + b"/junk\0\0\0"))[: len(dgram)]
+    assert parse_datagram(view) == [("/position", (1, 123456))]
+
+
+def test_bundle() -> None:
+    inner = OscBundleBuilder(IMMEDIATELY)
+    for message in MESSAGES[:3]:
+        inner.add_content(message)
+    outer = OscBundleBuilder(IMMEDIATELY)
+    outer.add_content(inner.build())
+    outer.add_content(MESSAGES[3])
+    dgram = outer.build().dgram
+
+    assert parse_datagram(dgram) == reference(dgram)
+    assert len(parse_datagram(memoryview(dgram))) == 4
+
+
+def test_no_type_tags() -> None:
+    assert parse_datagram(b"/position\0\0\0") == [("/position", ())]
+
+
+@pytest.mark.parametrize(
+    "dgram",
+    [
+        b"",
+        b"/pos",
+        b"/position\0\0\0,ii\0\0\0\0\1",
+        b"/position\0\0\0ii\0\0",
+        b"/position\0\0\0,x\0\0",
+        b"#bundle\0" + bytes(8) + b"\0\0\0\x05abcd",
+    ],
+)
+def test_parse_errors(dgram) -> None:
+    with pytest.raises(OscParseError):
+        parse_datagram(dgram)
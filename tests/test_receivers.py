@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure each receiver delivers the messages from the devices."""
+
+
+import multiprocessing
+import socket
+import struct
+import time
+from threading import Thread, active_count
+
+import pytest
+
+from stepseries import receivers, responses, server
+from stepseries.step400 import STEP400
+
+
+@pytest.fixture(params=list(receivers.RECEIVERS))
+def manager(request):
+    manager = server.Manager(receiver=request.param)
+    yield manager
+    manager.shutdown()
+
+
+def send_positions(fake_device, n: int) -> None:
+    for i in range(n):
+        fake_device.reply("/position", 1, i)
+        if i % 50 == 49:
+            time.sleep(0.001)
+
+
+def test_receive(manager, fake_device) -> None:
+    device = STEP400(
+        0,
+        fake_device.address,
+        fake_device.port,
+        server_port=fake_device.server_port,
+        manager=manager,
+    )
+    received = list()
+    device.on(responses.Position, lambda m: received.append(m.ABS_POS))
+
+    n = 1000
+    send_positions(fake_device, n)
+    deadline = time.monotonic() + 2
+    while len(received) < n and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    if manager._receiver == "threading":
+        # Spawning a thread per message cannot keep up with the burst
+        assert received and set(received) <= set(range(n))
+    else:
+        assert received == list(range(n))
+
+
+def test_close(manager, unused_port) -> None:
+    n_threads = active_count()
+    device = STEP400(0, server_port=unused_port, manager=manager)
+    assert active_count() > n_threads
+
+    device.close()
+    assert active_count() == n_threads
+
+    # The port has been released
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("0.0.0.0", unused_port))
+
+
+def test_close_from_callback(manager, fake_device, capsys) -> None:
+    device = STEP400(
+        0,
+        fake_device.address,
+        fake_device.port,
+        server_port=fake_device.server_port,
+        manager=manager,
+    )
+    device.on(responses.Position, lambda m: device.close())
+    fake_device.reply("/position", 1, 0)
+
+    # The port is released once the callback returns
+    deadline = time.monotonic() + 2
+    while True:
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.bind(("0.0.0.0", fake_device.server_port))
+            break
+        except OSError:
+            assert time.monotonic() < deadline, "port not released"
+            time.sleep(0.01)
+
+    assert device.is_closed
+    assert "Traceback" not in capsys.readouterr().err
+
+
+def test_handler_errors(unused_port, capsys) -> None:
+    received = list()
+
+    def handler(data, client_address) -> None:
+        # The data is a view of the receive buffer, so copy it to keep it
+        received.append(bytes(data))
+        if data == b"fail":
+            raise RuntimeError("handler failed")
+
+    receiver = receivers.Receiver(("127.0.0.1", unused_port), handler)
+    receiver.start()
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(b"fail", receiver.server_address)
+            s.sendto(b"ok", receiver.server_address)
+        deadline = time.monotonic() + 2
+        while len(received) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        receiver.close()
+
+    assert received == [b"fail", b"ok"]
+    assert "handler failed" in capsys.readouterr().err
+
+
+def test_receiver_errors() -> None:
+    with pytest.raises(ValueError):
+        server.Manager(receiver="notAReceiver")
+    with pytest.raises(ValueError):
+        server.Manager(receiver="pool", workers=0)
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="requires SO_REUSEPORT")
+def test_processes_many_devices(unused_port) -> None:
+    # Leave room for the burst while the processes are busy elsewhere
+    manager = server.Manager(receiver="processes", workers=2, recv_buffer=1 << 21)
+    addresses = [f"127.0.0.{i}" for i in range(2, 6)]
+    received = {address: list() for address in addresses}
+    try:
+        for address in addresses:
+            device = STEP400(0, address, server_port=unused_port, manager=manager)
+            device.on(
+                responses.Position,
+                lambda m, r=received[address]: r.append(m.ABS_POS),
+            )
+
+        n = 200
+        senders = list()
+        for address in addresses:
+            sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sender.bind((address, 0))
+            senders.append(sender)
+        for i in range(n):
+            for sender in senders:
+                sender.sendto(
+                    b"/position\0\0\0,ii\0" + struct.pack(">ii", 1, i),
+                    ("127.0.0.1", unused_port),
+                )
+            if i % 50 == 49:
+                time.sleep(0.001)
+        for sender in senders:
+            sender.close()
+
+        deadline = time.monotonic() + 2
+        while (
+            any(len(r) < n for r in received.values()) and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+        stats = [s for s in manager.stats() if s.kind == "receive"]
+    finally:
+        manager.shutdown()
+
+    assert all(r == list(range(n)) for r in received.values())
+    # One socket per process
+    assert len(stats) == 2
+    assert sum(s.datagrams for s in stats) == n * len(addresses)
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="requires SO_REUSEPORT")
+def test_processes_bind_error(unused_port) -> None:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("0.0.0.0", unused_port))
+        with pytest.raises(OSError):
+            receivers.ProcessReceiver(("0.0.0.0", unused_port), print)
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="requires SO_REUSEPORT")
+def test_processes_batch_size(unused_port, monkeypatch) -> None:
+    # Run a receiving process' loop on a thread, to look at its batches
+    monkeypatch.setattr(receivers.signal, "signal", lambda *args: None)
+    conn, child_conn = multiprocessing.Pipe()
+    thread = Thread(
+        target=receivers._receive_process,
+        args=(("127.0.0.1", unused_port), 1 << 21, child_conn),
+    )
+    thread.start()
+    try:
+        conn.recv()
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for i in range(300):
+                sender.sendto(
+                    b"/position\0\0\0,ii\0" + struct.pack(">ii", 1, i),
+                    ("127.0.0.1", unused_port),
+                )
+
+        sizes = list()
+        while sum(sizes) < 300:
+            assert conn.poll(2), "timed out"
+            sizes.append(len(conn.recv()))
+    finally:
+        conn.close()
+        thread.join()
+
+    assert max(sizes) <= receivers._MAX_BATCH
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure many commands can be sent to a device at once."""
+
+
+import pytest
+
+from stepseries import commands, exceptions, server
+from stepseries.step400 import STEP400
+from stepseries.step800 import STEP800
+
+# One command per motor and register, as when configuring a device
+COMMANDS = [
+    command
+    for motor_id in range(1, 5)
+    for command in (
+        commands.SetMicrostepMode(motor_id, 7),
+        commands.SetLowSpeedOptimizeThreshold(motor_id, 15.5),
+        commands.SetSpeedProfile(motor_id, 2000.0, 2000.0, 620.0),
+    )
+]
+
+
+def test_pack_bundles() -> None:
+    dgrams = [c.encode() for c in COMMANDS]
+    assert server._pack_bundles(dgrams) == [
+        server._BUNDLE_HEADER + b"".join(len(d).to_bytes(4, "big") + d for d in dgrams)
+    ]
+
+    # Split to fit the datagram size
+    bundles = server._pack_bundles(dgrams * 20)
+    assert len(bundles) > 1
+    assert all(len(b) <= server.MAX_DATAGRAM_SIZE for b in bundles)
+
+    # Oversized messages are sent on their own
+    assert server._pack_bundles([b"x" * 2000]) == [b"x" * 2000]
+
+
+@pytest.mark.parametrize("bundle", [False, True])
+def test_send_many(local_device, fake_device, bundle) -> None:
+    local_device.send_many(COMMANDS, bundle=bundle)
+    received = fake_device.wait_for_messages(len(COMMANDS))
+
+    assert sorted(m.dgram for m in received) == sorted(c.encode() for c in COMMANDS)
+    assert len(fake_device.datagrams) == (1 if bundle else len(COMMANDS))
+
+
+@pytest.mark.skipif(server._sendmmsg is None, reason="sendmmsg is not available")
+def test_sendmmsg(fake_device, unused_port) -> None:
+    manager = server.Manager(sendmmsg=True)
+    device = STEP400(
+        0,
+        fake_device.address,
+        fake_device.port,
+        server_port=unused_port,
+        manager=manager,
+    )
+    try:
+        assert manager._devices[device].sockaddr is not None
+        manager.send_many(device, COMMANDS * 10)
+        received = fake_device.wait_for_messages(len(COMMANDS) * 100)
+        assert sorted(m.dgram for m in received) == sorted(
+            c.encode() for c in COMMANDS * 10
+        )
+    finally:
+        manager.shutdown()
+
+
+def test_batch(local_device, fake_device) -> None:
+    with local_device.batch(bundle=True) as batch:
+        batch.extend(COMMANDS)
+        assert not fake_device.datagrams
+
+    assert len(fake_device.wait_for_messages(len(COMMANDS))) == len(COMMANDS)
+    assert len(fake_device.datagrams) == 1
+
+    # Nothing is sent if the block fails
+    fake_device.datagrams.clear()
+    with pytest.raises(RuntimeError):
+        with local_device.batch() as batch:
+            batch.extend(COMMANDS)
+            raise RuntimeError
+    assert not fake_device.wait_for_messages(1, timeout=0.2)
+
+
+def test_send_many_errors(local_device, fake_device, unused_port) -> None:
+    with pytest.raises(TypeError):
+        local_device.send_many(COMMANDS + [commands.GetVersion()])
+
+    with pytest.raises(exceptions.InvalidCommandError):
+        device = STEP800(
+            0, fake_device.address, fake_device.port, server_port=unused_port
+        )
+        try:
+            device._is_closed = False
+            device.send_many([commands.SetTval(1, 5, 5, 5, 5)])
+        finally:
+            device.close()
+
+    # Validated before anything is sent
+    assert not fake_device.wait_for_messages(1, timeout=0.2)
@@ -4,9 +4,12 @@
 """Ensure the internal server executes its operations successfully."""
 
 
+import sys
+from threading import Event
+
 import pytest
 
-from stepseries import commands, exceptions, server, step400
+from stepseries import commands, exceptions, receivers, responses, server, step400
 
 
 @pytest.mark.order(-1)
@@ -14,10 +17,159 @@ class TestServerOperation:
 
     def test_shutdown(self) -> None:
         server.DEFAULT_SERVER.shutdown()
-        assert len(server.DEFAULT_SERVER._bound_devices) == 0
+        assert len(server.DEFAULT_SERVER._devices) == 0
 
     def test_send_errors(self) -> None:
         with pytest.raises(exceptions.ClientClosedError):
             device = step400.STEP400(0)
             server.DEFAULT_SERVER.remove_device(device)
             device.get(commands.GetVersion())
+
+
+class TestRouting:
+    def test_routing(self, unused_port) -> None:
+        manager = server.Manager()
+        first, second, other = [
+            step400.STEP400(0, address, server_port=unused_port, manager=manager)
+            for address in ("10.0.0.100", "10.0.0.100", "10.0.0.101")
+        ]
+        received = list()
+        for device in (first, second, other):
+            device.on(None, lambda m, d=device: received.append((d, m)))
+
+        routes = manager._servers[("0.0.0.0", unused_port)].routes
+        assert routes == {"10.0.0.100": [first, second], "10.0.0.101": [other]}
+
+        manager._handle_incoming_message(routes, ("10.0.0.100", 50000), "/busy", 1, 0)
+        manager._handle_incoming_message(routes, ("10.0.0.102", 50000), "/busy", 1, 0)
+        assert [d for d, _ in received] == [first, second]
+
+        # The server is only shut down with its last device
+        first.close()
+        other.close()
+        assert routes == {"10.0.0.100": [second]}
+        second.close()
+        assert not manager._servers and not manager._devices
+
+        # The port has been released
+        step400.STEP400(0, server_port=unused_port, manager=manager).close()
+
+    def test_send_errors(self) -> None:
+        manager = server.Manager()
+        with pytest.raises(exceptions.ClientNotFoundError):
+            manager.send(object(), commands.GetVersion())
+
+    def test_send_sockets(self, unused_port) -> None:
+        for n_sockets, expected in ((1, 1), (2, 2)):
+            manager = server.Manager(send_sockets=n_sockets)
+            devices = [
+                step400.STEP400(
+                    0, f"10.0.0.{i}", server_port=unused_port, manager=manager
+                )
+                for i in range(1, 5)
+            ]
+            sockets = {manager._devices[d].socket for d in devices}
+            assert len(sockets) == expected
+            manager.shutdown()
+            assert all(s.fileno() == -1 for s in sockets)
+
+        with pytest.raises(ValueError):
+            server.Manager(send_sockets=0)
+
+
+class TestStats:
+    def test_buffer_sizes(self, unused_port) -> None:
+        manager = server.Manager(recv_buffer=8192, send_buffer=8192)
+        try:
+            step400.STEP400(0, "10.0.0.1", server_port=unused_port, manager=manager)
+            receive, send = manager.stats()
+            assert receive.kind == "receive" and send.kind == "send"
+
+            # Only ever grown by the devices sharing the sockets
+            step400.STEP400(
+                0,
+                "10.0.0.2",
+                server_port=unused_port,
+                manager=manager,
+                recv_buffer=65536,
+                send_buffer=65536,
+            )
+            step400.STEP400(
+                0,
+                "10.0.0.3",
+                server_port=unused_port,
+                manager=manager,
+                recv_buffer=4096,
+                send_buffer=4096,
+            )
+            grown_receive, grown_send = manager.stats()
+            assert grown_receive.buffer_size > receive.buffer_size
+            assert grown_send.buffer_size > send.buffer_size
+        finally:
+            manager.shutdown()
+
+    def test_counters(self, fake_device) -> None:
+        manager = server.Manager()
+        try:
+            device = step400.STEP400(
+                0,
+                fake_device.address,
+                fake_device.port,
+                server_port=fake_device.server_port,
+                manager=manager,
+            )
+            sent = [commands.SetDestIP(), commands.SetMaxSpeed(1, 100)]
+            device.get(sent[0])
+            device.set(sent[1])
+            fake_device.wait_for_messages(2)
+
+            receive, send = manager.stats()
+            assert receive.address == ("0.0.0.0", fake_device.server_port)
+            # "/destIp 127 0 0 1 0"
+            assert (receive.datagrams, receive.bytes) == (1, 36)
+            assert send.datagrams == 2
+            assert send.bytes == sum(len(c.encode()) for c in sent)
+        finally:
+            manager.shutdown()
+
+    @pytest.mark.skipif(
+        not sys.platform.startswith("linux"), reason="requires /proc/net/udp"
+    )
+    def test_drops(self, fake_device) -> None:
+        manager = server.Manager(receiver="single", recv_buffer=4096)
+        try:
+            device = step400.STEP400(
+                0,
+                fake_device.address,
+                fake_device.port,
+                server_port=fake_device.server_port,
+                manager=manager,
+            )
+            # Stall the receive thread while the buffer overflows
+            release = Event()
+            device.on(responses.Busy, lambda _: release.wait(2))
+            fake_device.reply("/busy", 1, 1)
+            for i in range(1000):
+                fake_device.reply("/position", 1, i)
+
+            (receive, _) = manager.stats()
+            assert receive.drops > 0
+            assert receive.queued > 0
+            release.set()
+        finally:
+            manager.shutdown()
+
+    def test_no_kernel_stats(self, unused_port, monkeypatch) -> None:
+        # Where sockets are not file descriptors, e.g. on Windows
+        def fstat(fd):
+            raise OSError("not a file descriptor")
+
+        monkeypatch.setattr(receivers, "_PROC_NET_UDP", False)
+        monkeypatch.setattr(receivers.os, "fstat", fstat)
+        manager = server.Manager(receiver="single")
+        try:
+            step400.STEP400(0, "10.0.0.1", server_port=unused_port, manager=manager)
+            for stats in manager.stats():
+                assert (stats.drops, stats.queued) == (None, None)
+        finally:
+            manager.shutdown()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Ensure the simulator behaves like the devices it stands in for."""
+
+
+import dataclasses
+import time
+
+import pytest
+
+from stepseries import commands, responses, server
+from stepseries.exceptions import ClientClosedError
+from stepseries.simulator import FIRMWARE_VERSION, Simulator
+from stepseries.step400 import STEP400
+from stepseries.step800 import STEP800
+
+from .conftest import free_port
+
+GET_COMMANDS = [
+    cls
+    for cls in vars(commands).values()
+    if isinstance(cls, type)
+    and issubclass(cls, commands.OSCGetCommand)
+    and cls not in (commands.OSCGetCommand, commands.SetDestIP)
+]
+
+
+@pytest.fixture
+def manager():
+    manager = server.Manager()
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture(params=[STEP400, STEP800])
+def driver(request, manager):
+    cls = request.param
+    with Simulator(cls.__name__, server_port=free_port()) as simulator:
+        device = cls(
+            0,
+            simulator.address,
+            simulator.port,
+            server_port=simulator.server_port,
+            manager=manager,
+        )
+        device.get(commands.SetDestIP())
+        yield device
+
+
+def wait_until(condition, timeout: float = 3) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def build(cls, motor_id: int):
+    # Fill every argument with the motor id, or the first valid value
+    args = dict()
+    for field in dataclasses.fields(cls):
+        if field.name == "address" or not field.init:
+            continue
+        args[field.name] = motor_id if "ID" in field.name else 1
+    return cls(**args)
+
+
+def test_version(driver) -> None:
+    version = driver.get(commands.GetVersion())
+    assert version.firmware_name == type(driver).__name__
+    assert version.firmware_version == FIRMWARE_VERSION
+
+
+def test_get_commands(driver) -> None:
+    for cls in GET_COMMANDS:
+        if cls in getattr(driver, "_invalid_commands", ()):
+            continue
+        response = driver.get(build(cls, 1))
+        assert isinstance(response, cls.response_cls)
+
+
+def test_all_motors(driver) -> None:
+    profiles = driver.get(commands.GetSpeedProfile(255))
+    assert [p.motorID for p in profiles] == list(range(1, driver._n_motors + 1))
+
+
+def test_reply_address(manager) -> None:
+    # Replies come from the simulated device's own address
+    with Simulator(address="127.0.0.3", server_port=free_port()) as simulator:
+        device = STEP400(
+            0,
+            simulator.address,
+            simulator.port,
+            server_port=simulator.server_port,
+            manager=manager,
+        )
+        assert isinstance(device.get(commands.SetDestIP()), responses.DestIP)
+
+
+def test_settings(driver) -> None:
+    driver.set(commands.SetSpeedProfile(2, 5000, 6000, 700))
+    profile = driver.get(commands.GetSpeedProfile(2))
+    assert (profile.acc, profile.dec, profile.maxSpeed) == (5000, 6000, 700)
+
+    driver.set(commands.SetMaxSpeed(2, 800))
+    assert driver.get(commands.GetSpeedProfile(2)).maxSpeed == 800
+    assert driver.get(commands.GetSpeedProfile(1)).maxSpeed == 650
+
+
+def test_invalid_motor(driver) -> None:
+    with pytest.raises(responses.ErrorCommand, match="MotorIdNotMatch"):
+        driver.get(commands.GetBusy(driver._n_motors + 1))
+
+
+def test_mistyped_argument(driver) -> None:
+    # Stored as is, the value cannot be encoded in its reply
+    driver.set(commands.SetKval(1, 10.5, 20, 30, 40))
+    with pytest.raises(responses.ErrorOSC, match="messageNotMatch"):
+        driver.get(commands.GetKval(1))
+
+
+def test_move(driver) -> None:
+    busy = list()
+    driver.on(responses.Busy, lambda m: busy.append(m.state))
+    driver.set(commands.EnableBusyReport(1, True))
+    driver.set(commands.SetSpeedProfile(1, 5000, 5000, 1000))
+
+    driver.set(commands.Move(1, 128 * 200))
+    wait_until(lambda: busy == [1])
+    wait_until(lambda: driver.get(commands.GetSpeed(1)).speed > 0)
+    wait_until(lambda: busy == [1, 0])
+
+    assert driver.get(commands.GetPosition(1)).ABS_POS == 128 * 200
+    assert driver.get(commands.GetSpeed(1)).speed == 0
+
+
+def test_run_and_stop(driver) -> None:
+    driver.set(commands.SetSpeedProfile(1, 10000, 10000, 1000))
+    driver.set(commands.Run(1, -300))
+    wait_until(lambda: driver.get(commands.GetSpeed(1)).speed == 300)
+    assert driver.get(commands.GetDir(1)).direction == 0
+    assert driver.get(commands.GetPosition(1)).ABS_POS < 0
+
+    driver.set(commands.SoftHiZ(1))
+    wait_until(lambda: driver.get(commands.GetHiZ(1)).state == 1)
+    assert driver.get(commands.GetBusy(1)).state == 0
+
+
+def test_position_reports(driver) -> None:
+    positions = list()
+    driver.on(responses.PositionList, positions.append)
+    driver.set(commands.SetPositionListReportInterval(20))
+    wait_until(lambda: len(positions) >= 3)
+
+    positions = dataclasses.astuple(positions[-1])
+    assert positions[: driver._n_motors] == (0,) * driver._n_motors
+    assert positions[driver._n_motors :] == (None,) * (8 - driver._n_motors)
+
+
+def test_reset_device(driver) -> None:
+    booted = list()
+    driver.on(responses.Booted, booted.append)
+    driver.set(commands.ResetDevice())
+    wait_until(lambda: booted)
+
+    assert booted[0].deviceID == driver._id
+    with pytest.raises(ClientClosedError):
+        driver.get(commands.GetVersion())